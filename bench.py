@@ -0,0 +1,133 @@
+"""Benchmark main.py on generated cohorts of growing size.
+
+    python bench.py                          # 1k, 10k and 100k students
+    python bench.py --sizes 1000 1000000 --reports
+    python bench.py --update-golden          # record report digests as the reference
+
+Each size runs in a fresh interpreter. That interpreter times read_students,
+analyze_students and every report, and records the process's peak memory.
+The printed output of all reports is hashed and checked against
+bench_golden.json, so an optimisation has to leave every report
+byte-for-byte unchanged. Generated files are cached in --data-dir.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import gen_cohort
+
+GOLDEN_FILE = "bench_golden.json"
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+def peak_memory_mb():
+    """Peak resident memory of this process so far, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+def measure(data_file):
+    """Time one cohort in this process; returns a JSON-ready result dict"""
+    import main
+    result = {"file": data_file}
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        main.read_students(data_file)
+        result["read"] = time.perf_counter() - started
+        result["students"] = len(main.students)
+        result["peak_mb_read"] = peak_memory_mb()
+
+        started = time.perf_counter()
+        analysis = main.analyze_students()
+        result["analyze"] = time.perf_counter() - started
+        result["peak_mb_analyze"] = peak_memory_mb()
+
+    digest = hashlib.sha256()
+    result["reports"] = {}
+    for letter in main.ALL_REPORTS:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            started = time.perf_counter()
+            main.run_reports(letter, analysis)
+            result["reports"][letter] = time.perf_counter() - started
+        digest.update(buffer.getvalue().encode("utf-8"))
+    result["peak_mb"] = peak_memory_mb()
+    result["digest"] = digest.hexdigest()
+    return result
+
+def run_size(size, seed, data_dir):
+    data_file = os.path.join(data_dir, f"cohort_{size}_s{seed}.txt")
+    if not os.path.exists(data_file):
+        gen_cohort.write_cohort(data_file, size, seed)
+    # A fresh interpreter per size keeps peak memory and caches independent
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", data_file],
+                            check=True, stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output.stdout.decode("utf-8").splitlines()[-1])
+
+def format_mb(value):
+    return f"{value:8.1f}" if value is not None else f"{'n/a':>8}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark main.py on generated cohorts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="cohort sizes to run")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed (default: 0)")
+    parser.add_argument("--data-dir", default="bench_data", help="where generated cohorts are kept")
+    parser.add_argument("--reports", action="store_true", help="also print the time of each report")
+    parser.add_argument("--json", help="write all results to this JSON file")
+    parser.add_argument("--golden", default=GOLDEN_FILE, help=f"report digests to compare with (default: {GOLDEN_FILE})")
+    parser.add_argument("--update-golden", action="store_true", help="store this run's digests as the reference")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return 0
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    golden = {}
+    if os.path.exists(args.golden):
+        with open(args.golden, encoding="utf-8") as f:
+            golden = json.load(f)
+
+    print(f"{'Students':>10} {'Read s':>8} {'Stud/s':>10} {'Analyze s':>10} {'Reports s':>10} "
+          f"{'Peak MB':>8}  Golden")
+    print("-" * 80)
+    results, mismatches = [], 0
+    for size in args.sizes:
+        result = run_size(size, args.seed, args.data_dir)
+        results.append(result)
+        key = f"{size}/{args.seed}"
+        if args.update_golden:
+            golden[key] = result["digest"]
+            status = "recorded"
+        elif key not in golden:
+            status = "no reference"
+        elif golden[key] == result["digest"]:
+            status = "match"
+        else:
+            status = "MISMATCH"
+            mismatches += 1
+        reports = sum(result["reports"].values())
+        print(f"{result['students']:10} {result['read']:8.3f} {result['students'] / result['read']:10,.0f} "
+              f"{result['analyze']:10.3f} {reports:10.3f} {format_mb(result['peak_mb'])}  {status}")
+        if args.reports:
+            print("           " + "  ".join(f"{letter}={seconds:.3f}" for letter, seconds in result["reports"].items()))
+
+    if args.update_golden:
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, indent=2, sort_keys=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
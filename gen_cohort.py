@@ -0,0 +1,113 @@
+"""Seeded synthetic cohort generator in the data file format main.py reads.
+
+    python gen_cohort.py -n 100000 --seed 7 -o cohort_100k.txt
+
+The same size and seed always produce the same file. Marks follow a per-student
+ability, so toppers and failures cluster as they would in a real class. Some IAs
+are marked absent ("AB", read as 0). The subject mix covers theory-only,
+theory + lab and IPCC subjects, and some students have fees pending.
+"""
+import argparse
+import random
+import sys
+
+COLLEGES = (("1AB", 0.85), ("1AC", 0.08), ("2KA", 0.07))
+YEARS = ("21", "22", "23", "24")
+BRANCHES = ("CS", "EC", "ME", "CV", "AI", "IS")
+FIRST_NAMES = ("Ramesh", "Suresh", "Anita", "Priya", "Kiran", "Pooja", "Rahul", "Sneha", "Arjun", "Divya",
+               "Vikram", "Meera", "Naveen", "Lakshmi", "Manoj", "Kavya", "Rohit", "Shreya", "Ajay", "Nisha")
+LAST_NAMES = ("Kumar", "Patel", "Rao", "Shetty", "Nair", "Reddy", "Sharma", "Iyer", "Gowda", "Hegde",
+              "Joshi", "Menon", "Das", "Pillai", "Bhat")
+MENTORS = ("Dr. Anil Kumar", "Dr. Kavitha R", "Dr. Sunita Rao", "Dr. Mohan Das", "Dr. Rekha S",
+           "Dr. Prakash N", "Dr. Farida Khan", "Dr. Venkatesh B")
+
+# (code, name, lab kind): "" theory only, "lab" theory + lab, "ipcc" integrated
+SUBJECTS = (
+    ("MAT101", "Mathematics", ""),
+    ("PHY102", "Physics", ""),
+    ("CS103", "Programming in C", "ipcc"),
+    ("CS104", "Data Structures", "ipcc"),
+    ("EC105", "Electronics", ""),
+    ("EVS106", "Environmental Studies", ""),
+    ("CS107", "Programming in Python", "ipcc"),
+    ("EC108", "Digital Logic Lab", "lab"),
+    ("ME109", "Engineering Drawing", "lab"),
+)
+CORE_SUBJECTS = 6           # Everyone takes the first six; the rest are electives
+FEE_PER_YEAR = (95000, 110000, 125000)
+ABSENT_RATE = 0.04          # Chance of each IA being marked absent
+FEE_PENDING_RATE = 0.25
+
+def clamp(value, low, high):
+    return max(low, min(high, int(round(value))))
+
+def usn_generator(rng):
+    """Unique USNs; serials grow past three digits once a college/year/branch fills up"""
+    colleges, weights = zip(*COLLEGES)
+    serials = {}
+    while True:
+        key = rng.choices(colleges, weights)[0] + rng.choice(YEARS) + rng.choice(BRANCHES)
+        serials[key] = serials.get(key, 0) + 1
+        yield f"{key}{serials[key]:03d}"
+
+def subject_lines(rng, ability, code, name, kind):
+    def mark(maximum, spread=0.12):
+        return clamp(rng.gauss(ability, spread) * maximum, 0, maximum)
+
+    def ia():
+        return "AB" if rng.random() < ABSENT_RATE else str(mark(40))
+
+    lab_ia = mark(50) if kind else 0
+    continuous_eval = mark(50) if kind == "ipcc" else 0
+    return [
+        f"Subject Name: {name}",
+        f"Subject Code: {code}",
+        f"Sub(1IA): {ia()}",
+        f"Sub(2IA): {ia()}",
+        f"Sub(3IA): {ia()}",
+        f"Assignment Marks: {0 if rng.random() < 0.05 else mark(10)}",
+        f"Sub(Ext): {mark(40, 0.18)}",
+        f"Lab IA Marks: {lab_ia}",
+        f"Continuous Evaluation Marks: {continuous_eval}",
+        "",
+    ]
+
+def generate(count, seed=0):
+    """Yield the text lines of a cohort file with count students"""
+    rng = random.Random(seed)
+    usns = usn_generator(rng)
+    for number in range(1, count + 1):
+        ability = min(0.95, max(0.15, rng.gauss(0.58, 0.15)))
+        yield f"Student {number}"
+        yield f"Name: {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield f"USN: {next(usns)}"
+        yield ""
+        electives = rng.sample(SUBJECTS[CORE_SUBJECTS:], rng.randint(0, len(SUBJECTS) - CORE_SUBJECTS))
+        for code, name, kind in SUBJECTS[:CORE_SUBJECTS] + tuple(electives):
+            yield from subject_lines(rng, ability, code, name, kind)
+        fee = rng.choice(FEE_PER_YEAR)
+        paid = fee if rng.random() >= FEE_PENDING_RATE else rng.randrange(0, fee, 5000)
+        yield f"Fees per Year: {fee}"
+        yield f"fee_paid:{paid}"
+        yield f"Mentor Name: {rng.choice(MENTORS)}"
+        yield ""
+        yield ""
+
+def write_cohort(path, count, seed=0):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.writelines(line + "\n" for line in generate(count, seed))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic student data file")
+    parser.add_argument("-n", "--students", type=int, default=1000, help="number of students (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.output:
+        write_cohort(args.output, args.students, args.seed)
+    else:
+        sys.stdout.writelines(line + "\n" for line in generate(args.students, args.seed))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
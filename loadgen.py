@@ -0,0 +1,94 @@
+"""Load generator for the query service started with `python main.py --serve PORT`.
+
+Opens many keep-alive connections, replays a mix of GET requests and prints
+throughput and latency percentiles. Standard library only.
+
+    python loadgen.py --port 8080 --clients 200 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+DEFAULT_PATHS = ["/subjects", "/toppers", "/toppers/subjects", "/fees", "/branches", "/summary"]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def read_response(reader):
+    """Status code of one HTTP response (body is read and dropped)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+async def client(host, port, paths, count, offset, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            path = paths[(offset + i) % len(paths)]
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("ascii"))
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+async def fetch_usns(host, port, limit):
+    """A few USNs from the class toppers, so /students/<USN> is part of the mix"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /toppers/subjects HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("ascii"))
+    raw = await reader.read()
+    writer.close()
+    body = json.loads(raw.split(b"\r\n\r\n", 1)[1] or b"{}")
+    return [row["usn"] for rows in body.values() for row in rows][:limit]
+
+async def run(args):
+    paths = list(args.path or DEFAULT_PATHS)
+    if not args.path:
+        paths += [f"/students/{usn}" for usn in await fetch_usns(args.host, args.port, 20)]
+    latencies, statuses = [], {}
+    per_client, extra = divmod(args.requests, args.clients)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, paths, per_client + (i < extra), i, latencies, statuses)
+                           for i in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"Requests:   {len(latencies)} over {args.clients} connections in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    for label, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("max", 1.0)):
+        print(f"{label}:        {percentile(latencies, fraction) * 1000:.2f} ms")
+    print("Statuses:   " + ", ".join(f"{code}={n}" for code, n in sorted(statuses.items())))
+    return 0 if set(statuses) == {200} else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for main.py --serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-c", "--clients", type=int, default=200, help="concurrent connections (default: 200)")
+    parser.add_argument("-n", "--requests", type=int, default=20000, help="total requests (default: 20000)")
+    parser.add_argument("--path", action="append", help="path to request (repeatable; default: a mixed set)")
+    args = parser.parse_args(argv)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run(args))
+    finally:
+        loop.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,46 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import glob
+import hashlib
+import heapq
+import html
+import io
+import json
+import locale
+import math
+import mmap
 import os
-from collections import defaultdict
+import re
+import signal
+import smtplib
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right, insort
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from email.message import EmailMessage
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the scalar logic functions always work
+    np = None
 
 # ---------------- CONFIGURATION ----------------
 PASS_PERCENT = 0.40
 COLLEGE_CODE = "1AB"  # Based on your USN format
 MAX_THEORY_MARKS = 130  # IA1+IA2+IA3(40+40+40) + Assignment(10) + External(40)
 MAX_LAB_MARKS = 100     # Lab IA(50) + Continuous Eval(50)
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024  # Smaller files are parsed sequentially
+CHUNKS_PER_WORKER = 4   # Extra chunks keep workers busy when block sizes vary
+TOPPERS_K = 3           # Rows shown by the topper reports (g, h)
+ANALYZE_CHUNK_ROWS = 8192           # Students per partial analysis (serial and parallel alike)
+PARALLEL_ANALYZE_MIN_ROWS = 50000   # Smaller cohorts are analyzed in-process
 
 # Based on your USN pattern: 1AB23CV001 - Year(23), Branch(CV), Number(001)
 BRANCH_MAP = {
@@ -17,157 +52,792 @@ BRANCH_MAP = {
     "IS": "Information Science"
 }
 
-students = []
+# ---------------- INSTRUMENTATION ----------------
+# Counters are bumped at coarse points (per file, block, failure or cache miss)
+# and always kept; phase timers only measure once enabled.
+METRICS_PREFIX = "sms"
 
-# ---------------- FILE READING ----------------
-def read_students(filepath):
-    """Read student data from the descriptive format file"""
-    if not os.path.exists(filepath):
-        print(f"ERROR: File '{filepath}' not found")
+class _NullTimer:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
         return False
+
+_NULL_TIMER = _NullTimer()
+
+class PhaseTimer:
+    """Wall and CPU time of one `with` block, added to its phase on exit"""
+    __slots__ = ("instruments", "name", "wall", "cpu")
+    
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+    
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+    
+    def __exit__(self, *exc):
+        self.instruments.record(self.name, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+        return False
+
+class Instruments:
+    """Per-phase timers and run counters, exportable as JSON or Prometheus text"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}                    # Phase name -> [calls, wall seconds, cpu seconds]
+        self.counters = defaultdict(int)
+    
+    def enable(self):
+        self.enabled = True
     
+    def phase(self, name):
+        """Context manager timing a phase (a shared no-op while disabled)"""
+        return PhaseTimer(self, name) if self.enabled else _NULL_TIMER
+    
+    def record(self, name, wall, cpu):
+        totals = self.phases.get(name)
+        if totals is None:
+            totals = self.phases[name] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += cpu
+    
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+    
+    def merge_counters(self, counters):
+        for name, amount in counters.items():
+            self.counters[name] += amount
+    
+    def summary(self):
+        return {
+            "phases": {name: {"calls": calls, "wall_seconds": wall, "cpu_seconds": cpu}
+                       for name, (calls, wall, cpu) in self.phases.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+    
+    def prometheus_text(self):
+        lines = []
+        for metric, column, kind, help_text in (
+                ("phase_calls_total", 0, "counter", "Times each phase ran"),
+                ("phase_wall_seconds", 1, "gauge", "Wall-clock seconds spent in each phase"),
+                ("phase_cpu_seconds", 2, "gauge", "CPU seconds spent in each phase")):
+            lines.append(f"# HELP {METRICS_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{metric} {kind}")
+            for name, totals in self.phases.items():
+                lines.append(f'{METRICS_PREFIX}_{metric}{{phase="{name}"}} {totals[column]}')
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name}_total counter")
+            lines.append(f"{METRICS_PREFIX}_{name}_total {amount}")
+        return "\n".join(lines) + "\n"
+    
+    def export(self, json_path=None, prometheus_path=None):
+        """Write the summary to whichever of the two files were given"""
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+                f.write("\n")
+        if prometheus_path:
+            with open(prometheus_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+
+instruments = Instruments()
+
+# ---------------- FILE READING ----------------
+def parse_int(value):
+    """Convert a mark/fee field to int, treating malformed values as 0"""
     try:
-        with open(filepath, "r") as f:
-            lines = f.readlines()
-        
-        i = 0
-        current_student = None
-        subjects = []
-        
-        while i < len(lines):
-            line = lines[i].strip()
+        return int(value)
+    except ValueError:
+        instruments.counters["fields_defaulted"] += 1
+        return 0
+
+def _set_name(student, subject, value):
+    student["name"] = value
+
+def _set_usn(student, subject, value):
+    student["usn"] = value
+
+def _set_subject_name(student, subject, value):
+    subject["name"] = value
+
+def _set_subject_code(student, subject, value):
+    subject["code"] = value
+
+def _set_ia1(student, subject, value):
+    subject["ia1"] = parse_int(value)
+
+def _set_ia2(student, subject, value):
+    subject["ia2"] = parse_int(value)
+
+def _set_ia3(student, subject, value):
+    subject["ia3"] = parse_int(value)
+
+def _set_assignment(student, subject, value):
+    subject["assignment"] = parse_int(value)
+
+def _set_external(student, subject, value):
+    subject["external"] = parse_int(value)
+
+def _set_lab_total(student, subject, value):
+    subject["lab_total"] = parse_int(value)
+
+def _set_lab_ia(student, subject, value):
+    subject["lab_ia"] = parse_int(value)
+
+def _set_continuous_eval(student, subject, value):
+    """Continuous Evaluation is the last line of a subject block, so finish the subject here"""
+    subject["continuous_eval"] = parse_int(value)
+    student["subjects"].append(finished_subject(subject))
+
+def finished_subject(subject):
+    """The subject dict added to a student, from the subject fields read so far"""
+    # Determine subject type based on available marks
+    lab_ia = subject["lab_ia"]
+    continuous_eval = subject["continuous_eval"]
+    subject_type = "IPCC" if (lab_ia > 0 or continuous_eval > 0) else "Normal"
+    
+    return {
+        "type": subject_type,
+        "name": subject["name"],
+        "code": subject["code"],
+        "ia": [subject["ia1"], subject["ia2"], 0],  # Assuming no IA3 in your data
+        "assignment": subject["assignment"],
+        "external": subject["external"],
+        "lab_ia": lab_ia,
+        "continuous_eval": continuous_eval
+    }
+
+def _set_fee_total(student, subject, value):
+    student["fee_total"] = parse_int(value)
+
+def _set_fee_paid(student, subject, value):
+    student["fee_paid"] = parse_int(value)
+
+def _set_fee_installment(student, subject, value):
+    """An installment line: the amount, optionally followed by a date or note"""
+    amount = value.split(None, 1)[0] if value else value
+    student.setdefault("installments", []).append(parse_int(amount))
+
+def finish_fees(student):
+    """Fold a finished student's fee lines into fee_paid.
+    
+    fee_paid is the paid amount plus every installment. A student with
+    neither line is taken to have paid in full, as older files have no
+    payment lines at all."""
+    installments = student.pop("installments", ())
+    if "fee_paid" in student or installments:
+        student["fee_paid"] = student.get("fee_paid", 0) + sum(installments)
+    elif "fee_total" in student:
+        student["fee_paid"] = student["fee_total"]
+
+def _set_mentor(student, subject, value):
+    student["mentor"] = value
+
+# Prefix (text before the first ':') -> handler(student, subject, value)
+LINE_HANDLERS = {
+    "Name": _set_name,
+    "USN": _set_usn,
+    "Subject Name": _set_subject_name,
+    "Subject Code": _set_subject_code,
+    "Sub(1IA)": _set_ia1,
+    "Sub(2IA)": _set_ia2,
+    "Sub(3IA)": _set_ia3,
+    "Assignment Marks": _set_assignment,
+    "Sub(Ext)": _set_external,
+    "Lab Subject Marks": _set_lab_total,
+    "Lab IA Marks": _set_lab_ia,
+    "Continuous Evaluation Marks": _set_continuous_eval,
+    "Fees per Year": _set_fee_total,
+    "fee_paid": _set_fee_paid,
+    "fee_installment": _set_fee_installment,
+    "Mentor Name": _set_mentor,
+}
+
+def new_subject_fields():
+    """Default values for the fields of a subject block still being read"""
+    return {
+        "name": "", "code": "",
+        "ia1": 0, "ia2": 0, "ia3": 0,
+        "assignment": 0, "external": 0,
+        "lab_total": 0, "lab_ia": 0, "continuous_eval": 0
+    }
+
+def is_student_header(line):
+    """Check for a 'Student N' line that starts a new student section"""
+    return line.startswith("Student") and line[7:].strip().isdigit()
+
+# Subject fields that finished_subject reads from earlier lines. A block that
+# omits one of them gets the value left by the blocks before it.
+CARRIED_SUBJECT_FIELDS = ("name", "code", "ia1", "ia2", "assignment", "external", "lab_ia")
+
+def iter_students(lines, subject=None):
+    """Parse student records from an iterable of lines, yielding each finished student.
+    
+    subject holds the subject fields carried in from earlier lines (fresh
+    defaults when None); it is updated in place as lines are read."""
+    current_student = None
+    # Subject fields carry over between blocks, as in the original line-by-line reader
+    if subject is None:
+        subject = new_subject_fields()
+    line_count = student_count = subject_count = 0
+    
+    try:
+        for line_count, line in enumerate(lines, 1):
+            line = line.strip()
             
             # Skip empty lines
             if not line:
-                i += 1
                 continue
             
-            # Check if this is a new student section
-            if line.startswith("Student") and line[7:].strip().isdigit():
-                # If we have a previous student, add them to the list
+            key, sep, value = line.partition(":")
+            if sep:
+                # Field line: dispatch on the text before the first ':'
                 if current_student is not None:
-                    current_student["subjects"] = subjects
-                    students.append(current_student)
-                
-                # Start new student
-                current_student = {}
-                subjects = []
-                i += 1
-                continue
-            
-            # Parse student details
-            if current_student is not None:
-                # Parse Name
-                if line.startswith("Name:"):
-                    current_student["name"] = line[5:].strip()
-                
-                # Parse USN
-                elif line.startswith("USN:"):
-                    current_student["usn"] = line[4:].strip()
-                
-                # Parse Subject Name
-                elif line.startswith("Subject Name:"):
-                    subject_name = line[13:].strip()
-                
-                # Parse Subject Code
-                elif line.startswith("Subject Code:"):
-                    subject_code = line[13:].strip()
-                
-                # Parse IA1
-                elif line.startswith("Sub(1IA):"):
-                    try:
-                        ia1 = int(line[9:].strip())
-                    except:
-                        ia1 = 0
-                
-                # Parse IA2
-                elif line.startswith("Sub(2IA):"):
-                    try:
-                        ia2 = int(line[9:].strip())
-                    except:
-                        ia2 = 0
-                
-                # Parse IA3 - from your data format, it seems IA3 is not provided
-                elif line.startswith("Sub(3IA):"):
-                    try:
-                        ia3 = int(line[9:].strip())
-                    except:
-                        ia3 = 0
-                
-                # Parse Assignment Marks
-                elif line.startswith("Assignment Marks:"):
-                    try:
-                        assignment = int(line[17:].strip())
-                    except:
-                        assignment = 0
-                
-                # Parse External Marks
-                elif line.startswith("Sub(Ext):"):
-                    try:
-                        external = int(line[9:].strip())
-                    except:
-                        external = 0
-                
-                # Parse Lab Subject Marks
-                elif line.startswith("Lab Subject Marks:"):
-                    try:
-                        lab_total = int(line[18:].strip())
-                    except:
-                        lab_total = 0
-                
-                # Parse Lab IA Marks
-                elif line.startswith("Lab IA Marks:"):
-                    try:
-                        lab_ia = int(line[13:].strip())
-                    except:
-                        lab_ia = 0
-                
-                # Parse Continuous Evaluation Marks
-                elif line.startswith("Continuous Evaluation Marks:"):
-                    try:
-                        continuous_eval = int(line[27:].strip())
-                    except:
-                        continuous_eval = 0
-                    
-                    # At this point, we have all subject data, create subject entry
-                    # Determine subject type based on available marks
-                    subject_type = "IPCC" if (lab_ia > 0 or continuous_eval > 0) else "Normal"
-                    
-                    subject = {
-                        "type": subject_type,
-                        "name": subject_name,
-                        "code": subject_code,
-                        "ia": [ia1, ia2, 0],  # Assuming no IA3 in your data
-                        "assignment": assignment,
-                        "external": external,
-                        "lab_ia": lab_ia,
-                        "continuous_eval": continuous_eval
-                    }
-                    
-                    subjects.append(subject)
-                
-                # Parse Fees per Year
-                elif line.startswith("Fees per Year:"):
-                    try:
-                        fee_total = int(line[14:].strip())
-                        current_student["fee_total"] = fee_total
-                        # For your data, we don't have fee_paid, so we'll assume it's paid
-                        current_student["fee_paid"] = fee_total  # Assuming full payment
-                    except:
-                        current_student["fee_total"] = 0
-                        current_student["fee_paid"] = 0
-                
-                # Parse Mentor Name
-                elif line.startswith("Mentor Name:"):
-                    current_student["mentor"] = line[12:].strip()
+                    handler = LINE_HANDLERS.get(key)
+                    if handler is not None:
+                        handler(current_student, subject, value.strip())
             
-            i += 1
+            # Check if this is a new student section
+            elif is_student_header(line):
+                if current_student is not None:
+                    student_count += 1
+                    subject_count += len(current_student["subjects"])
+                    finish_fees(current_student)
+                    yield current_student
+                current_student = {"subjects": []}
         
-        # Add the last student
+        # Yield the last student
         if current_student is not None:
-            current_student["subjects"] = subjects
-            students.append(current_student)
+            student_count += 1
+            subject_count += len(current_student["subjects"])
+            finish_fees(current_student)
+            yield current_student
+    finally:
+        counters = instruments.counters
+        counters["lines_read"] += line_count
+        counters["students_parsed"] += student_count
+        counters["subjects_parsed"] += subject_count
+
+def stream_students(filepath):
+    """Yield student records from a file one at a time, without loading the whole file"""
+    with open(filepath, "r") as f:
+        for student in iter_students(f):
+            yield student
+
+# ---------------- COHORT STORE ----------------
+# Per-subject marks kept as typed columns; "ia" is exposed as [ia1, ia2, ia3]
+MARK_FIELDS = ("ia1", "ia2", "ia3", "assignment", "external", "lab_ia", "continuous_eval")
+
+class SubjectCatalog:
+    """Interns subject (code, name) pairs so each is stored once per cohort"""
+    __slots__ = ("codes", "names", "_ids")
+    
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self._ids = {}
+    
+    def intern(self, code, name):
+        """Return the id of a subject, adding it to the catalog if new"""
+        key = (code, name)
+        subject_id = self._ids.get(key)
+        if subject_id is None:
+            subject_id = len(self.codes)
+            self._ids[key] = subject_id
+            self.codes.append(code)
+            self.names.append(name)
+        return subject_id
+    
+    def __len__(self):
+        return len(self.codes)
+
+# ---------------- INDEXES ----------------
+# USN layout 1AB23CV001: college code, admission year, branch code, roll number
+USN_COLLEGE = slice(0, 3)
+USN_YEAR = slice(3, 5)
+USN_BRANCH = slice(5, 7)
+
+class CohortIndex:
+    """USN hash index plus secondary indexes, maintained as students are added.
+    
+    Secondary indexes map a decoded USN part to the row numbers that carry it,
+    in load order. Parts of a USN too short to contain them are keyed None."""
+    
+    SECONDARY = ("by_college", "by_year", "by_branch")
+    
+    def __init__(self):
+        self.by_usn = {}
+        self.by_college = defaultdict(list)
+        self.by_year = defaultdict(list)
+        self.by_branch = defaultdict(list)
+    
+    @classmethod
+    def from_groups(cls, usns, groups):
+        """Index over usns (in row order) with secondary indexes given as {name: {key: rows}}"""
+        index = cls()
+        # Reversed so that the first occurrence of a USN is the one kept
+        index.by_usn = dict(zip(reversed(usns), range(len(usns) - 1, -1, -1)))
+        for name in cls.SECONDARY:
+            getattr(index, name).update(groups[name])
+        return index
+    
+    @staticmethod
+    def decode_usn(usn):
+        """Split a USN into (college code, admission year, branch code)"""
+        college = usn[USN_COLLEGE] if len(usn) >= USN_COLLEGE.stop else None
+        year = usn[USN_YEAR] if len(usn) >= USN_YEAR.stop else None
+        branch = usn[USN_BRANCH] if len(usn) >= USN_BRANCH.stop else None
+        return college, year, branch
+    
+    def add(self, row, usn):
+        # First occurrence wins, as with the old linear search
+        self.by_usn.setdefault(usn, row)
+        college, year, branch = self.decode_usn(usn)
+        insort(self.by_college[college], row)
+        insort(self.by_year[year], row)
+        insort(self.by_branch[branch], row)
+    
+    def remove(self, row, usn):
+        if self.by_usn.get(usn) == row:
+            del self.by_usn[usn]
+        for index, key in zip((self.by_college, self.by_year, self.by_branch), self.decode_usn(usn)):
+            index[key].remove(row)
+            if not index[key]:
+                del index[key]
+    
+    def row_of(self, usn):
+        """Row number of a USN, or None"""
+        return self.by_usn.get(usn)
+    
+    def college_rows(self, college_code=COLLEGE_CODE):
+        """(rows whose USN starts with college_code, all other rows), each in load order"""
+        inside = []
+        outside = []
+        for college, rows in self.by_college.items():
+            if college is not None and college.startswith(college_code):
+                inside.extend(rows)
+            else:
+                outside.extend(rows)
+        return sorted(inside), sorted(outside)
+
+class CohortStore:
+    """Array-backed cohort: one row per student, one slot per student-subject pair.
+    
+    Subject slots for student i are subject_start[i]:subject_start[i + 1] in the
+    mark columns. Iterating yields StudentView objects that behave like the
+    student dicts produced by the parser."""
+    
+    def __init__(self):
+        self.catalog = SubjectCatalog()
+        self.names = []
+        self.usns = []
+        self.mentors = []           # Interned mentor names
+        self._mentor_ids = {}
+        self.mentor_id = array("i")
+        self.fee_total = array("q")
+        self.fee_paid = array("q")
+        self.subject_start = array("q", [0])
+        self.subject_id = array("i")
+        self.marks = {field: array("i") for field in MARK_FIELDS}
+        self._metrics = []          # Cached SubjectMetrics per slot, None when stale
+        self.index = CohortIndex()
+    
+    def _intern_mentor(self, mentor):
+        mentor_id = self._mentor_ids.get(mentor)
+        if mentor_id is None:
+            mentor_id = len(self.mentors)
+            self._mentor_ids[mentor] = mentor_id
+            self.mentors.append(mentor)
+        return mentor_id
+    
+    def append(self, student):
+        """Add one parsed student dict to the store"""
+        self.index.add(len(self.names), student.get("usn", ""))
+        self.names.append(student.get("name", ""))
+        self.usns.append(student.get("usn", ""))
+        self.mentor_id.append(self._intern_mentor(student.get("mentor", "")))
+        self.fee_total.append(student.get("fee_total", 0))
+        self.fee_paid.append(student.get("fee_paid", 0))
+        
+        subject_ids, columns = self._subject_columns(student["subjects"])
+        self.subject_id.extend(subject_ids)
+        for field in MARK_FIELDS:
+            self.marks[field].extend(columns[field])
+        self._metrics.extend([None] * len(subject_ids))
+        self.subject_start.append(len(self.subject_id))
+    
+    def _subject_columns(self, subjects):
+        """Subject ids and per-field mark columns for a list of subject dicts"""
+        subject_ids = array("i")
+        columns = {field: array("i") for field in MARK_FIELDS}
+        for subject in subjects:
+            subject_ids.append(self.catalog.intern(subject["code"], subject["name"]))
+            ia = subject["ia"]
+            columns["ia1"].append(ia[0])
+            columns["ia2"].append(ia[1])
+            columns["ia3"].append(ia[2])
+            columns["assignment"].append(subject["assignment"])
+            columns["external"].append(subject["external"])
+            columns["lab_ia"].append(subject.get("lab_ia", 0))
+            columns["continuous_eval"].append(subject.get("continuous_eval", 0))
+        return subject_ids, columns
+    
+    def replace(self, row, student):
+        """Overwrite one student row with a parsed student dict.
+        
+        The number of subjects may change; later rows' slots shift accordingly."""
+        usn = student.get("usn", "")
+        if usn != self.usns[row]:
+            self.index.remove(row, self.usns[row])
+            self.index.add(row, usn)
+        self.names[row] = student.get("name", "")
+        self.usns[row] = usn
+        self.mentor_id[row] = self._intern_mentor(student.get("mentor", ""))
+        self.fee_total[row] = student.get("fee_total", 0)
+        self.fee_paid[row] = student.get("fee_paid", 0)
         
+        start, end = self.subject_start[row], self.subject_start[row + 1]
+        subject_ids, columns = self._subject_columns(student["subjects"])
+        self.subject_id[start:end] = subject_ids
+        for field in MARK_FIELDS:
+            self.marks[field][start:end] = columns[field]
+        self._metrics[start:end] = [None] * len(subject_ids)
+        
+        shift = len(subject_ids) - (end - start)
+        if shift:
+            for later in range(row + 1, len(self.subject_start)):
+                self.subject_start[later] += shift
+    
+    def truncate(self, count):
+        """Drop every row from count onwards"""
+        for row in range(count, len(self.names)):
+            self.index.remove(row, self.usns[row])
+        slot = self.subject_start[count]
+        for column in (self.names, self.usns, self.mentor_id, self.fee_total, self.fee_paid):
+            del column[count:]
+        del self.subject_start[count + 1:]
+        del self.subject_id[slot:]
+        for field in MARK_FIELDS:
+            del self.marks[field][slot:]
+        del self._metrics[slot:]
+    
+    def extend(self, records):
+        for student in records:
+            self.append(student)
+    
+    def rebuild_lookups(self, index=None):
+        """Recreate interning maps, the metrics cache and the index after columns were set directly.
+        
+        A ready-made index (e.g. from a snapshot) is taken as-is instead of being rebuilt."""
+        self.catalog._ids = {key: i for i, key in enumerate(zip(self.catalog.codes, self.catalog.names))}
+        self._mentor_ids = {mentor: i for i, mentor in enumerate(self.mentors)}
+        self._metrics = [None] * len(self.subject_id)
+        if index is not None:
+            self.index = index
+            return
+        for row, usn in enumerate(self.usns):
+            self.index.add(row, usn)
+    
+    def row_columns(self, start, end):
+        """Columns of rows start:end as lists and arrays, cheap to pickle (see from_columns)"""
+        first, last = self.subject_start[start], self.subject_start[end]
+        return {
+            "codes": self.catalog.codes, "subject_names": self.catalog.names, "mentors": self.mentors,
+            "names": self.names[start:end], "usns": self.usns[start:end],
+            "mentor_id": self.mentor_id[start:end],
+            "fee_total": self.fee_total[start:end], "fee_paid": self.fee_paid[start:end],
+            "subject_start": array("q", [offset - first for offset in self.subject_start[start:end + 1]]),
+            "subject_id": self.subject_id[first:last],
+            "marks": {field: column[first:last] for field, column in self.marks.items()},
+        }
+    
+    @classmethod
+    def from_columns(cls, columns):
+        store = cls()
+        store.catalog.codes, store.catalog.names = columns["codes"], columns["subject_names"]
+        for name in ("mentors", "names", "usns", "mentor_id", "fee_total", "fee_paid",
+                     "subject_start", "subject_id", "marks"):
+            setattr(store, name, columns[name])
+        store.rebuild_lookups()
+        return store
+    
+    def clear(self):
+        self.__init__()
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError("student index out of range")
+        return StudentView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.names)):
+            yield StudentView(self, index)
+    
+    def find(self, usn):
+        """StudentView for a USN in O(1), or None"""
+        row = self.index.row_of(usn)
+        return None if row is None else StudentView(self, row)
+    
+    def find_many(self, usns):
+        """Look up many USNs at once, yielding (usn, StudentView or None)"""
+        for usn in usns:
+            yield usn, self.find(usn)
+    
+    def subject_slots(self, index):
+        """Range of subject slots belonging to student index"""
+        return range(self.subject_start[index], self.subject_start[index + 1])
+    
+    def metrics(self, slot):
+        """Derived metrics of one slot, computed on first use and cached until its marks change"""
+        cached = self._metrics[slot]
+        if cached is None:
+            instruments.counters["metrics_cache_misses"] += 1
+            cached = self._metrics[slot] = compute_subject_metrics(SubjectView(self, slot))
+        elif instruments.enabled:
+            instruments.counters["metrics_cache_hits"] += 1
+        return cached
+    
+    def invalidate(self, slot):
+        """Drop the cached metrics of a slot whose marks changed"""
+        self._metrics[slot] = None
+    
+    def fill_metrics(self):
+        """Compute metrics for every stale slot in one go (vectorized when NumPy is available)"""
+        if None not in self._metrics:
+            return
+        if np is not None:
+            instruments.count("metrics_cache_misses", self._metrics.count(None))
+            fresh = metrics_from_grades(grade_cohort(self))
+            self._metrics = [old if old is not None else new for old, new in zip(self._metrics, fresh)]
+        else:
+            for slot in range(len(self._metrics)):
+                self.metrics(slot)
+
+class StudentView:
+    """Read/write accessor for one student row, used like the parsed student dict"""
+    __slots__ = ("_store", "index")
+    
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+    
+    def __getitem__(self, key):
+        store, i = self._store, self.index
+        if key == "name":
+            return store.names[i]
+        if key == "usn":
+            return store.usns[i]
+        if key == "mentor":
+            return store.mentors[store.mentor_id[i]]
+        if key == "fee_total":
+            return store.fee_total[i]
+        if key == "fee_paid":
+            return store.fee_paid[i]
+        if key == "subjects":
+            return [SubjectView(store, slot) for slot in store.subject_slots(i)]
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        store, i = self._store, self.index
+        if key == "name":
+            store.names[i] = value
+        elif key == "usn":
+            store.index.remove(i, store.usns[i])
+            store.usns[i] = value
+            store.index.add(i, value)
+        elif key == "mentor":
+            store.mentor_id[i] = store._intern_mentor(value)
+        elif key == "fee_total":
+            store.fee_total[i] = value
+        elif key == "fee_paid":
+            store.fee_paid[i] = value
+        else:
+            raise KeyError(key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def to_dict(self):
+        """Materialize the row as a plain student dict"""
+        record = {key: self[key] for key in ("name", "usn", "fee_total", "fee_paid", "mentor")}
+        record["subjects"] = [subject.to_dict() for subject in self["subjects"]]
+        return record
+
+class SubjectView:
+    """Read/write accessor for one student-subject slot, used like the subject dict"""
+    __slots__ = ("_store", "slot")
+    
+    def __init__(self, store, slot):
+        self._store = store
+        self.slot = slot
+    
+    def __getitem__(self, key):
+        store, slot = self._store, self.slot
+        marks = store.marks
+        if key == "ia":
+            return [marks["ia1"][slot], marks["ia2"][slot], marks["ia3"][slot]]
+        if key in marks:
+            return marks[key][slot]
+        if key == "code":
+            return store.catalog.codes[store.subject_id[slot]]
+        if key == "name":
+            return store.catalog.names[store.subject_id[slot]]
+        if key == "type":
+            return "IPCC" if (marks["lab_ia"][slot] > 0 or marks["continuous_eval"][slot] > 0) else "Normal"
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        marks = self._store.marks
+        if key == "ia":
+            marks["ia1"][self.slot], marks["ia2"][self.slot], marks["ia3"][self.slot] = value
+        elif key in marks:
+            marks[key][self.slot] = value
+        else:
+            raise KeyError(key)
+        self._store.invalidate(self.slot)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def to_dict(self):
+        """Materialize the slot as a plain subject dict"""
+        return {key: self[key] for key in
+                ("type", "name", "code", "ia", "assignment", "external", "lab_ia", "continuous_eval")}
+
+students = CohortStore()
+
+# ---------------- PARALLEL FILE READING ----------------
+def find_block_boundaries(data, chunk_count):
+    """Split a mapped file into about chunk_count byte ranges at 'Student N' headers"""
+    size = len(data)
+    boundaries = [0]
+    for n in range(1, chunk_count):
+        pos = max(size * n // chunk_count, boundaries[-1])
+        # Move forward to the next line that starts a student section
+        while True:
+            pos = data.find(b"\nStudent", pos)
+            if pos == -1:
+                break
+            line_end = data.find(b"\n", pos + 1)
+            if line_end == -1:
+                line_end = size
+            if is_student_header(data[pos + 1:line_end].decode("ascii", "replace").strip()):
+                break
+            pos = line_end
+        if pos == -1:
+            break
+        if pos + 1 > boundaries[-1]:
+            boundaries.append(pos + 1)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+class ChunkSubjectFields(dict):
+    """Subject fields of a chunk parsed without the chunks before it.
+    
+    Starts from the defaults and records which carried fields the chunk has
+    set so far. Each subject finished while some were still unset appends
+    those field names to `inherited`, so they can be filled in afterwards
+    from the state the previous chunk left."""
+    
+    def __init__(self):
+        super().__init__(new_subject_fields())
+        self.unset = frozenset(CARRIED_SUBJECT_FIELDS)
+        self.inherited = []
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "continuous_eval":
+            # Set just before the subject is finished (see _set_continuous_eval)
+            if self.unset:
+                self.inherited.append(self.unset)
+        elif key in self.unset:
+            self.unset = self.unset - {key}
+    
+    def set_fields(self):
+        """{field: value} of the carried fields this chunk has set"""
+        return {field: self[field] for field in CARRIED_SUBJECT_FIELDS if field not in self.unset}
+
+def inherit_subject_fields(chunk, inherited, carried):
+    """Redo the first subjects of a chunk with the fields they should have carried in"""
+    subjects = (subject for student in chunk for subject in student["subjects"])
+    for fields, subject in zip(inherited, subjects):
+        state = dict(subject, ia1=subject["ia"][0], ia2=subject["ia"][1])
+        state.update((field, carried[field]) for field in fields)
+        subject.update(finished_subject(state))
+
+def _parse_byte_range(task):
+    """Worker: parse the student blocks in one byte range of the file"""
+    filepath, start, end, encoding = task
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    before = dict(instruments.counters)
+    subject = ChunkSubjectFields()
+    # Universal newlines, as when the sequential reader iterates the file in text mode
+    chunk = list(iter_students(io.StringIO(text, newline=None), subject))
+    # Counters of this chunk only; worker processes are reused across chunks
+    counters = {name: amount - before.get(name, 0) for name, amount in instruments.counters.items()}
+    return chunk, subject.set_fields(), subject.inherited, counters
+
+def parse_students_parallel(filepath, workers=None):
+    """Parse a file across a process pool and return the students in file order.
+    
+    Chunks are parsed independently, then the subjects a chunk finished before
+    setting every carried field get those fields from the chunks before it,
+    so the result equals the sequential parse."""
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filepath)
+    if workers == 1 or size < PARALLEL_MIN_BYTES:
+        return list(stream_students(filepath))
+    
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ranges = find_block_boundaries(data, workers * CHUNKS_PER_WORKER)
+    
+    encoding = locale.getpreferredencoding(False)
+    tasks = [(filepath, start, end, encoding) for start, end in ranges]
+    result = []
+    carried = new_subject_fields()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() returns chunks in submission order, i.e. file order
+        for chunk, set_fields, inherited, counters in pool.map(_parse_byte_range, tasks):
+            inherit_subject_fields(chunk, inherited, carried)
+            carried.update(set_fields)
+            result.extend(chunk)
+            instruments.merge_counters(counters)
+    return result
+
+def read_students(filepath, workers=1):
+    """Read student data from the descriptive format file.
+    
+    With workers other than 1 (None = all cores) large files are parsed in parallel."""
+    if not os.path.exists(filepath):
+        print(f"ERROR: File '{filepath}' not found")
+        return False
+    
+    try:
+        if workers == 1:
+            students.extend(stream_students(filepath))
+        else:
+            students.extend(parse_students_parallel(filepath, workers))
         print(f"Successfully loaded {len(students)} students")
         return True
         
@@ -177,20 +847,345 @@ def read_students(filepath):
         traceback.print_exc()
         return False
 
+# ---------------- BINARY SNAPSHOT CACHE ----------------
+# Layout: fixed header, then length-prefixed sections in SNAPSHOT_SECTIONS order.
+# String sections are NUL-joined UTF-8; the rest are raw native arrays, so
+# loading is a memcpy per column out of the mapped file. The secondary USN
+# indexes are stored as key, group size and row sections, so a load does not
+# decode every USN again; the USN hash index is rebuilt from the usns column.
+SNAPSHOT_MAGIC = b"SMSSNAP\x03"  # Version 3: the USN indexes are stored
+SNAPSHOT_HEADER = struct.Struct("<8sBBBxqq16sqqq")
+INDEX_SECTIONS = tuple(f"{name}_{part}" for name in CohortIndex.SECONDARY
+                       for part in ("keys", "sizes", "rows"))
+SNAPSHOT_SECTIONS = (
+    "codes", "subject_names", "mentors", "names", "usns",
+    "mentor_id", "fee_total", "fee_paid", "subject_start", "subject_id"
+) + MARK_FIELDS + ("fingerprints",) + INDEX_SECTIONS
+SECTION_LENGTH = struct.Struct("<q")
+
+def snapshot_path(filepath):
+    return filepath + ".snap"
+
+def file_digest(filepath):
+    """BLAKE2b content hash of a file, read in 1 MB chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def _native_flags():
+    return (1 if sys.byteorder == "little" else 0, array("i").itemsize, array("q").itemsize)
+
+def _join_strings(values):
+    return "\0".join(values).encode("utf-8", "surrogatepass")
+
+def _split_strings(data, count):
+    return bytes(data).decode("utf-8", "surrogatepass").split("\0") if count else []
+
+def _index_sections(index):
+    """Snapshot sections for the secondary indexes; a None key is stored as "" """
+    sections = {}
+    for name in CohortIndex.SECONDARY:
+        groups = getattr(index, name)
+        keys = list(groups)
+        sections[f"{name}_keys"] = _join_strings("" if key is None else key for key in keys)
+        sections[f"{name}_sizes"] = array("q", [len(groups[key]) for key in keys]).tobytes()
+        sections[f"{name}_rows"] = array("q", [row for key in keys for row in groups[key]]).tobytes()
+    return sections
+
+def _read_index(sections, usns):
+    """Rebuild a CohortIndex from its snapshot sections, checking that every row is covered once"""
+    groups = {}
+    for name in CohortIndex.SECONDARY:
+        sizes = array("q")
+        sizes.frombytes(sections[f"{name}_sizes"])
+        rows = array("q")
+        rows.frombytes(sections[f"{name}_rows"])
+        keys = _split_strings(sections[f"{name}_keys"], len(sizes))
+        if len(keys) != len(sizes) or sum(sizes) != len(rows) or len(rows) != len(usns):
+            raise ValueError(f"index {name} does not match the student rows")
+        groups[name] = {}
+        offset = 0
+        for key, size in zip(keys, sizes):
+            groups[name][key or None] = rows[offset:offset + size].tolist()
+            offset += size
+    return CohortIndex.from_groups(usns, groups)
+
+def write_snapshot(store, filepath, fingerprints=(), source_hash=None):
+    """Write a snapshot of store for the source file filepath (atomically replaced)"""
+    stat = os.stat(filepath)
+    if source_hash is None:
+        source_hash = file_digest(filepath)
+    sections = {
+        "codes": _join_strings(store.catalog.codes),
+        "subject_names": _join_strings(store.catalog.names),
+        "mentors": _join_strings(store.mentors),
+        "names": _join_strings(store.names),
+        "usns": _join_strings(store.usns),
+        "fingerprints": b"".join(fingerprints),
+    }
+    sections.update(_index_sections(store.index))
+    for name in ("mentor_id", "fee_total", "fee_paid", "subject_start", "subject_id"):
+        sections[name] = getattr(store, name).tobytes()
+    for field in MARK_FIELDS:
+        sections[field] = store.marks[field].tobytes()
+    
+    target = snapshot_path(filepath)
+    temp = target + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, *_native_flags(), stat.st_size, stat.st_mtime_ns,
+                                     source_hash, len(store), len(store.catalog), len(store.mentors)))
+        for name in SNAPSHOT_SECTIONS:
+            f.write(SECTION_LENGTH.pack(len(sections[name])))
+            f.write(sections[name])
+    os.replace(temp, target)
+
+def snapshot_is_fresh(filepath):
+    """Check the snapshot's header against the source file.
+    
+    Size and mtime matching is trusted as-is. If only the mtime moved, the
+    content hash decides, and a match refreshes the stored mtime."""
+    target = snapshot_path(filepath)
+    if not os.path.exists(target) or not os.path.exists(filepath):
+        return False
+    with open(target, "rb") as f:
+        raw = f.read(SNAPSHOT_HEADER.size)
+    if len(raw) < SNAPSHOT_HEADER.size:
+        return False
+    header = SNAPSHOT_HEADER.unpack(raw)
+    magic, flags, (size, mtime_ns, source_hash) = header[0], header[1:4], header[4:7]
+    if magic != SNAPSHOT_MAGIC or flags != _native_flags():
+        return False
+    stat = os.stat(filepath)
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    if file_digest(filepath) != source_hash:
+        return False
+    with open(target, "r+b") as f:
+        f.write(SNAPSHOT_HEADER.pack(magic, *flags, size, stat.st_mtime_ns, source_hash, *header[7:]))
+    return True
+
+def read_snapshot(filepath, store):
+    """Fill an empty store from the snapshot of filepath; returns the block fingerprints.
+    
+    Columns are copied out of the mapping because the store is mutable. A
+    truncated or inconsistent snapshot raises ValueError."""
+    error = None
+    with open(snapshot_path(filepath), "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                fingerprint_data, index = _decode_snapshot(data, store)
+            except (struct.error, ValueError) as e:
+                # Only the message is kept: the traceback pins views of the mapping
+                error = f"{type(e).__name__}: {e}"
+    if error is not None:
+        raise ValueError(f"corrupt snapshot ({error})")
+    
+    store.rebuild_lookups(index)
+    return [fingerprint_data[i:i + 16] for i in range(0, len(fingerprint_data), 16)]
+
+def _decode_snapshot(data, store):
+    """Copy the columns of a mapped snapshot into store; returns (fingerprint bytes, CohortIndex)"""
+    header = SNAPSHOT_HEADER.unpack_from(data, 0)
+    student_count, subject_count, mentor_count = header[7:]
+    offset = SNAPSHOT_HEADER.size
+    with memoryview(data) as view:
+        sections = {}
+        for name in SNAPSHOT_SECTIONS:
+            length, = SECTION_LENGTH.unpack_from(data, offset)
+            offset += SECTION_LENGTH.size
+            if not 0 <= length <= len(data) - offset:
+                raise ValueError(f"section {name} is truncated")
+            sections[name] = view[offset:offset + length]
+            offset += length
+        
+        store.catalog.codes = _split_strings(sections["codes"], subject_count)
+        store.catalog.names = _split_strings(sections["subject_names"], subject_count)
+        store.mentors = _split_strings(sections["mentors"], mentor_count)
+        store.names = _split_strings(sections["names"], student_count)
+        store.usns = _split_strings(sections["usns"], student_count)
+        for name in ("mentor_id", "fee_total", "fee_paid", "subject_start", "subject_id"):
+            column = array(getattr(store, name).typecode)
+            column.frombytes(sections[name])
+            setattr(store, name, column)
+        for field in MARK_FIELDS:
+            column = array("i")
+            column.frombytes(sections[field])
+            store.marks[field] = column
+        fingerprint_data = bytes(sections["fingerprints"])
+        if len(fingerprint_data) % 16:
+            raise ValueError("fingerprints are truncated")
+        _check_snapshot_columns(store, student_count, subject_count, mentor_count)
+        index = _read_index(sections, store.usns)
+        for section in sections.values():
+            section.release()
+    return fingerprint_data, index
+
+def _check_snapshot_columns(store, student_count, subject_count, mentor_count):
+    """Raise ValueError unless the columns read from a snapshot agree with its header and each other"""
+    slots = len(store.subject_id)
+    consistent = (
+        len(store.catalog.codes) == len(store.catalog.names) == subject_count
+        and len(store.mentors) == mentor_count
+        and all(len(column) == student_count for column in
+                (store.names, store.usns, store.mentor_id, store.fee_total, store.fee_paid))
+        and len(store.subject_start) == student_count + 1
+        and store.subject_start[0] == 0 and store.subject_start[-1] == slots
+        and all(len(column) == slots for column in store.marks.values())
+    )
+    if not consistent:
+        raise ValueError("columns do not match the header")
+
+def load_snapshot(filepath, store):
+    """Fill an empty store from a fresh snapshot of filepath and return its block fingerprints.
+    
+    Returns None when there is no usable snapshot: missing, stale or unreadable.
+    An unreadable one is reported on stderr and the store is left empty."""
+    if not snapshot_is_fresh(filepath):
+        return None
+    try:
+        return read_snapshot(filepath, store)
+    except (OSError, ValueError) as e:
+        store.clear()
+        instruments.count("snapshot_errors")
+        print(f"⚠️  Ignoring unreadable snapshot '{snapshot_path(filepath)}': {e}", file=sys.stderr)
+        return None
+
+def load_cohort(filepath, workers=1):
+    """Load students from a fresh snapshot if there is one, else parse and write one.
+    
+    workers is passed on to read_students for the parse."""
+    students.clear()
+    if load_snapshot(filepath, students) is not None:
+        instruments.count("snapshot_hits")
+        print(f"Successfully loaded {len(students)} students (snapshot)")
+        return True
+    instruments.count("snapshot_misses")
+    if not read_students(filepath, workers):
+        return False
+    try:
+        write_snapshot(students, filepath)
+    except OSError:
+        pass  # The snapshot is only a cache
+    return True
+
+# ---------------- GRADING POLICIES ----------------
+# The grading rules of a regulation scheme, as data. DEFAULT_POLICY is the
+# scheme the constants above describe; others are read from JSON files.
+GradingPolicy = namedtuple("GradingPolicy", [
+    "name",
+    "theory_pass_percent",  # Share of MAX_THEORY_MARKS needed to pass theory
+    "lab_pass_percent",     # Share of MAX_LAB_MARKS needed to pass the lab part
+    "ia_best_of",           # How many of the three IA marks are averaged (the best ones)
+    "lab_required_for",     # Subject types whose lab part must be passed too
+    "fail_grade",           # Grade below the lowest band
+    "grade_bands"           # ((minimum percentage, grade), ...) lowest band first
+])
+
+DEFAULT_POLICY = GradingPolicy(
+    name="default",
+    theory_pass_percent=PASS_PERCENT,
+    lab_pass_percent=PASS_PERCENT,
+    ia_best_of=2,
+    lab_required_for=("Normal Subject + Lab", "IPCC (Theory + Lab)"),
+    fail_grade="Fail",
+    grade_bands=((40, "Pass"), (50, "Second Class"), (60, "First Class"), (70, "Distinction"))
+)
+
+class CompiledPolicy:
+    """A GradingPolicy reduced to pass marks and a bisect table of grade cut-offs.
+    
+    Grade codes index grades: 0 is the fail grade, k the k-th band."""
+    __slots__ = ("policy", "theory_pass_mark", "lab_pass_mark", "best_of", "lab_types",
+                 "cutoffs", "grades", "reasons")
+    
+    def __init__(self, policy):
+        self.policy = policy
+        self.theory_pass_mark = MAX_THEORY_MARKS * policy.theory_pass_percent
+        self.lab_pass_mark = MAX_LAB_MARKS * policy.lab_pass_percent
+        self.best_of = policy.ia_best_of
+        self.lab_types = frozenset(policy.lab_required_for)
+        self.cutoffs = [cutoff for cutoff, _ in policy.grade_bands]
+        self.grades = [policy.fail_grade] + [grade for _, grade in policy.grade_bands]
+        # Indexed by reason code: 1 = theory failed, 2 = lab failed, 3 = both
+        self.reasons = (
+            "Eligible for main exam",
+            f"Failed in Theory (minimum {policy.theory_pass_percent * 100:g}% required)",
+            f"Failed in Lab (minimum {policy.lab_pass_percent * 100:g}% required)",
+            "Failed in both Theory and Lab"
+        )
+    
+    @property
+    def name(self):
+        return self.policy.name
+    
+    def grade_code(self, percentage):
+        return bisect_right(self.cutoffs, percentage)
+    
+    def grade(self, percentage):
+        return self.grades[bisect_right(self.cutoffs, percentage)]
+
+def policy_from_dict(data, base=DEFAULT_POLICY):
+    """A GradingPolicy from a JSON object; fields it leaves out are taken from base"""
+    unknown = set(data) - set(GradingPolicy._fields)
+    if unknown:
+        raise ValueError(f"unknown grading policy field(s): {', '.join(sorted(unknown))}")
+    policy = base._replace(**data)
+    policy = policy._replace(lab_required_for=tuple(policy.lab_required_for),
+                             grade_bands=tuple((cutoff, grade) for cutoff, grade in policy.grade_bands))
+    
+    if policy.ia_best_of not in (1, 2, 3):
+        raise ValueError(f"policy '{policy.name}': ia_best_of must be 1, 2 or 3")
+    cutoffs = [cutoff for cutoff, _ in policy.grade_bands]
+    if cutoffs != sorted(cutoffs):
+        raise ValueError(f"policy '{policy.name}': grade_bands must be in ascending order")
+    unknown_types = set(policy.lab_required_for) - set(SUBJECT_TYPE_NAMES)
+    if unknown_types:
+        raise ValueError(f"policy '{policy.name}': unknown subject type(s) {sorted(unknown_types)}")
+    return policy
+
+def load_policies(filepath):
+    """Grading policies from a JSON file: a list of policy objects, or {"policies": [...]}"""
+    with open(filepath, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("policies", [data])
+    policies = []
+    for number, entry in enumerate(data, 1):
+        entry.setdefault("name", f"policy {number}")
+        policies.append(policy_from_dict(entry))
+    return policies
+
+def set_grading_policy(policy):
+    """Grade with policy from now on (before loading: cached metrics are not regraded)"""
+    global grading_policy
+    compiled = CompiledPolicy(policy)
+    if not set(compiled.grades) <= set(GRADE_NAMES):
+        # The reports count grades per name, so only a sweep can use other names
+        raise ValueError(f"policy '{policy.name}': grades must be among {', '.join(GRADE_NAMES)}")
+    grading_policy = compiled
+
+grading_policy = CompiledPolicy(DEFAULT_POLICY)
+
 # ---------------- LOGIC FUNCTIONS ----------------
 def best_two_avg(ia_marks):
-    """Find best 2 IA marks and return their average - requirement (b)"""
-    if len(ia_marks) < 2:
+    """Find the best IA marks (2 unless the grading policy says otherwise) and
+    return their average - requirement (b)"""
+    best_of = grading_policy.best_of
+    if len(ia_marks) < best_of:
         return 0, []
     
     # Filter out None values and ensure we have integers
     valid_marks = [m for m in ia_marks if m is not None]
-    if len(valid_marks) < 2:
-        return 0, valid_marks[:2]
+    if len(valid_marks) < best_of:
+        return 0, valid_marks[:best_of]
     
     sorted_marks = sorted(valid_marks, reverse=True)
-    best_two = sorted_marks[:2]
-    average = sum(best_two) / 2.0
+    best_two = sorted_marks[:best_of]
+    average = sum(best_two) / float(best_of)
     return average, best_two
 
 def calculate_theory_total(subject):
@@ -217,13 +1212,14 @@ def check_subject_type(subject):
     else:
         return "Normal Subject"
 
-def is_theory_passed(subject):
-    """Check if theory part is passed (40% of 130 = 52)"""
-    theory_total, _, _ = calculate_theory_total(subject)
-    return theory_total >= (MAX_THEORY_MARKS * PASS_PERCENT)
+def is_theory_passed(subject, theory_total=None):
+    """Check if theory part is passed (40% of 130 = 52 by default)"""
+    if theory_total is None:
+        theory_total, _, _ = calculate_theory_total(subject)
+    return theory_total >= grading_policy.theory_pass_mark
 
 def is_lab_passed(subject):
-    """Check if lab part is passed (40% of 100 = 40)"""
+    """Check if lab part is passed (40% of 100 = 40 by default)"""
     lab_ia = subject.get("lab_ia", 0)
     continuous_eval = subject.get("continuous_eval", 0)
     
@@ -231,150 +1227,2035 @@ def is_lab_passed(subject):
         return True  # No lab component
     
     lab_total = calculate_lab_total(subject)
-    return lab_total >= (MAX_LAB_MARKS * PASS_PERCENT)
+    return lab_total >= grading_policy.lab_pass_mark
+
+def is_eligible_for_exam(subject, sub_type=None, theory_total=None):
+    """Check eligibility for main exam - requirements (d,e)
+    
+    sub_type and theory_total may be passed in when the caller already has them."""
+    if sub_type is None:
+        sub_type = check_subject_type(subject)
+    
+    # Types in the policy's lab_required_for (IPCC and Normal Subject + Lab by
+    # default) must pass both parts; the others are judged on theory only
+    theory_failed = not is_theory_passed(subject, theory_total)
+    lab_failed = sub_type in grading_policy.lab_types and not is_lab_passed(subject)
+    reason_code = theory_failed + 2 * lab_failed
+    return reason_code == 0, grading_policy.reasons[reason_code]
+
+def calculate_grade(total_marks, max_marks=100):
+    """Calculate grade based on percentage - requirement (k)"""
+    percentage = (total_marks / max_marks) * 100
+    return grading_policy.grade(percentage), percentage
+
+def branch_name(branch_code):
+    """Branch name for a two-letter branch code (None when the USN had none)"""
+    if branch_code is None:
+        return "Unknown Branch"
+    return BRANCH_MAP.get(branch_code, f"Branch Code: {branch_code}")
+
+def get_branch_from_usn(usn):
+    """Extract branch from USN - requirement (m)"""
+    if len(usn) >= 7:
+        return branch_name(usn[5:7])
+    return "Unknown Branch"
+
+def is_college_student(usn):
+    """Check if student belongs to our college - requirement (a)"""
+    return usn.startswith(COLLEGE_CODE)
 
-def is_eligible_for_exam(subject):
-    """Check eligibility for main exam - requirements (d,e)"""
+# ---------------- DERIVED METRICS ----------------
+SubjectMetrics = namedtuple("SubjectMetrics", [
+    "best_two", "ia_avg", "theory_total", "lab_total",
+    "subject_type", "eligible", "reason", "grade", "percentage"
+])
+
+def compute_subject_metrics(subject):
+    """Compute every derived value of one subject record, each exactly once"""
+    theory_total, avg_ia, best_two = calculate_theory_total(subject)
     sub_type = check_subject_type(subject)
+    eligible, reason = is_eligible_for_exam(subject, sub_type, theory_total)
+    grade, percentage = calculate_grade(theory_total, MAX_THEORY_MARKS)
+    return SubjectMetrics(best_two, avg_ia, theory_total, calculate_lab_total(subject),
+                          sub_type, eligible, reason, grade, percentage)
+
+def subject_metrics(subject):
+    """Derived metrics of a subject: cached for store slots, computed for plain dicts"""
+    if isinstance(subject, SubjectView):
+        return subject._store.metrics(subject.slot)
+    return compute_subject_metrics(subject)
+
+# ---------------- VECTORIZED GRADING ENGINE (optional, NumPy) ----------------
+GRADE_NAMES = ("Fail", "Pass", "Second Class", "First Class", "Distinction")
+SUBJECT_TYPE_NAMES = ("Normal Subject", "Normal Subject + Lab", "IPCC (Theory + Lab)")
+
+class GradeResults:
+    """Grading arrays for every subject slot of a CohortStore.
+    
+    Row k of each array belongs to subject slot k. Codes index the policy's
+    grades and reasons, and SUBJECT_TYPE_NAMES."""
+    
+    def __init__(self, **columns):
+        self.__dict__.update(columns)
+    
+    def failed_per_student(self):
+        """Number of non-eligible subjects for each student"""
+        return np.bincount(self.student_index, weights=~self.eligible,
+                           minlength=len(self.subject_start) - 1).astype(np.int64)
+
+def cohort_mark_arrays(store):
+    """The arrays every grading of a CohortStore starts from, whatever the policy"""
+    if np is None:
+        raise RuntimeError("NumPy is required for the vectorized grading engine")
+    
+    marks = {field: np.asarray(store.marks[field], dtype=np.int64) for field in MARK_FIELDS}
+    lab_ia = marks["lab_ia"]
+    continuous_eval = marks["continuous_eval"]
+    subject_start = np.asarray(store.subject_start, dtype=np.int64)
+    return {
+        # IA marks best first, so the best N are the first N columns
+        "ia": np.sort(np.stack([marks["ia1"], marks["ia2"], marks["ia3"]], axis=1), axis=1)[:, ::-1],
+        "assignment": marks["assignment"],
+        "external": marks["external"],
+        "lab_total": lab_ia + continuous_eval,
+        "has_lab": (lab_ia != 0) | (continuous_eval != 0),
+        "subject_type": np.where((lab_ia > 0) & (continuous_eval > 0), 2,
+                                 np.where((lab_ia > 0) | (continuous_eval > 0), 1, 0)).astype(np.int8),
+        "subject_start": subject_start,
+        "student_index": np.repeat(np.arange(len(subject_start) - 1), np.diff(subject_start)),
+    }
+
+def grade_arrays(arrays, policy):
+    """GradeResults of cohort_mark_arrays under a CompiledPolicy"""
+    best = arrays["ia"][:, :policy.best_of]
+    ia_avg = best.sum(axis=1) / float(policy.best_of)
+    theory_total = ia_avg + arrays["assignment"] + arrays["external"]
+    lab_total = arrays["lab_total"]
+    subject_type = arrays["subject_type"]
+    
+    theory_pass = theory_total >= policy.theory_pass_mark
+    lab_pass = ~arrays["has_lab"] | (lab_total >= policy.lab_pass_mark)
+    
+    # Types outside the policy's lab_required_for are judged on theory only
+    lab_types = [SUBJECT_TYPE_NAMES.index(name) for name in policy.lab_types]
+    lab_failed = ~lab_pass & np.isin(subject_type, lab_types)
+    reason_code = (~theory_pass).astype(np.int8) + 2 * lab_failed.astype(np.int8)
+    
+    percentage = (theory_total / MAX_THEORY_MARKS) * 100
+    grade_code = np.searchsorted(np.asarray(policy.cutoffs, dtype=np.float64), percentage, side="right")
+    
+    return GradeResults(
+        best_two=best,
+        ia_avg=ia_avg,
+        theory_total=theory_total,
+        lab_total=lab_total,
+        subject_type=subject_type,
+        theory_pass=theory_pass,
+        lab_pass=lab_pass,
+        eligible=reason_code == 0,
+        reason_code=reason_code,
+        percentage=percentage,
+        grade_code=grade_code.astype(np.int8),
+        subject_start=arrays["subject_start"],
+        student_index=arrays["student_index"]
+    )
+
+def grade_cohort(store, policy=None):
+    """Grade every subject slot of a CohortStore with batched array operations.
+    
+    Uses the same float operations in the same order as best_two_avg,
+    calculate_theory_total, is_eligible_for_exam and calculate_grade, so the
+    results are identical to the scalar path. policy defaults to grading_policy."""
+    return grade_arrays(cohort_mark_arrays(store), policy or grading_policy)
+
+def metrics_from_grades(graded, policy=None):
+    """Convert GradeResults arrays into one SubjectMetrics per slot"""
+    policy = policy or grading_policy
+    grades, reasons = policy.grades, policy.reasons
+    return [SubjectMetrics(best_two, ia_avg, theory_total, lab_total,
+                           SUBJECT_TYPE_NAMES[sub_type], reason == 0, reasons[reason],
+                           grades[grade], percentage)
+            for best_two, ia_avg, theory_total, lab_total, sub_type, reason, grade, percentage
+            in zip(graded.best_two.tolist(), graded.ia_avg.tolist(), graded.theory_total.tolist(),
+                   graded.lab_total.tolist(), graded.subject_type.tolist(),
+                   graded.reason_code.tolist(), graded.grade_code.tolist(),
+                   graded.percentage.tolist())]
+
+# ---------------- POLICY SWEEP (what-if grading) ----------------
+PolicyOutcome = namedtuple("PolicyOutcome", [
+    "name", "subjects", "passed", "students", "passed_all",
+    "grades"    # {grade: subject count} in the policy's band order, fail grade first
+])
+
+def _policy_outcome(policy, subjects, passed, students_count, passed_all, grade_counts):
+    return PolicyOutcome(policy.name, subjects, passed, students_count, passed_all,
+                         dict(zip(policy.grades, grade_counts)))
+
+def sweep_policies(policies, store=None):
+    """Grade a CohortStore under every policy in one pass over its marks.
+    
+    The marks are read once and each policy is applied to every subject slot
+    while it is at hand (vectorized when NumPy is available). Returns one
+    PolicyOutcome per policy, in order."""
+    store = students if store is None else store
+    compiled = [CompiledPolicy(policy) for policy in policies]
+    if np is not None:
+        arrays = cohort_mark_arrays(store)
+        outcomes = []
+        for policy in compiled:
+            graded = grade_arrays(arrays, policy)
+            grade_counts = np.bincount(graded.grade_code, minlength=len(policy.grades)).tolist()
+            outcomes.append(_policy_outcome(policy, len(graded.eligible), int(graded.eligible.sum()), len(store),
+                                            int((graded.failed_per_student() == 0).sum()), grade_counts))
+        return outcomes
+    
+    marks = [store.marks[field] for field in MARK_FIELDS]
+    best_ofs = sorted({policy.best_of for policy in compiled})
+    lab_types = [frozenset(SUBJECT_TYPE_NAMES.index(name) for name in policy.lab_types) for policy in compiled]
+    passed = [0] * len(compiled)
+    passed_all = [0] * len(compiled)
+    grade_counts = [[0] * len(policy.grades) for policy in compiled]
+    subject_start = store.subject_start
+    for row in range(len(store)):
+        failed = [False] * len(compiled)
+        for slot in range(subject_start[row], subject_start[row + 1]):
+            ia1, ia2, ia3, assignment, external, lab_ia, continuous_eval = [column[slot] for column in marks]
+            ranked = sorted((ia1, ia2, ia3), reverse=True)
+            ia_avg = {n: sum(ranked[:n]) / float(n) for n in best_ofs}
+            lab_total = lab_ia + continuous_eval
+            has_lab = lab_ia != 0 or continuous_eval != 0
+            sub_type = 2 if lab_ia > 0 and continuous_eval > 0 else 1 if lab_ia > 0 or continuous_eval > 0 else 0
+            for i, policy in enumerate(compiled):
+                theory_total = ia_avg[policy.best_of] + assignment + external
+                if (theory_total >= policy.theory_pass_mark
+                        and not (has_lab and sub_type in lab_types[i] and lab_total < policy.lab_pass_mark)):
+                    passed[i] += 1
+                else:
+                    failed[i] = True
+                grade_counts[i][policy.grade_code((theory_total / MAX_THEORY_MARKS) * 100)] += 1
+        for i, fail in enumerate(failed):
+            passed_all[i] += not fail
+    return [_policy_outcome(policy, subject_start[len(store)], passed[i], len(store), passed_all[i], grade_counts[i])
+            for i, policy in enumerate(compiled)]
+
+# ---------------- LEADERBOARDS ----------------
+class TopK:
+    """The k highest-scoring items seen so far, in O(k) memory.
+    
+    Ties are broken by arrival order (earlier wins), matching a stable sort."""
+    __slots__ = ("k", "_heap", "_seq")
+    
+    def __init__(self, k):
+        self.k = k
+        self._heap = []   # Min-heap of (score, -seq, item); the weakest entry is on top
+        self._seq = 0
+    
+    def accepts(self, score):
+        """Would an item with this score be kept right now? (lets callers skip building it)"""
+        return len(self._heap) < self.k or score > self._heap[0][0]
+    
+    def push(self, score, item):
+        entry = (score, -self._seq, item)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def merge(self, other):
+        """Fold another TopK in; its items count as arriving after this one's"""
+        for score, _, item in sorted(other._heap, key=lambda entry: -entry[1]):
+            self.push(score, item)
+    
+    def items(self):
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+    
+    def __len__(self):
+        return len(self._heap)
+
+class Leaderboard:
+    """A bounded TopK per group (subject, class, branch, mentor ...)"""
+    
+    def __init__(self, k=TOPPERS_K):
+        self.k = k
+        self.groups = {}
+    
+    def push(self, group, score, item):
+        top = self.groups.get(group)
+        if top is None:
+            top = self.groups[group] = TopK(self.k)
+        top.push(score, item)
+    
+    def top(self, group):
+        top = self.groups.get(group)
+        return top.items() if top is not None else []
+
+def student_performance(student):
+    """Class-topper row for a student, or None when the student has no subjects"""
+    subjects = student["subjects"]
+    if not subjects:
+        return None
+    total_marks = 0
+    for subject in subjects:
+        total_marks += subject_metrics(subject).theory_total
+    average_percentage = (total_marks / (len(subjects) * MAX_THEORY_MARKS)) * 100
+    grade, _ = calculate_grade(average_percentage, 100)
+    return {
+        "name": student["name"],
+        "usn": student["usn"],
+        "total_marks": total_marks,
+        "subjects": len(subjects),
+        "average": average_percentage,
+        "grade": grade
+    }
+
+# Group key functions for rank_students
+LEADERBOARD_GROUPS = {
+    "class": lambda student: "Class",
+    "branch": lambda student: get_branch_from_usn(student["usn"]),
+    "mentor": lambda student: student["mentor"],
+}
+
+def rank_students(group_by="class", k=TOPPERS_K):
+    """Stream the cohort once into a Leaderboard of average percentage per group"""
+    group_of = LEADERBOARD_GROUPS[group_by]
+    board = Leaderboard(k)
+    for student in students:
+        performance = student_performance(student)
+        if performance is not None:
+            board.push(group_of(student), performance["average"], performance)
+    return board
+
+# ---------------- DISTRIBUTION STATISTICS ----------------
+# Fixed-size, mergeable score summaries: every one supports add, remove and merge,
+# so incremental reloads and federated sections update them without rescanning.
+HISTOGRAM_BIN_WIDTH = 10
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_MAX_BINS = 2048
+
+class RunningStats:
+    """Count, mean and variance by Welford's method"""
+    __slots__ = ("count", "mean", "m2")
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def remove(self, value):
+        """Undo an earlier add(value)"""
+        if self.count <= 1:
+            self.__init__()
+            return
+        mean = (self.count * self.mean - value) / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - (value - self.mean) * (value - mean))
+        self.mean = mean
+        self.count -= 1
+    
+    def merge(self, other):
+        """Chan et al. parallel combination of two Welford states"""
+        count = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.count = count
+        return self
+    
+    @property
+    def variance(self):
+        """Population variance"""
+        return self.m2 / self.count if self.count else 0.0
+    
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+class Histogram:
+    """Counts in fixed-width bins over [low, high]; high itself falls in the last bin"""
+    __slots__ = ("low", "width", "counts", "last")
+    
+    def __init__(self, low, high, width=HISTOGRAM_BIN_WIDTH):
+        self.low = low
+        self.width = width
+        self.counts = [0] * max(1, math.ceil((high - low) / width))
+        self.last = len(self.counts) - 1
+    
+    def add(self, value, weight=1):
+        index = int((value - self.low) // self.width)
+        if index > self.last:
+            index = self.last
+        elif index < 0:
+            index = 0
+        self.counts[index] += weight
+    
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        return self
+    
+    def bins(self):
+        """(lower edge, upper edge, count) for every bin"""
+        return [(self.low + i * self.width, self.low + (i + 1) * self.width, count)
+                for i, count in enumerate(self.counts)]
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+    
+    Positive values land in logarithmic buckets, so any quantile is returned
+    within relative_accuracy of a true sample value. Memory is bounded by
+    max_bins; past that the lowest buckets are collapsed together."""
+    __slots__ = ("gamma", "log_gamma", "max_bins", "zero_count", "count", "bins", "_keys")
+    
+    def __init__(self, relative_accuracy=SKETCH_RELATIVE_ACCURACY, max_bins=SKETCH_MAX_BINS):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.zero_count = 0
+        self.count = 0
+        self.bins = {}          # Bucket key -> count
+        self._keys = {}         # Value -> bucket key (marks repeat a lot)
+    
+    def add(self, value, weight=1):
+        self.count += weight
+        if value <= 0:
+            self.zero_count += weight
+            return
+        key = self._keys.get(value)
+        if key is None:
+            key = self._keys[value] = math.ceil(math.log(value) / self.log_gamma)
+        if weight < 0 and key not in self.bins:
+            # Collapsed away: its count was folded into the lowest bucket above it
+            key = min((other for other in self.bins if other > key), default=key)
+        count = self.bins.get(key, 0) + weight
+        if count > 0:
+            self.bins[key] = count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.bins.pop(key, None)
+    
+    def _collapse(self):
+        low, second = sorted(self.bins)[:2]
+        self.bins[second] += self.bins.pop(low)
+    
+    def merge(self, other):
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+        return self
+    
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None when empty"""
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+class ScoreDistribution:
+    """Streaming summary of one score: moments, histogram and quantile sketch"""
+    __slots__ = ("stats", "histogram", "sketch")
+    
+    def __init__(self, high):
+        self.stats = RunningStats()
+        self.histogram = Histogram(0, high)
+        self.sketch = QuantileSketch()
+    
+    def add(self, value, sign=1):
+        if sign > 0:
+            self.stats.add(value)
+        else:
+            self.stats.remove(value)
+        self.histogram.add(value, sign)
+        self.sketch.add(value, sign)
+    
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        return self
+    
+    def summary(self):
+        """count, mean, stdev, median, p90 and p99 as a dict"""
+        sketch = self.sketch
+        return {"count": self.stats.count, "mean": self.stats.mean, "stdev": self.stats.stdev,
+                "median": sketch.quantile(0.5), "p90": sketch.quantile(0.9), "p99": sketch.quantile(0.99)}
+
+# ---------------- FEE LEDGER ----------------
+# A student's balance is fee_total - fee_paid in the store. The ledger keeps
+# only totals of the positive balances, so a payment updates it in O(1).
+class FeeLedger:
+    """Outstanding fees totalled per mentor, per branch and overall"""
+    
+    def __init__(self):
+        self.by_mentor = {}         # Mentor -> [students with a balance, outstanding amount]
+        self.by_branch = {}         # Branch name -> [students with a balance, outstanding amount]
+        self.pending_students = 0
+        self.outstanding = 0
+        self.payments = 0           # Payments recorded after the analysis
+        self.collected = 0
+    
+    def account(self, mentor, branch, balance, sign=1):
+        """Add (sign=1) or remove (sign=-1) one student's balance"""
+        if balance <= 0:
+            return
+        for totals, key in ((self.by_mentor, mentor), (self.by_branch, branch)):
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0]
+            entry[0] += sign
+            entry[1] += sign * balance
+            if not entry[0]:
+                del totals[key]
+        self.pending_students += sign
+        self.outstanding += sign * balance
+    
+    def merge(self, other):
+        for mine, theirs in ((self.by_mentor, other.by_mentor), (self.by_branch, other.by_branch)):
+            for key, (count, amount) in theirs.items():
+                entry = mine.setdefault(key, [0, 0])
+                entry[0] += count
+                entry[1] += amount
+        self.pending_students += other.pending_students
+        self.outstanding += other.outstanding
+        self.payments += other.payments
+        self.collected += other.collected
+        return self
+    
+    def outstanding_by(self, group_by="mentor"):
+        """[(mentor or branch, students with a balance, outstanding amount)], largest amount first"""
+        totals = self.by_mentor if group_by == "mentor" else self.by_branch
+        return sorted(((key, count, amount) for key, (count, amount) in totals.items()),
+                      key=lambda item: (-item[2], item[0]))
+
+def fee_rows(analysis):
+    """(name, balance, mentor) for every student, in file order"""
+    store = analysis.store if analysis.store is not None else students
+    if isinstance(store, CohortStore):
+        mentors = store.mentors
+        return [(name, fee_total - fee_paid, mentors[mentor_id]) for name, fee_total, fee_paid, mentor_id
+                in zip(store.names, store.fee_total, store.fee_paid, store.mentor_id)]
+    return [(student["name"], student["fee_total"] - student["fee_paid"], student["mentor"]) for student in store]
+
+def record_payment(analysis, usn, amount):
+    """Apply a fee payment to the analyzed cohort; returns False for an unknown USN.
+    
+    Only this student's share of the ledger and of the alerts is redone, in O(1)."""
+    store = analysis.store if analysis.store is not None else students
+    row = store.index.row_of(usn)
+    if row is None:
+        return False
+    student = store[row]
+    name, mentor = student["name"], student["mentor"]
+    branch = get_branch_from_usn(usn)
+    old_balance = student["fee_total"] - student["fee_paid"]
+    student["fee_paid"] += amount
+    balance = old_balance - amount
+    analysis.fees.account(mentor, branch, old_balance, sign=-1)
+    analysis.fees.account(mentor, branch, balance)
+    analysis.fees.payments += 1
+    analysis.fees.collected += amount
+    
+    if balance > 0:
+        # Updated in place, so the alert keeps its position in file order
+        analysis.fee_alerts[usn] = (name, usn, mentor, balance)
+    else:
+        analysis.fee_alerts.pop(usn, None)
+    return True
+
+def read_payments(filepath):
+    """Yield (USN, amount) from a CSV of payments; rows whose amount is not a number
+    (such as a header) are skipped"""
+    with open(filepath, "r", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            try:
+                amount = int(row[1])
+            except ValueError:
+                continue
+            yield row[0].strip().upper(), amount
+
+def apply_payments(analysis, payments):
+    """Record every (USN, amount) payment; returns the USNs that matched no student"""
+    return [usn for usn, amount in payments if not record_payment(analysis, usn, amount)]
+
+# ---------------- ANALYSIS FUNCTIONS ----------------
+def new_subject_stats():
+    """Empty per-subject accumulator used by analyze_students (fixed size, whatever the cohort size)"""
+    return {
+        "name": "",
+        "pass_count": 0,
+        "fail_count": 0,
+        "toppers": TopK(TOPPERS_K),
+        "ia1_absent": 0,
+        "ia2_absent": 0,
+        "ia3_absent": 0,
+        "assign_not_submitted": 0,
+        "grades": {"Distinction": 0, "First Class": 0, "Second Class": 0, "Pass": 0, "Fail": 0},
+        "theory": ScoreDistribution(MAX_THEORY_MARKS),
+        "lab": ScoreDistribution(MAX_LAB_MARKS),      # Only subjects with a lab component
+    }
+
+GRADE_ORDER = {"Distinction": 4, "First Class": 3, "Second Class": 2, "Pass": 1, "Fail": 0}
+
+class CohortAnalysis:
+    """Every aggregate the reports read, filled by one traversal of the cohort"""
+    
+    def __init__(self):
+        # Subject level (f, g, i, j, k, n, o)
+        self.subject_stats = defaultdict(new_subject_stats)
+        self.fail_distribution = defaultdict(list)
+        self.all_subjects_pass_fail = {"passed_all": 0, "failed_any": 0}
+        # Student level (a, c, h, k, l, m, z)
+        self.college_students = []        # (name, usn)
+        self.non_college_students = []
+        self.subject_type_count = {"IPCC (Theory + Lab)": 0, "Normal Subject + Lab": 0, "Normal Subject": 0}
+        self.subject_details = {}
+        self.branch_distribution = {}     # Branch name -> student names
+        self.fees = FeeLedger()           # Outstanding fees per mentor and branch (l, u)
+        self.fee_alerts = {}              # USN -> (name, usn, mentor, balance) of students with fees pending
+        self.grade_categories = {}        # Highest grade -> student names
+        self.class_toppers = TopK(TOPPERS_K)
+        self.average_sum = 0.0            # Sum of per-student average percentages
+        self.average_count = 0
+        self.store = None                 # CohortStore analyzed; rescanned to rebuild toppers
+        self.low_memory = False           # Metrics computed per use instead of cached per slot
+        self.row_outcomes = None          # RowOutcomes kept instead of the student-level lists (worker partials)
+    
+    @property
+    def class_average(self):
+        """Mean of the students' average percentages"""
+        return self.average_sum / self.average_count if self.average_count else 0.0
+    
+    def merge(self, other):
+        """Append the analysis of the students that follow this one's (chunk order matters)"""
+        for code, stats in other.subject_stats.items():
+            merge_subject_stats(self.subject_stats[code], stats)
+        for failed, entries in other.fail_distribution.items():
+            self.fail_distribution[failed].extend(entries)
+        for key, count in other.all_subjects_pass_fail.items():
+            self.all_subjects_pass_fail[key] += count
+        self.college_students.extend(other.college_students)
+        self.non_college_students.extend(other.non_college_students)
+        for sub_type, count in other.subject_type_count.items():
+            self.subject_type_count[sub_type] += count
+        for code, details in other.subject_details.items():
+            mine = self.subject_details.setdefault(code, dict(details, count=0))
+            mine["count"] += details["count"]
+        for branch, names in other.branch_distribution.items():
+            self.branch_distribution.setdefault(branch, []).extend(names)
+        self.fees.merge(other.fees)
+        self.fee_alerts.update(other.fee_alerts)
+        for grade, names in other.grade_categories.items():
+            self.grade_categories.setdefault(grade, []).extend(names)
+        self.class_toppers.merge(other.class_toppers)
+        self.average_sum += other.average_sum
+        self.average_count += other.average_count
+        return self
+    
+    def list_rows(self, store, start, outcomes):
+        """Fill the student-level lists for rows start: of a store from a partial's RowOutcomes"""
+        mentors, grades = store.mentors, outcomes.grades
+        for offset, (failed_count, highest) in enumerate(zip(outcomes.failed, outcomes.highest)):
+            row = start + offset
+            list_student(self, store.names[row], store.usns[row], mentors[store.mentor_id[row]],
+                         store.fee_total[row] - store.fee_paid[row], failed_count,
+                         grades[highest] if highest >= 0 else None)
+    
+    def rebuild_class_toppers(self):
+        """Recompute class toppers by rescanning the analyzed store (uses cached metrics)"""
+        self.class_toppers = TopK(TOPPERS_K)
+        for student in (self.store if self.store is not None else students):
+            performance = student_performance(student)
+            if performance is not None:
+                self.class_toppers.push(performance["average"], performance)
+
+class RowOutcomes:
+    """Failed-subject count and highest grade of each row of a chunk, as compact arrays.
+    
+    A worker partial carries these instead of per-student lists; the parent
+    rebuilds the lists from them and its own store (CohortAnalysis.list_rows)."""
+    __slots__ = ("failed", "highest", "grades")
+    
+    def __init__(self):
+        self.failed = array("i")
+        self.highest = array("b")     # Index into grades, -1 for a student without subjects
+        self.grades = []
+    
+    def add(self, failed_count, highest_grade):
+        self.failed.append(failed_count)
+        if highest_grade is None:
+            self.highest.append(-1)
+            return
+        if highest_grade not in self.grades:
+            self.grades.append(highest_grade)
+        self.highest.append(self.grades.index(highest_grade))
+
+def merge_subject_stats(stats, other):
+    """Fold one subject's partial stats into another's"""
+    stats["name"] = other["name"]
+    for key in ("pass_count", "fail_count", "ia1_absent", "ia2_absent", "ia3_absent", "assign_not_submitted"):
+        stats[key] += other[key]
+    for grade, count in other["grades"].items():
+        stats["grades"][grade] += count
+    stats["toppers"].merge(other["toppers"])
+    stats["theory"].merge(other["theory"])
+    stats["lab"].merge(other["lab"])
+
+def _remove_entry(items, value):
+    """Remove the first occurrence of value from a list, if present"""
+    try:
+        items.remove(value)
+    except ValueError:
+        pass
+
+def account_student(student, analysis, sign=1):
+    """Add (sign=1) or remove (sign=-1) one student's contribution to a CohortAnalysis.
+    
+    Removing leaves per-subject and class toppers stale; returns the subject
+    codes touched so the caller can rebuild them with rebuild_toppers() and
+    analysis.rebuild_class_toppers()."""
+    subject_stats = analysis.subject_stats
+    metrics_of = compute_subject_metrics if analysis.low_memory else subject_metrics
+    name, usn, mentor = student["name"], student["usn"], student["mentor"]
+    failed_subjects_count = 0
+    codes = []
+    grades = []
+    total_marks = 0
+    
+    for subject in student["subjects"]:
+        metrics = metrics_of(subject)
+        eligible = metrics.eligible
+        theory_total = metrics.theory_total
+        grade = metrics.grade
+        code = subject["code"]
+        stats = subject_stats[code]
+        stats["name"] = subject["name"]  # Store subject name
+        codes.append(code)
+        grades.append(grade)
+        total_marks += theory_total
+        
+        # Track IA absences (assuming 0 means absent)
+        for i, ia_mark in enumerate(subject["ia"]):
+            if ia_mark == 0:
+                if i == 0:
+                    stats["ia1_absent"] += sign
+                elif i == 1:
+                    stats["ia2_absent"] += sign
+                elif i == 2:
+                    stats["ia3_absent"] += sign
+        
+        # Track assignment submission
+        if subject["assignment"] == 0:
+            stats["assign_not_submitted"] += sign
+        
+        # Check eligibility
+        if eligible:
+            stats["pass_count"] += sign
+        else:
+            stats["fail_count"] += sign
+            failed_subjects_count += 1
+        
+        # Count grade for this subject
+        stats["grades"][grade] += sign
+        
+        # Score distributions (s)
+        stats["theory"].add(theory_total, sign)
+        sub_type = metrics.subject_type
+        if sub_type != "Normal Subject":
+            stats["lab"].add(metrics.lab_total, sign)
+        
+        # Subject types (c)
+        analysis.subject_type_count[sub_type] += sign
+        details = analysis.subject_details.get(code)
+        if details is None:
+            details = analysis.subject_details[code] = {"name": subject["name"], "type": sub_type, "count": 0}
+        details["count"] += sign
+        
+        # Keep a performance row only while it can still make the subject toppers
+        if sign > 0:
+            toppers = stats["toppers"]
+            if toppers.accepts(theory_total):
+                toppers.push(theory_total, subject_performance(name, usn, metrics))
+        else:
+            if not details["count"]:
+                del analysis.subject_details[code]
+            if stats["pass_count"] + stats["fail_count"] == 0:
+                del subject_stats[code]
+    
+    # Fees and the student-level lists (a, i, l, m, z, k)
+    branch = get_branch_from_usn(usn)
+    balance = student["fee_total"] - student["fee_paid"]
+    analysis.fees.account(mentor, branch, balance, sign)
+    highest_grade = max(grades, key=lambda g: GRADE_ORDER.get(g, 0)) if grades else None
+    
+    if sign > 0:
+        if analysis.row_outcomes is not None:
+            analysis.row_outcomes.add(failed_subjects_count, highest_grade)
+        else:
+            list_student(analysis, name, usn, mentor, balance, failed_subjects_count, highest_grade)
+    else:
+        fail_entry = {"name": name, "usn": usn, "failed_count": failed_subjects_count}
+        college_entry = (name, usn)
+        college_list = analysis.college_students if is_college_student(usn) else analysis.non_college_students
+        bucket = analysis.fail_distribution[failed_subjects_count]
+        _remove_entry(bucket, fail_entry)
+        if not bucket:
+            del analysis.fail_distribution[failed_subjects_count]
+        _remove_entry(college_list, college_entry)
+        names = analysis.branch_distribution.get(branch, [])
+        _remove_entry(names, name)
+        if not names:
+            analysis.branch_distribution.pop(branch, None)
+        if balance > 0:
+            analysis.fee_alerts.pop(usn, None)
+        if highest_grade is not None:
+            names = analysis.grade_categories[highest_grade]
+            _remove_entry(names, name)
+            if not names:
+                del analysis.grade_categories[highest_grade]
+    
+    # Class averages and toppers (h)
+    if grades:
+        average_percentage = (total_marks / (len(grades) * MAX_THEORY_MARKS)) * 100
+        analysis.average_sum += sign * average_percentage
+        analysis.average_count += sign
+        if sign > 0:
+            grade, _ = calculate_grade(average_percentage, 100)
+            analysis.class_toppers.push(average_percentage, {
+                "name": name,
+                "usn": usn,
+                "total_marks": total_marks,
+                "subjects": len(grades),
+                "average": average_percentage,
+                "grade": grade
+            })
+    
+    # Track overall pass/fail
+    if failed_subjects_count == 0:
+        analysis.all_subjects_pass_fail["passed_all"] += sign
+    else:
+        analysis.all_subjects_pass_fail["failed_any"] += sign
+    return codes
+
+def list_student(analysis, name, usn, mentor, balance, failed_count, highest_grade):
+    """Append one student to the student-level lists of a CohortAnalysis (a, i, l, m, z, k)"""
+    analysis.fail_distribution[failed_count].append({"name": name, "usn": usn, "failed_count": failed_count})
+    college_list = analysis.college_students if is_college_student(usn) else analysis.non_college_students
+    college_list.append((name, usn))
+    analysis.branch_distribution.setdefault(get_branch_from_usn(usn), []).append(name)
+    if balance > 0:
+        analysis.fee_alerts[usn] = (name, usn, mentor, balance)
+    if highest_grade is not None:
+        analysis.grade_categories.setdefault(highest_grade, []).append(name)
+
+def subject_performance(name, usn, metrics):
+    """Row kept in a subject's toppers"""
+    return {
+        "name": name,
+        "usn": usn,
+        "theory_total": metrics.theory_total,
+        "lab_total": metrics.lab_total,
+        "grade": metrics.grade,
+        "percentage": metrics.percentage,
+        "eligible": metrics.eligible
+    }
+
+def rebuild_toppers(analysis, codes):
+    """Recompute the bounded toppers of the given subjects by rescanning the cohort store"""
+    subject_stats = analysis.subject_stats
+    toppers = {code: TopK(TOPPERS_K) for code in codes if code in subject_stats}
+    if not toppers:
+        return
+    store = analysis.store if analysis.store is not None else students
+    catalog_codes, subject_id = store.catalog.codes, store.subject_id
+    for row in range(len(store)):
+        for slot in store.subject_slots(row):
+            top = toppers.get(catalog_codes[subject_id[slot]])
+            if top is not None:
+                metrics = (compute_subject_metrics(SubjectView(store, slot)) if analysis.low_memory
+                           else store.metrics(slot))
+                if top.accepts(metrics.theory_total):
+                    top.push(metrics.theory_total, subject_performance(store.names[row], store.usns[row], metrics))
+    for code, top in toppers.items():
+        subject_stats[code]["toppers"] = top
+
+def analyze_row_range(store, start, end, low_memory=False):
+    """Partial CohortAnalysis of rows start:end of a store"""
+    partial = CohortAnalysis()
+    partial.low_memory = low_memory
+    for row in range(start, end):
+        account_student(store[row], partial)
+    return partial
+
+def _analyze_columns(task):
+    """Worker: analyze one chunk handed over as plain columns.
+    
+    Returns only fixed-size aggregates plus RowOutcomes, so the pickled
+    partial does not grow with per-student dicts and lists."""
+    columns, low_memory, policy = task
+    set_grading_policy(policy)
+    store = CohortStore.from_columns(columns)
+    if not low_memory:
+        store.fill_metrics()
+    partial = CohortAnalysis()
+    partial.low_memory = low_memory
+    partial.row_outcomes = RowOutcomes()
+    for row in range(len(store)):
+        account_student(store[row], partial)
+    return partial
+
+def analyze_students(low_memory=False, workers=1):
+    """Perform comprehensive analysis of all students in a single pass; returns a CohortAnalysis.
+    
+    Subject aggregates are fixed-size either way. low_memory also skips the
+    per-slot metrics cache, so analysis adds no per-subject-row state on top
+    of the store (slower: each subject is graded in pure Python).
+    
+    Students are accounted in chunks of ANALYZE_CHUNK_ROWS merged in order,
+    so with workers other than 1 (None = all cores) the chunks can run in a
+    process pool and give exactly the serial result, floating point included."""
+    analysis = CohortAnalysis()
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, min(start + ANALYZE_CHUNK_ROWS, len(students)))
+              for start in range(0, len(students), ANALYZE_CHUNK_ROWS)]
+    
+    if workers == 1 or len(students) < PARALLEL_ANALYZE_MIN_ROWS:
+        # Grade every subject once up front (vectorized when NumPy is available)
+        if not low_memory:
+            students.fill_metrics()
+        for start, end in chunks:
+            analysis.merge(analyze_row_range(students, start, end, low_memory))
+    else:
+        tasks = ((students.row_columns(start, end), low_memory, grading_policy.policy) for start, end in chunks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (start, _), partial in zip(chunks, pool.map(_analyze_columns, tasks)):
+                analysis.merge(partial)
+                analysis.list_rows(students, start, partial.row_outcomes)
+    
+    analysis.store = students
+    analysis.low_memory = low_memory
+    return analysis
+
+# ---------------- INCREMENTAL RELOAD ----------------
+SCAN_CHUNK_CHARS = 1 << 20   # Text read per step while splitting a file into blocks
+
+def _header_offsets(text, start, end):
+    """Offsets of the 'Student N' header lines that start in text[start:end] (start is a line start)"""
+    pos = text.find("Student", start, end)
+    while pos != -1:
+        line_start = text.rfind("\n", start, pos) + 1 or start
+        line_end = text.find("\n", pos, end)
+        if line_end == -1:
+            line_end = end
+        if is_student_header(text[line_start:line_end].strip()):
+            yield line_start
+        pos = text.find("Student", line_end, end)
+
+def scan_blocks(filepath):
+    """Yield (fingerprint, text) for each 'Student N' block of a file, in order.
+    
+    The file is read in large chunks and split at the header lines, found
+    with str.find rather than line by line."""
+    with open(filepath, "r") as f:
+        text = ""
+        block = None        # Offset of the current block's header in text, None before the first
+        searched = 0        # Complete lines before this offset are checked for headers
+        for chunk in iter(lambda: f.read(SCAN_CHUNK_CHARS), ""):
+            text += chunk
+            complete = text.rfind("\n") + 1
+            for header in _header_offsets(text, searched, complete):
+                if block is not None:
+                    yield block_fingerprint([text[block:header]]), text[block:header]
+                block = header
+            keep = block if block is not None else complete
+            text, searched = text[keep:], complete - keep
+            if block is not None:
+                block = 0
+        for header in _header_offsets(text, searched, len(text)):
+            if block is not None:
+                yield block_fingerprint([text[block:header]]), text[block:header]
+            block = header
+        if block is not None:
+            yield block_fingerprint([text[block:]]), text[block:]
+
+def block_fingerprint(lines):
+    return hashlib.blake2b("".join(lines).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def parse_block(text, subject=None):
+    """Parse the single student in one block.
+    
+    subject is the subject state carried in from the blocks before (see
+    iter_students); it is updated in place. None starts from the defaults."""
+    return next(iter_students(io.StringIO(text, newline=None), subject))
+
+def carry_subject_lines(carried, text):
+    """Record in carried the raw value of each carried subject field's last line in a block.
+    
+    Stands in for parsing an unchanged block: applying the recorded values
+    with LINE_HANDLERS gives the subject state the parse would have left.
+    Lines are read from the end, which usually stops within the last subject."""
+    seen = set()
+    for line in reversed(text.split("\n")):
+        key, sep, value = line.strip().partition(":")
+        if sep and key in CARRIED_SUBJECT_LINES and key not in seen:
+            carried[key] = value.strip()
+            seen.add(key)
+            if len(seen) == len(CARRIED_SUBJECT_LINES):
+                break
+
+# Line prefixes whose handlers set one of CARRIED_SUBJECT_FIELDS
+CARRIED_SUBJECT_LINES = frozenset(("Subject Name", "Subject Code", "Sub(1IA)", "Sub(2IA)",
+                                   "Assignment Marks", "Sub(Ext)", "Lab IA Marks"))
+
+class IncrementalSession:
+    """The loaded cohort plus its analysis, kept in step with the data file.
+    
+    Blocks are matched by position: a block whose fingerprint changed is
+    re-parsed and its old contribution to the analysis swapped for the new
+    one; blocks added or removed at the end are appended or dropped. The
+    CohortAnalysis is updated in place. Students whose results changed move
+    to the end of the per-student report lists, and the type listed for a
+    subject in report c stays the one first seen.
+    
+    Toppers are updated from the changed blocks alone. A subject's toppers
+    (or the class toppers) are rebuilt from the whole store only when one of
+    the kept rows changed or left, or a new score ties a kept one."""
+    
+    def __init__(self, filepath, store=None):
+        self.filepath = filepath
+        self.store = store if store is not None else students
+        self.fingerprints = []
+        self.signature = None
+        self.analysis = CohortAnalysis()
+    
+    def _file_signature(self):
+        stat = os.stat(self.filepath)
+        return stat.st_size, stat.st_mtime_ns
+    
+    def load(self):
+        """Full load and analysis; returns False if the file cannot be read"""
+        if not os.path.exists(self.filepath):
+            print(f"ERROR: File '{self.filepath}' not found")
+            return False
+        with instruments.phase("load"):
+            self._load_students()
+        with instruments.phase("analyze"), using_store(self.store):
+            self.analysis = analyze_students()
+        return True
+    
+    def _load_students(self):
+        store = self.store
+        store.clear()
+        self.signature = self._file_signature()
+        self.fingerprints = load_snapshot(self.filepath, store) or []
+        if len(self.fingerprints) != len(store):
+            # Snapshot written without block fingerprints; parse instead
+            store.clear()
+            self.fingerprints = []
+        instruments.count("snapshot_hits" if self.fingerprints else "snapshot_misses")
+        if not self.fingerprints:
+            subject = new_subject_fields()
+            for fingerprint, text in scan_blocks(self.filepath):
+                self.fingerprints.append(fingerprint)
+                store.append(parse_block(text, subject))
+            self.save_snapshot()
+    
+    def save_snapshot(self):
+        """Write the current cohort as the file's snapshot (best effort, it is only a cache)"""
+        try:
+            write_snapshot(self.store, self.filepath, self.fingerprints)
+        except OSError:
+            pass
+    
+    def changed_on_disk(self):
+        return os.path.exists(self.filepath) and self._file_signature() != self.signature
+    
+    def _topper_scores(self, row):
+        """(group, usn, score) of the topper entries of a row: each subject code, and None for the class"""
+        store = self.store
+        usn = store.usns[row]
+        scores = [(store.catalog.codes[store.subject_id[slot]], usn, store.metrics(slot).theory_total)
+                  for slot in store.subject_slots(row)]
+        if scores:
+            total_marks = 0
+            for _, _, theory_total in scores:
+                total_marks += theory_total
+            scores.append((None, usn, (total_marks / (len(scores) * MAX_THEORY_MARKS)) * 100))
+        return scores
+    
+    def _kept_toppers(self):
+        """{group: {(usn, score)}} of the toppers kept now, with the group keys of _topper_scores"""
+        kept = {code: {(item["usn"], item["theory_total"]) for item in stats["toppers"].items()}
+                for code, stats in self.analysis.subject_stats.items()}
+        kept[None] = {(item["usn"], item["average"]) for item in self.analysis.class_toppers.items()}
+        return kept
+    
+    def reload(self):
+        """Re-parse only the blocks that changed; returns (changed, added, removed)"""
+        self.signature = self._file_signature()
+        store = self.store
+        analysis = self.analysis
+        kept = self._kept_toppers()
+        kept_scores = {group: {score for _, score in entries} for group, entries in kept.items()}
+        stale = set()   # Topper groups to rebuild from the whole store
+        
+        def leaving(row):
+            for group, usn, score in self._topper_scores(row):
+                if (usn, score) in kept.get(group, ()):
+                    stale.add(group)
+            account_student(store[row], analysis, sign=-1)
+        
+        def arriving(row):
+            for group, _, score in self._topper_scores(row):
+                if score in kept_scores.get(group, ()):
+                    stale.add(group)
+            account_student(store[row], analysis)
+        
+        changed = added = 0
+        count = 0
+        subject = new_subject_fields()
+        carried = {}    # Raw subject lines of the unchanged blocks since the last parsed one
+        for row, (fingerprint, text) in enumerate(scan_blocks(self.filepath)):
+            count = row + 1
+            if row < len(self.fingerprints) and self.fingerprints[row] == fingerprint:
+                carry_subject_lines(carried, text)
+                continue
+            for key, value in carried.items():
+                LINE_HANDLERS[key](None, subject, value)
+            carried.clear()
+            student = parse_block(text, subject)
+            if row < len(self.fingerprints):
+                leaving(row)
+                store.replace(row, student)
+                self.fingerprints[row] = fingerprint
+                changed += 1
+            else:
+                store.append(student)
+                self.fingerprints.append(fingerprint)
+                added += 1
+            arriving(row)
+        
+        removed = len(self.fingerprints) - count
+        instruments.count("blocks_reparsed", changed + added)
+        instruments.count("blocks_reused", count - changed - added)
+        for row in range(count, len(self.fingerprints)):
+            leaving(row)
+        if removed:
+            store.truncate(count)
+            del self.fingerprints[count:]
+        
+        rebuild_toppers(analysis, stale - {None})
+        if None in stale:
+            analysis.rebuild_class_toppers()
+        if changed or added or removed:
+            self.save_snapshot()
+        return changed, added, removed
+
+class FileWatcher(threading.Thread):
+    """Background poller that sets `changed` when the session's data file changes on disk"""
+    
+    def __init__(self, session, interval=2.0):
+        super().__init__(daemon=True)
+        self.session = session
+        self.interval = interval
+        self.changed = threading.Event()
+    
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.session.changed_on_disk():
+                    self.changed.set()
+            except OSError:
+                pass
+
+# ---------------- OFFSET INDEX (lazy loading) ----------------
+# Sidecar "<file>.idx": header, then (offset, length) of every block in file
+# order, then (USN key, block number) entries sorted by key for binary search.
+# Lookups read it through a memory map, so opening it costs nothing up front.
+INDEX_MAGIC = b"SMSIDX\x01\x00"
+INDEX_HEADER = struct.Struct("<8sqqq")      # magic, source size, source mtime_ns, block count
+INDEX_BLOCK = struct.Struct("<qq")          # offset, length
+INDEX_KEY_WIDTH = 24                        # Longer USNs share a prefix key and are told apart on parse
+INDEX_ENTRY = struct.Struct(f"<{INDEX_KEY_WIDTH}sq")
+# Patterns start with a literal so the scan runs at memchr speed; line starts are checked per match
+HEADER_LINE = re.compile(rb"Student[ \t]*[0-9]+[ \t\r]*(?=\n|\Z)")
+USN_LINE = re.compile(rb"USN:[ \t]*([^\n]*?)[ \t\r]*(?=\n|\Z)")
+
+def _line_matches(pattern, data):
+    """Matches of pattern that begin their line (after optional blanks), like the parser's strip()"""
+    for match in pattern.finditer(data):
+        start = match.start()
+        line_start = data.rfind(b"\n", 0, start) + 1
+        if line_start == start or not data[line_start:start].strip(b" \t"):
+            yield line_start, match
+
+def offset_index_path(filepath):
+    return filepath + ".idx"
+
+def build_offset_index(filepath):
+    """Find every block and its USN in one regex scan of the mapped file, and write the .idx sidecar"""
+    stat = os.stat(filepath)
+    starts, usns = [], {}
+    if stat.st_size:
+        with open(filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                starts = [line_start for line_start, _ in _line_matches(HEADER_LINE, data)]
+                for line_start, match in _line_matches(USN_LINE, data):
+                    block = bisect_right(starts, line_start) - 1
+                    if block >= 0:
+                        usns[block] = match.group(1)    # The parser keeps the last USN line too
+    ends = starts[1:] + [stat.st_size]
+    entries = sorted((usn[:INDEX_KEY_WIDTH], block) for block, usn in usns.items())
+    
+    target = offset_index_path(filepath)
+    with open(target + ".tmp", "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(starts)))
+        f.write(b"".join(INDEX_BLOCK.pack(start, end - start) for start, end in zip(starts, ends)))
+        f.write(b"".join(INDEX_ENTRY.pack(key, block) for key, block in entries))
+    os.replace(target + ".tmp", target)
+
+def offset_index_is_fresh(filepath):
+    target = offset_index_path(filepath)
+    if not os.path.exists(target):
+        return False
+    with open(target, "rb") as f:
+        raw = f.read(INDEX_HEADER.size)
+    if len(raw) < INDEX_HEADER.size:
+        return False
+    magic, size, mtime_ns, _ = INDEX_HEADER.unpack(raw)
+    stat = os.stat(filepath)
+    return magic == INDEX_MAGIC and (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+class OffsetIndex:
+    """Block spans of a data file by position and by USN, read from its (re)built .idx sidecar"""
+    
+    def __init__(self, filepath):
+        if not offset_index_is_fresh(filepath):
+            build_offset_index(filepath)
+        self._file = open(offset_index_path(filepath), "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = INDEX_HEADER.unpack_from(self._data, 0)[3]
+        self._entries_at = INDEX_HEADER.size + self.count * INDEX_BLOCK.size
+        self.entry_count = (len(self._data) - self._entries_at) // INDEX_ENTRY.size
+    
+    def __len__(self):
+        return self.count
+    
+    def span(self, block):
+        """(offset, length) of a block"""
+        return INDEX_BLOCK.unpack_from(self._data, INDEX_HEADER.size + block * INDEX_BLOCK.size)
+    
+    def _key(self, position):
+        return INDEX_ENTRY.unpack_from(self._data, self._entries_at + position * INDEX_ENTRY.size)
+    
+    def blocks_of(self, usn, encoding="utf-8"):
+        """Block numbers whose USN key matches, in file order (binary search)"""
+        key = usn.encode(encoding)[:INDEX_KEY_WIDTH].ljust(INDEX_KEY_WIDTH, b"\0")
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.entry_count:
+            entry_key, block = self._key(low)
+            if entry_key != key:
+                break
+            yield block
+            low += 1
+    
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+class LazyCohort:
+    """Cohort over a data file whose student blocks are parsed only when accessed.
+    
+    Supports len(), indexing, iteration, find() and find_many() like
+    CohortStore, returning parsed student dicts (each parsed once). Fields
+    a block omits carry in from the blocks before it, as in a full load."""
+    
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.index = OffsetIndex(filepath)
+        self.encoding = locale.getpreferredencoding(False)
+        self._file = open(filepath, "rb")
+        self._parsed = {}       # Block number -> student dict
+    
+    def _block_text(self, block):
+        offset, length = self.index.span(block)
+        self._file.seek(offset)
+        return self._file.read(length).decode(self.encoding)
+    
+    def _carried_subject(self, block):
+        """Subject state the blocks before this one leave, as a full parse would have it.
+        
+        Earlier blocks are read backwards until each carried line has been
+        seen once, which is usually within the previous block."""
+        carried = {}
+        while block > 0 and len(carried) < len(CARRIED_SUBJECT_LINES):
+            block -= 1
+            lines = {}
+            carry_subject_lines(lines, self._block_text(block))
+            for key, value in lines.items():
+                carried.setdefault(key, value)
+        subject = new_subject_fields()
+        for key, value in carried.items():
+            LINE_HANDLERS[key](None, subject, value)
+        return subject
+    
+    def _student(self, block, text=None, subject=None):
+        """The parsed block; subject, if given, is the carried state and is updated in place"""
+        student = self._parsed.get(block)
+        if student is None:
+            if text is None:
+                text = self._block_text(block)
+            student = parse_block(text, self._carried_subject(block) if subject is None else subject)
+            for key, default in (("name", ""), ("usn", ""), ("mentor", ""), ("fee_total", 0), ("fee_paid", 0)):
+                student.setdefault(key, default)
+            self._parsed[block] = student
+        elif subject is not None:
+            carried = {}
+            carry_subject_lines(carried, text)
+            for key, value in carried.items():
+                LINE_HANDLERS[key](None, subject, value)
+        return student
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("student index out of range")
+        return self._student(row)
+    
+    def __iter__(self):
+        # Carry the subject state forward instead of looking back from every block
+        subject = new_subject_fields()
+        for row in range(len(self)):
+            yield self._student(row, self._block_text(row), subject)
+    
+    def find(self, usn):
+        """Student dict for a USN (first in file order), or None"""
+        for block in self.index.blocks_of(usn, self.encoding):
+            student = self._student(block)
+            if student["usn"] == usn:
+                return student
+        return None
+    
+    def find_many(self, usns):
+        for usn in usns:
+            yield usn, self.find(usn)
+    
+    def close(self):
+        self._file.close()
+        self.index.close()
+
+# ---------------- SQLITE BACKEND (optional) ----------------
+def sqlite_path(filepath):
+    return filepath + ".db"
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    usn TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mentor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fees (
+    student_id INTEGER PRIMARY KEY REFERENCES students(id),
+    fee_total INTEGER NOT NULL,
+    fee_paid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS marks (
+    id INTEGER PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES students(id),
+    subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    ia1 INTEGER, ia2 INTEGER, ia3 INTEGER,
+    assignment INTEGER, external INTEGER,
+    lab_ia INTEGER, continuous_eval INTEGER,
+    theory_total REAL, lab_total INTEGER,
+    subject_type TEXT, eligible INTEGER, reason TEXT, grade TEXT
+);
+CREATE INDEX IF NOT EXISTS students_usn ON students(usn);
+CREATE INDEX IF NOT EXISTS subjects_code ON subjects(code);
+CREATE INDEX IF NOT EXISTS marks_student ON marks(student_id);
+CREATE INDEX IF NOT EXISTS marks_subject ON marks(subject_id);
+"""
+
+class SQLiteCohort:
+    """A cohort bulk-loaded into a local SQLite file, with the analysis done in SQL.
+    
+    Derived values (theory total, eligibility, grade) are computed once by the
+    Python logic at load time and stored in the marks table; the aggregates of
+    analyze_students are then plain GROUP BY queries. Marks rows keep file
+    order (marks.id), which the queries use to list subjects in first-seen order."""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SQLITE_SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def source_key(self, filepath):
+        stat = os.stat(filepath)
+        return f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}"
+    
+    @staticmethod
+    def policy_key():
+        """The grading policy the stored grades and eligibility were computed with"""
+        return repr(grading_policy.policy)
+    
+    def is_loaded_from(self, filepath):
+        """True if the database holds this exact file, graded with the current policy"""
+        meta = dict(self.conn.execute("SELECT key, value FROM meta WHERE key IN ('source', 'policy')"))
+        return meta.get("source") == self.source_key(filepath) and meta.get("policy") == self.policy_key()
+    
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    
+    def bulk_load(self, store, source=None):
+        """Replace the database contents with a CohortStore, in one transaction"""
+        store.fill_metrics()
+        with self.conn:
+            for table in ("marks", "fees", "subjects", "students", "meta"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.executemany(
+                "INSERT INTO students (id, usn, name, mentor) VALUES (?, ?, ?, ?)",
+                ((row, store.usns[row], store.names[row], store.mentors[store.mentor_id[row]])
+                 for row in range(len(store))))
+            self.conn.executemany(
+                "INSERT INTO fees (student_id, fee_total, fee_paid) VALUES (?, ?, ?)",
+                zip(range(len(store)), store.fee_total, store.fee_paid))
+            self.conn.executemany(
+                "INSERT INTO subjects (id, code, name) VALUES (?, ?, ?)",
+                zip(range(len(store.catalog)), store.catalog.codes, store.catalog.names))
+            self.conn.executemany(
+                "INSERT INTO marks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._mark_rows(store))
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('policy', ?)", (self.policy_key(),))
+            if source is not None:
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('source', ?)",
+                                  (self.source_key(source),))
+    
+    @staticmethod
+    def _mark_rows(store):
+        marks = store.marks
+        for row in range(len(store)):
+            for slot in store.subject_slots(row):
+                metrics = store.metrics(slot)
+                yield (slot, row, store.subject_id[slot],
+                       marks["ia1"][slot], marks["ia2"][slot], marks["ia3"][slot],
+                       marks["assignment"][slot], marks["external"][slot],
+                       marks["lab_ia"][slot], marks["continuous_eval"][slot],
+                       metrics.theory_total, metrics.lab_total, metrics.subject_type,
+                       int(metrics.eligible), metrics.reason, metrics.grade)
+    
+    def load_file(self, filepath, store=None):
+        """Load a data file unless this database already holds that exact file.
+        
+        store, an already parsed CohortStore of the file, is bulk-loaded
+        instead of reading the file again. Otherwise the file is parsed into
+        a store of its own; the module-level students are left alone."""
+        if self.is_loaded_from(filepath):
+            return True
+        if store is not None:
+            self.bulk_load(store, source=filepath)
+            return True
+        with using_store(CohortStore()) as store:
+            if not load_cohort(filepath):
+                return False
+            self.bulk_load(store, source=filepath)
+        return True
+    
+    # ---- aggregates of analyze_students ----
+    def pass_fail_per_subject(self):
+        """[(code, name, passed, failed)] in first-seen subject order"""
+        # With MAX(), SQLite takes the bare s.name from the last row, like analyze_students
+        return self.conn.execute("""
+            SELECT s.code, s.name, SUM(m.eligible), SUM(1 - m.eligible), MAX(m.id)
+            FROM marks m JOIN subjects s ON s.id = m.subject_id
+            GROUP BY s.code ORDER BY MIN(m.id)
+        """).fetchall()
+    
+    def grade_distribution(self):
+        """{code: {grade: count}}"""
+        result = defaultdict(dict)
+        for code, grade, count in self.conn.execute("""
+            SELECT s.code, m.grade, COUNT(*)
+            FROM marks m JOIN subjects s ON s.id = m.subject_id
+            GROUP BY s.code, m.grade
+        """):
+            result[code][grade] = count
+        return result
+    
+    def ia_absences(self):
+        """{code: (ia1_absent, ia2_absent, ia3_absent)}"""
+        return {code: (ia1, ia2, ia3) for code, ia1, ia2, ia3 in self.conn.execute("""
+            SELECT s.code, SUM(m.ia1 = 0), SUM(m.ia2 = 0), SUM(m.ia3 = 0)
+            FROM marks m JOIN subjects s ON s.id = m.subject_id
+            GROUP BY s.code
+        """)}
+    
+    def assignments_not_submitted(self):
+        """{code: count of zero assignment marks}"""
+        return dict(self.conn.execute("""
+            SELECT s.code, SUM(m.assignment = 0)
+            FROM marks m JOIN subjects s ON s.id = m.subject_id
+            GROUP BY s.code
+        """).fetchall())
+    
+    def subject_toppers(self, k=TOPPERS_K):
+        """{code: [performance rows]} best theory totals first, ties in file order"""
+        result = defaultdict(list)
+        for code, name, usn, theory_total, lab_total, grade, eligible in self.conn.execute("""
+            SELECT code, name, usn, theory_total, lab_total, grade, eligible FROM (
+                SELECT s.code, st.name, st.usn, m.theory_total, m.lab_total, m.grade, m.eligible,
+                       ROW_NUMBER() OVER (PARTITION BY s.code ORDER BY m.theory_total DESC, m.id) AS rank
+                FROM marks m
+                JOIN subjects s ON s.id = m.subject_id
+                JOIN students st ON st.id = m.student_id
+            ) WHERE rank <= ? ORDER BY code, rank
+        """, (k,)):
+            result[code].append({
+                "name": name,
+                "usn": usn,
+                "theory_total": theory_total,
+                "lab_total": lab_total,
+                "grade": grade,
+                "percentage": (theory_total / MAX_THEORY_MARKS) * 100,
+                "eligible": bool(eligible)
+            })
+        return result
+    
+    def fail_distribution(self):
+        """{failed subject count: [student rows]} like analyze_students"""
+        result = defaultdict(list)
+        for name, usn, failed in self.conn.execute("""
+            SELECT st.name, st.usn, COALESCE(SUM(1 - m.eligible), 0)
+            FROM students st LEFT JOIN marks m ON m.student_id = st.id
+            GROUP BY st.id ORDER BY st.id
+        """):
+            result[failed].append({"name": name, "usn": usn, "failed_count": failed})
+        return result
+    
+    def grade_categories(self):
+        """{highest grade: [student names]} in file order, like analyze_students"""
+        cases = " ".join("WHEN ? THEN ?" for _ in GRADE_ORDER)
+        grade_of_rank = {rank: grade for grade, rank in GRADE_ORDER.items()}
+        result = {}
+        for name, rank in self.conn.execute(f"""
+            SELECT st.name, MAX(CASE m.grade {cases} ELSE 0 END)
+            FROM students st JOIN marks m ON m.student_id = st.id
+            GROUP BY st.id ORDER BY st.id
+        """, [value for grade_rank in GRADE_ORDER.items() for value in grade_rank]):
+            result.setdefault(grade_of_rank[rank], []).append(name)
+        return result
+    
+    def overall_pass_fail(self):
+        passed, failed = self.conn.execute("""
+            SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed > 0), 0) FROM (
+                SELECT COALESCE(SUM(1 - m.eligible), 0) AS failed
+                FROM students st LEFT JOIN marks m ON m.student_id = st.id
+                GROUP BY st.id
+            )
+        """).fetchone()
+        return {"passed_all": passed, "failed_any": failed}
+    
+    def analyze(self):
+        """A CohortAnalysis whose subject-level aggregates (subject_stats, fail_distribution,
+        all_subjects_pass_fail, grade_categories) are computed in SQL; DB_REPORTS read only these"""
+        analysis = CohortAnalysis()
+        subject_stats = analysis.subject_stats
+        grades = self.grade_distribution()
+        absences = self.ia_absences()
+        not_submitted = self.assignments_not_submitted()
+        toppers = self.subject_toppers()
+        for code, name, passed, failed, _ in self.pass_fail_per_subject():
+            stats = subject_stats[code]
+            stats["name"] = name
+            stats["pass_count"] = passed
+            stats["fail_count"] = failed
+            stats["ia1_absent"], stats["ia2_absent"], stats["ia3_absent"] = absences[code]
+            stats["assign_not_submitted"] = not_submitted[code]
+            stats["grades"].update(grades[code])
+            for performance in toppers[code]:
+                stats["toppers"].push(performance["theory_total"], performance)
+        analysis.fail_distribution.update(self.fail_distribution())
+        analysis.all_subjects_pass_fail.update(self.overall_pass_fail())
+        analysis.grade_categories.update(self.grade_categories())
+        return analysis
+
+# ---------------- FEDERATION (many section files) ----------------
+def using_store(store):
+    """Context manager that points the module-level students at another CohortStore"""
+    @contextlib.contextmanager
+    def scope():
+        global students
+        saved = students
+        students = store
+        try:
+            yield store
+        finally:
+            students = saved
+    return scope()
+
+class AnalysisSummary:
+    """Mergeable partial results of one or more analyzed cohorts.
+    
+    Only counters, grade buckets and bounded top-k are kept (no per-student
+    lists), so summaries of any number of sections merge in O(subjects)."""
+    
+    def __init__(self):
+        self.student_count = 0
+        self.subject_stats = defaultdict(new_subject_stats)
+        self.fail_counts = defaultdict(int)                   # Failed subject count -> students
+        self.all_subjects_pass_fail = {"passed_all": 0, "failed_any": 0}
+        self.class_toppers = TopK(TOPPERS_K)
+        self.average_sum = 0.0
+        self.average_count = 0
+        self.pending_fee_students = 0
+        self.pending_fee_total = 0
+        self.branch_counts = defaultdict(int)
+    
+    @classmethod
+    def from_analysis(cls, analysis, section=""):
+        """Summarize a CohortAnalysis; topper rows are tagged with their section"""
+        summary = cls()
+        summary.student_count = sum(len(v) for v in analysis.fail_distribution.values())
+        for code, stats in analysis.subject_stats.items():
+            partial = summary.subject_stats[code]
+            for key in ("name", "pass_count", "fail_count", "ia1_absent", "ia2_absent",
+                        "ia3_absent", "assign_not_submitted"):
+                partial[key] = stats[key]
+            partial["grades"].update(stats["grades"])
+            partial["theory"], partial["lab"] = stats["theory"], stats["lab"]
+            for performance in stats["toppers"].items():
+                partial["toppers"].push(performance["theory_total"], dict(performance, section=section))
+        for failed, entries in analysis.fail_distribution.items():
+            summary.fail_counts[failed] = len(entries)
+        summary.all_subjects_pass_fail.update(analysis.all_subjects_pass_fail)
+        for performance in analysis.class_toppers.items():
+            summary.class_toppers.push(performance["average"], dict(performance, section=section))
+        summary.average_sum = analysis.average_sum
+        summary.average_count = analysis.average_count
+        summary.pending_fee_students = analysis.fees.pending_students
+        summary.pending_fee_total = analysis.fees.outstanding
+        for branch, names in analysis.branch_distribution.items():
+            summary.branch_counts[branch] = len(names)
+        return summary
+    
+    def merge(self, other):
+        """Fold another summary into this one (order matters only for top-k ties)"""
+        self.student_count += other.student_count
+        for code, stats in other.subject_stats.items():
+            merge_subject_stats(self.subject_stats[code], stats)
+        for failed, count in other.fail_counts.items():
+            self.fail_counts[failed] += count
+        for key, count in other.all_subjects_pass_fail.items():
+            self.all_subjects_pass_fail[key] += count
+        self.class_toppers.merge(other.class_toppers)
+        self.average_sum += other.average_sum
+        self.average_count += other.average_count
+        self.pending_fee_students += other.pending_fee_students
+        self.pending_fee_total += other.pending_fee_total
+        for branch, count in other.branch_counts.items():
+            self.branch_counts[branch] += count
+        return self
+    
+    @property
+    def class_average(self):
+        return self.average_sum / self.average_count if self.average_count else 0.0
+
+def analyze_section(filepath, policy=None):
+    """Load and analyze one section file in its own store; returns its AnalysisSummary"""
+    if policy is not None:
+        set_grading_policy(policy)
+    with using_store(CohortStore()), contextlib.redirect_stdout(io.StringIO()):
+        if not load_cohort(filepath):
+            raise ValueError(f"could not read section file '{filepath}'")
+        return AnalysisSummary.from_analysis(analyze_students(low_memory=True), section_name(filepath))
+
+def section_name(filepath):
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+def expand_section_paths(pattern):
+    """Section files for a directory (every *.txt inside) or a glob pattern, sorted"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.txt")
+    return sorted(glob.glob(pattern))
+
+class Federation:
+    """Per-section summaries plus their university-wide reduction"""
+    
+    def __init__(self):
+        self.sections = {}          # Section name -> AnalysisSummary
+        self.total = AnalysisSummary()
+    
+    def add(self, name, summary):
+        self.sections[name] = summary
+        self.total.merge(summary)
+
+def federate(paths, workers=None):
+    """Analyze section files concurrently and reduce them in path order"""
+    federation = Federation()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        summaries = map(analyze_section, paths)
+        for path, summary in zip(paths, summaries):
+            federation.add(section_name(path), summary)
+        return federation
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        policies = [grading_policy.policy] * len(paths)
+        for path, summary in zip(paths, pool.map(analyze_section, paths, policies)):
+            federation.add(section_name(path), summary)
+    return federation
+
+def display_federation(federation):
+    """University-wide report over every federated section"""
+    total = federation.total
+    print_header(f"UNIVERSITY SUMMARY ({len(federation.sections)} SECTIONS)")
+    
+    print(f"{'Section':25} {'Students':>10} {'Passed All':>12} {'Failed Any':>12} {'Pass Rate':>10}")
+    print("-" * 80)
+    for name, summary in federation.sections.items():
+        passed = summary.all_subjects_pass_fail["passed_all"]
+        rate = passed / summary.student_count * 100 if summary.student_count else 0
+        print(f"{name[:25]:25} {summary.student_count:10} {passed:12} "
+              f"{summary.all_subjects_pass_fail['failed_any']:12} {rate:9.1f}%")
+    
+    passed = total.all_subjects_pass_fail["passed_all"]
+    print("-" * 80)
+    print(f"{'TOTAL':25} {total.student_count:10} {passed:12} {total.all_subjects_pass_fail['failed_any']:12} "
+          f"{(passed / total.student_count * 100) if total.student_count else 0:9.1f}%")
+    print(f"\n📊 Class average: {total.class_average:.2f}%")
+    print(f"💰 Pending fees: {total.pending_fee_students} student(s), ₹{total.pending_fee_total:,}")
+    
+    print("\n📚 SUBJECTS:")
+    print(f"{'Code':10} {'Name':30} {'Passed':>8} {'Failed':>8} " + " ".join(f"{g[:5]:>6}" for g in reversed(GRADE_NAMES)))
+    print("-" * 100)
+    for code, stats in total.subject_stats.items():
+        grades = " ".join(f"{stats['grades'][g]:6}" for g in reversed(GRADE_NAMES))
+        print(f"{code:10} {stats['name'][:30]:30} {stats['pass_count']:8} {stats['fail_count']:8} {grades}")
+    
+    print("\n🏆 TOPPERS PER SUBJECT:")
+    for code, stats in total.subject_stats.items():
+        print(f"\n{stats['name']} ({code}):")
+        for i, stud in enumerate(stats["toppers"].items(), 1):
+            print(f"  {i}. {stud['name']:25} {stud['usn']:15} {stud['theory_total']:7}/130 [{stud['section']}]")
+    
+    print("\n🏆 UNIVERSITY TOPPERS:")
+    for i, stud in enumerate(total.class_toppers.items(), 1):
+        print(f"  {i}. {stud['name']:25} {stud['usn']:15} {stud['average']:6.2f}% [{stud['section']}]")
+    
+    print("\n❌ FAILURE DISTRIBUTION:")
+    for failed in sorted(total.fail_counts):
+        print(f"  {failed} subject(s) failed: {total.fail_counts[failed]} student(s)")
+
+def sweep_grade_names(outcomes):
+    """Every grade the swept policies give, best first"""
+    names = []
+    for outcome in outcomes:
+        for grade in reversed(list(outcome.grades)):
+            if grade not in names:
+                names.append(grade)
+    return names
+
+def policy_sweep_table(outcomes):
+    """ReportTable of a sweep: pass rates and grade shares (in %) per policy,
+    with the change in pass rates against the first policy"""
+    grades = sweep_grade_names(outcomes)
+    baseline = outcomes[0] if outcomes else None
     
-    if "IPCC" in sub_type:
-        # For IPCC subjects, both theory and lab must pass
-        theory_pass = is_theory_passed(subject)
-        lab_pass = is_lab_passed(subject)
-        
-        if not theory_pass and not lab_pass:
-            return False, "Failed in both Theory and Lab"
-        elif not theory_pass:
-            return False, "Failed in Theory (minimum 40% required)"
-        elif not lab_pass:
-            return False, "Failed in Lab (minimum 40% required)"
-        return True, "Eligible for main exam"
-    
-    elif "Lab" in sub_type:
-        # For Normal Subject + Lab, both must pass
-        theory_pass = is_theory_passed(subject)
-        lab_pass = is_lab_passed(subject)
-        
-        if not theory_pass and not lab_pass:
-            return False, "Failed in both Theory and Lab"
-        elif not theory_pass:
-            return False, "Failed in Theory (minimum 40% required)"
-        elif not lab_pass:
-            return False, "Failed in Lab (minimum 40% required)"
-        return True, "Eligible for main exam"
+    def rate(count, total):
+        return count / total * 100 if total else 0.0
     
-    else:
-        # For normal subjects, only theory needs to pass
-        if not is_theory_passed(subject):
-            return False, "Failed in Theory (minimum 40% required)"
-        return True, "Eligible for main exam"
+    rows = []
+    for outcome in outcomes:
+        pass_rate = rate(outcome.passed, outcome.subjects)
+        all_pass_rate = rate(outcome.passed_all, outcome.students)
+        rows.append((outcome.name, pass_rate, pass_rate - rate(baseline.passed, baseline.subjects),
+                     all_pass_rate, all_pass_rate - rate(baseline.passed_all, baseline.students))
+                    + tuple(rate(outcome.grades.get(grade, 0), outcome.subjects) for grade in grades))
+    return ReportTable("sweep", "Grading policy sweep",
+                       ("policy", "subject_pass_rate", "subject_pass_change", "all_pass_rate", "all_pass_change")
+                       + tuple(grades), rows)
 
-def calculate_grade(total_marks, max_marks=100):
-    """Calculate grade based on percentage - requirement (k)"""
-    percentage = (total_marks / max_marks) * 100
+def display_policy_sweep(outcomes):
+    """What-if report: how each grading policy changes pass rates and grades"""
+    table = policy_sweep_table(outcomes)
+    grades = table.columns[5:]
+    print_header(f"GRADING POLICY SWEEP ({len(outcomes)} POLICIES)")
+    if outcomes:
+        print(f"Rates are % of {outcomes[0].subjects} subject results and {outcomes[0].students} students; "
+              f"changes are against '{outcomes[0].name}'.")
     
-    if percentage >= 70:
-        return "Distinction", percentage
-    elif percentage >= 60:
-        return "First Class", percentage
-    elif percentage >= 50:
-        return "Second Class", percentage
-    elif percentage >= 40:
-        return "Pass", percentage
-    else:
-        return "Fail", percentage
-
-def get_branch_from_usn(usn):
-    """Extract branch from USN - requirement (m)"""
-    if len(usn) >= 7:
-        branch_code = usn[5:7]
-        return BRANCH_MAP.get(branch_code, f"Branch Code: {branch_code}")
-    return "Unknown Branch"
+    print(f"\n{'Policy':24} {'Subj Pass':>9} {'Change':>7} {'All Pass':>9} {'Change':>7} "
+          + " ".join(f"{grade[:6].rstrip():>6}" for grade in grades))
+    print("-" * (67 + 7 * len(grades)))
+    for name, pass_rate, pass_change, all_rate, all_change, *shares in table.rows:
+        print(f"{name[:24]:24} {pass_rate:8.1f}% {pass_change:+7.1f} {all_rate:8.1f}% {all_change:+7.1f} "
+              + " ".join(f"{share:6.1f}" for share in shares))
 
-def is_college_student(usn):
-    """Check if student belongs to our college - requirement (a)"""
-    return usn.startswith(COLLEGE_CODE)
+# ---------------- SEMESTER HISTORY ----------------
+# One SQLite partition per semester (<semester>.db in the history directory):
+# the cohort as SQLiteCohort stores it, plus per-subject and per-student
+# summaries of its analysis. Partitions are written once, so queries across
+# semesters read only these tables and never the old data files.
+HISTORY_SUFFIX = ".db"
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subject_summary (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    mean_theory REAL NOT NULL,
+    grades TEXT NOT NULL            -- JSON {grade: count}
+);
+CREATE TABLE IF NOT EXISTS student_summary (
+    student_id INTEGER PRIMARY KEY REFERENCES students(id),
+    usn TEXT NOT NULL,
+    name TEXT NOT NULL,
+    average REAL,                   -- NULL for a student without subjects
+    grade TEXT,
+    failed_count INTEGER NOT NULL,
+    failed_codes TEXT NOT NULL      -- Space-separated subject codes
+);
+CREATE INDEX IF NOT EXISTS student_summary_usn ON student_summary(usn);
+CREATE INDEX IF NOT EXISTS student_summary_failed ON student_summary(failed_count) WHERE failed_count > 0;
+"""
 
-# ---------------- ANALYSIS FUNCTIONS ----------------
-def analyze_students():
-    """Perform comprehensive analysis of all students"""
-    subject_stats = defaultdict(lambda: {
-        "name": "",
-        "pass_count": 0,
-        "fail_count": 0,
-        "students": [],
-        "ia1_absent": 0,
-        "ia2_absent": 0,
-        "ia3_absent": 0,
-        "assign_not_submitted": 0,
-        "grades": {"Distinction": 0, "First Class": 0, "Second Class": 0, "Pass": 0, "Fail": 0}
-    })
+class SemesterHistory:
+    """Append-only store of analyzed semesters, with queries across them.
     
-    fail_distribution = defaultdict(list)
-    all_subjects_pass_fail = {"passed_all": 0, "failed_any": 0}
+    Semesters are ordered by name, so name them to sort in time order
+    (2023-1, 2023-2, ...)."""
     
-    for student in students:
-        failed_subjects_count = 0
+    def __init__(self, directory):
+        self.directory = directory
+        self._connections = {}
+        os.makedirs(directory, exist_ok=True)
+    
+    def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+    
+    def partition_path(self, semester):
+        return os.path.join(self.directory, semester + HISTORY_SUFFIX)
+    
+    def semesters(self):
+        return sorted(name[:-len(HISTORY_SUFFIX)] for name in os.listdir(self.directory)
+                      if name.endswith(HISTORY_SUFFIX))
+    
+    def _connect(self, semester):
+        conn = self._connections.get(semester)
+        if conn is None:
+            conn = self._connections[semester] = sqlite3.connect(self.partition_path(semester))
+        return conn
+    
+    def add(self, semester, filepath):
+        """Parse and analyze a data file into a new partition; returns its AnalysisSummary.
         
-        for subject in student["subjects"]:
-            code = subject["code"]
-            name = subject["name"]
-            stats = subject_stats[code]
-            stats["name"] = name  # Store subject name
-            
-            # Track IA absences (assuming 0 means absent)
-            for i, ia_mark in enumerate(subject["ia"]):
-                if ia_mark == 0:
-                    if i == 0:
-                        stats["ia1_absent"] += 1
-                    elif i == 1:
-                        stats["ia2_absent"] += 1
-                    elif i == 2:
-                        stats["ia3_absent"] += 1
-            
-            # Track assignment submission
-            if subject["assignment"] == 0:
-                stats["assign_not_submitted"] += 1
-            
-            # Check eligibility
-            eligible, reason = is_eligible_for_exam(subject)
-            
-            if eligible:
-                stats["pass_count"] += 1
-            else:
-                stats["fail_count"] += 1
-                failed_subjects_count += 1
-            
-            # Calculate grade for this subject
-            theory_total, _, _ = calculate_theory_total(subject)
-            grade, percentage = calculate_grade(theory_total, MAX_THEORY_MARKS)
-            stats["grades"][grade] += 1
-            
-            # Store student performance for topper calculation
-            stats["students"].append({
-                "name": student["name"],
-                "usn": student["usn"],
-                "theory_total": theory_total,
-                "lab_total": calculate_lab_total(subject),
-                "grade": grade,
-                "percentage": percentage,
-                "eligible": eligible
-            })
+        An existing semester is never overwritten. The partition is built
+        under a temporary name and renamed into place when complete."""
+        if not re.match(r"^[\w.-]+$", semester):
+            raise ValueError(f"semester name '{semester}' may only use letters, digits, '.', '-' and '_'")
+        target = self.partition_path(semester)
+        if os.path.exists(target):
+            raise ValueError(f"semester '{semester}' is already in the history (partitions are append-only)")
         
-        # Track failure distribution
-        fail_distribution[failed_subjects_count].append({
-            "name": student["name"],
-            "usn": student["usn"],
-            "failed_count": failed_subjects_count
-        })
+        temp = target + ".tmp"
+        if os.path.exists(temp):
+            os.remove(temp)
+        with using_store(CohortStore()) as store, contextlib.redirect_stdout(io.StringIO()):
+            if not load_cohort(filepath):
+                raise ValueError(f"could not read data file '{filepath}'")
+            analysis = analyze_students()
+            cohort = SQLiteCohort(temp)
+            try:
+                cohort.bulk_load(store, source=filepath)
+                self._write_summaries(cohort.conn, semester, store, analysis)
+            finally:
+                cohort.close()
+        os.replace(temp, target)
+        return AnalysisSummary.from_analysis(analysis, semester)
+    
+    @staticmethod
+    def _write_summaries(conn, semester, store, analysis):
+        conn.executescript(HISTORY_SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO subject_summary VALUES (?, ?, ?, ?, ?, ?)",
+                ((code, stats["name"], stats["pass_count"], stats["fail_count"], stats["theory"].stats.mean,
+                  json.dumps(stats["grades"])) for code, stats in analysis.subject_stats.items()))
+            rows = []
+            for row in range(len(store)):
+                student = store[row]
+                performance = student_performance(student)
+                failed = [subject["code"] for subject in student["subjects"] if not subject_metrics(subject).eligible]
+                rows.append((row, student["usn"], student["name"],
+                             performance["average"] if performance else None,
+                             performance["grade"] if performance else None,
+                             len(failed), " ".join(failed)))
+            conn.executemany("INSERT INTO student_summary VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            passed = analysis.all_subjects_pass_fail
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ("semester", semester),
+                ("students", len(store)),
+                ("passed_all", passed["passed_all"]),
+                ("failed_any", passed["failed_any"]),
+                ("class_average", analysis.class_average),
+                ("grading_policy", grading_policy.name),
+                ("added", time.strftime("%Y-%m-%d %H:%M:%S")),
+            ])
+    
+    def overview(self):
+        """[(semester, {meta key: value})] in semester order"""
+        return [(semester, dict(self._connect(semester).execute("SELECT key, value FROM meta")))
+                for semester in self.semesters()]
+    
+    def trajectory(self, usn):
+        """[(semester, name, average, grade, [(code, subject name, theory total, grade, eligible)])]
+        for every semester the USN appears in"""
+        result = []
+        for semester in self.semesters():
+            conn = self._connect(semester)
+            for student_id, name, average, grade in conn.execute(
+                    "SELECT student_id, name, average, grade FROM student_summary WHERE usn = ?", (usn,)):
+                subjects = conn.execute("""
+                    SELECT s.code, s.name, m.theory_total, m.grade, m.eligible
+                    FROM marks m JOIN subjects s ON s.id = m.subject_id
+                    WHERE m.student_id = ? ORDER BY m.id
+                """, (student_id,)).fetchall()
+                result.append((semester, name, average, grade,
+                               [(code, subject, total, grade, bool(eligible))
+                                for code, subject, total, grade, eligible in subjects]))
+        return result
+    
+    def pass_rate_trends(self, code=None):
+        """{code: (subject name, {semester: (passed, failed)})} from the subject summaries"""
+        trends = {}
+        for semester in self.semesters():
+            query = "SELECT code, name, passed, failed FROM subject_summary"
+            rows = self._connect(semester).execute(query + " WHERE code = ?", (code,)) if code \
+                else self._connect(semester).execute(query)
+            for subject_code, name, passed, failed in rows:
+                entry = trends.setdefault(subject_code, (name, {}))
+                entry[1][semester] = (passed, failed)
+        return trends
+    
+    def repeat_failures(self, min_semesters=2):
+        """Students who failed subjects in at least min_semesters semesters, most semesters first.
         
-        # Track overall pass/fail
-        if failed_subjects_count == 0:
-            all_subjects_pass_fail["passed_all"] += 1
-        else:
-            all_subjects_pass_fail["failed_any"] += 1
+        Returns [(usn, name, {semester: [failed codes]}, codes failed more than once)]."""
+        failures = {}
+        names = {}
+        for semester in self.semesters():
+            for usn, name, codes in self._connect(semester).execute(
+                    "SELECT usn, name, failed_codes FROM student_summary WHERE failed_count > 0"):
+                failures.setdefault(usn, {}).setdefault(semester, []).extend(codes.split())
+                names[usn] = name
+        result = []
+        for usn, by_semester in failures.items():
+            if len(by_semester) < min_semesters:
+                continue
+            seen = defaultdict(int)
+            for codes in by_semester.values():
+                for code in set(codes):
+                    seen[code] += 1
+            result.append((usn, names[usn], by_semester, sorted(code for code, count in seen.items() if count > 1)))
+        result.sort(key=lambda item: (-len(item[2]), -len(item[3]), item[0]))
+        return result
+
+def display_trajectory(history, usn):
+    print_header(f"TRAJECTORY OF {usn}")
+    semesters = history.trajectory(usn)
+    if not semesters:
+        print(f"❌ No semester in '{history.directory}' has USN {usn}")
+        return
+    for semester, name, average, grade, subjects in semesters:
+        failed = [code for code, _, _, _, eligible in subjects if not eligible]
+        average_text = f"{average:6.2f}% ({grade})" if average is not None else "no subjects"
+        print(f"\n📅 {semester}: {name} - average {average_text}"
+              + (f" - ❌ failed {', '.join(failed)}" if failed else " - ✅ passed all"))
+        for code, subject, total, grade, eligible in subjects:
+            print(f"   {code:10} {subject[:30]:30} {total:7.1f}/{MAX_THEORY_MARKS} {grade:13} "
+                  f"{'✅' if eligible else '❌'}")
+
+def display_pass_rate_trends(history, code=None):
+    overview = history.overview()
+    semesters = [semester for semester, _ in overview]
+    print_header(f"PASS-RATE TRENDS ({len(semesters)} SEMESTERS)")
+    if not semesters:
+        print(f"❌ No semesters in '{history.directory}' yet (add one with --add-semester)")
+        return
+    
+    def rate_cells(counts):
+        cells = []
+        for semester in semesters:
+            if semester in counts:
+                passed, failed = counts[semester]
+                cells.append(f"{passed / (passed + failed) * 100 if passed + failed else 0:7.1f}%")
+            else:
+                cells.append(f"{'-':>8}")
+        return " ".join(cells)
     
-    return subject_stats, fail_distribution, all_subjects_pass_fail
+    print(f"{'':41}" + " ".join(f"{semester[-8:]:>8}" for semester in semesters))
+    print(f"{'Students passing every subject':41}"
+          + rate_cells({semester: (int(meta["passed_all"]), int(meta["failed_any"])) for semester, meta in overview}))
+    print(f"{'Class average':41}" + " ".join(f"{float(meta['class_average']):7.1f}%" for _, meta in overview))
+    print("-" * (41 + 9 * len(semesters)))
+    for subject_code, (name, counts) in sorted(history.pass_rate_trends(code).items()):
+        print(f"{subject_code:10} {name[:30]:30}" + rate_cells(counts))
+
+def display_repeat_failures(history, limit=50):
+    failures = history.repeat_failures()
+    print_header(f"REPEAT FAILURES ({len(failures)} STUDENTS)")
+    if not failures:
+        print("✅ No student has failed subjects in more than one semester.")
+        return
+    for usn, name, by_semester, repeated in failures[:limit]:
+        print(f"\n🎓 {name} ({usn}): failed in {len(by_semester)} semester(s)"
+              + (f", repeatedly in {', '.join(repeated)}" if repeated else ""))
+        for semester, codes in by_semester.items():
+            print(f"   {semester}: {', '.join(codes)}")
+    if len(failures) > limit:
+        print(f"\n... and {len(failures) - limit} more")
 
 # ---------------- DISPLAY FUNCTIONS ----------------
 def print_header(title):
@@ -384,32 +3265,27 @@ def print_header(title):
     print("=" * 80)
 
 # ---------- REQUIREMENT (a): College Affiliation ----------
-def check_college_affiliation():
+def check_college_affiliation(analysis=None):
     """a) Find whether a student belongs to our college or not."""
     print_header("a) COLLEGE AFFILIATION CHECK")
     
+    analysis = analysis or analyze_students()
     print(f"College Code: {COLLEGE_CODE}")
     print(f"Checking {len(students)} students...")
     print("-" * 80)
     
-    college_students = []
-    non_college_students = []
-    
-    for student in students:
-        if is_college_student(student["usn"]):
-            college_students.append(student)
-        else:
-            non_college_students.append(student)
+    college_students = analysis.college_students
+    non_college_students = analysis.non_college_students
     
     print(f"\n✅ COLLEGE STUDENTS ({len(college_students)}):")
     print("-" * 40)
-    for student in college_students:
-        print(f"  {student['name']:25} | USN: {student['usn']:12}")
+    for name, usn in college_students:
+        print(f"  {name:25} | USN: {usn:12}")
     
     print(f"\n❌ NON-COLLEGE STUDENTS ({len(non_college_students)}):")
     print("-" * 40)
-    for student in non_college_students:
-        print(f"  {student['name']:25} | USN: {student['usn']:12}")
+    for name, usn in non_college_students:
+        print(f"  {name:25} | USN: {usn:12}")
     
     print(f"\n📊 SUMMARY: {len(college_students)} college students, {len(non_college_students)} non-college students")
 
@@ -421,7 +3297,8 @@ def display_best_two_ia_marks():
     for student in students:
         print(f"\n🎓 {student['name']} ({student['usn']}):")
         for subject in student["subjects"]:
-            avg_ia, best_two = best_two_avg(subject["ia"])
+            metrics = subject_metrics(subject)
+            avg_ia, best_two = metrics.ia_avg, metrics.best_two
             print(f"  📚 {subject['name']}:")
             print(f"     All IA Marks: {subject['ia']}")
             print(f"     Best 2 Marks: {best_two}")
@@ -429,25 +3306,13 @@ def display_best_two_ia_marks():
             print(f"     Maximum Possible: 40")
 
 # ---------- REQUIREMENT (c): Subject Type ----------
-def display_subject_types():
+def display_subject_types(analysis=None):
     """c) Find subject is IPCC/Normal Subject/Normal Subject+Lab"""
     print_header("c) SUBJECT TYPE CLASSIFICATION")
     
-    subject_type_count = {"IPCC (Theory + Lab)": 0, "Normal Subject + Lab": 0, "Normal Subject": 0}
-    subject_details = {}
-    
-    for student in students:
-        for subject in student["subjects"]:
-            sub_type = check_subject_type(subject)
-            subject_type_count[sub_type] += 1
-            
-            if subject["code"] not in subject_details:
-                subject_details[subject["code"]] = {
-                    "name": subject["name"],
-                    "type": sub_type,
-                    "students": []
-                }
-            subject_details[subject["code"]]["students"].append(student["name"])
+    analysis = analysis or analyze_students()
+    subject_type_count = analysis.subject_type_count
+    subject_details = analysis.subject_details
     
     print("\n📊 SUBJECT TYPE DISTRIBUTION:")
     print("-" * 60)
@@ -459,7 +3324,7 @@ def display_subject_types():
     for code, details in subject_details.items():
         print(f"\n{details['name']} ({code}):")
         print(f"  Type: {details['type']}")
-        print(f"  Number of students: {len(details['students'])}")
+        print(f"  Number of students: {details['count']}")
 
 # ---------- REQUIREMENTS (d,e): Eligibility Check ----------
 def check_exam_eligibility():
@@ -467,8 +3332,9 @@ def check_exam_eligibility():
     print_header("d,e) EXAM ELIGIBILITY CHECK")
     
     print("Minimum Passing Criteria:")
-    print(f"  Theory: {MAX_THEORY_MARKS * PASS_PERCENT:.0f}/{MAX_THEORY_MARKS} (40%)")
-    print(f"  Lab: {MAX_LAB_MARKS * PASS_PERCENT:.0f}/{MAX_LAB_MARKS} (40%)")
+    policy = grading_policy.policy
+    print(f"  Theory: {grading_policy.theory_pass_mark:g}/{MAX_THEORY_MARKS} ({policy.theory_pass_percent * 100:g}%)")
+    print(f"  Lab: {grading_policy.lab_pass_mark:g}/{MAX_LAB_MARKS} ({policy.lab_pass_percent * 100:g}%)")
     print("-" * 80)
     
     eligible_count = 0
@@ -479,10 +3345,11 @@ def check_exam_eligibility():
         all_eligible = True
         
         for subject in student["subjects"]:
-            sub_type = check_subject_type(subject)
-            eligible, reason = is_eligible_for_exam(subject)
-            theory_total, _, _ = calculate_theory_total(subject)
-            lab_total = calculate_lab_total(subject)
+            metrics = subject_metrics(subject)
+            sub_type = metrics.subject_type
+            eligible, reason = metrics.eligible, metrics.reason
+            theory_total = metrics.theory_total
+            lab_total = metrics.lab_total
             
             print(f"\n  📚 {subject['name']} ({subject['code']}) - {sub_type}:")
             print(f"     Theory Marks: {theory_total}/{MAX_THEORY_MARKS} ({theory_total/MAX_THEORY_MARKS*100:.1f}%)")
@@ -535,53 +3402,45 @@ def display_top_toppers_per_subject(subject_stats):
     for code, stats in subject_stats.items():
         print(f"\n🏆 {stats['name']} ({code}):")
         
-        if stats["students"]:
-            sorted_students = sorted(stats["students"], key=lambda x: x["theory_total"], reverse=True)
+        if stats["toppers"]:
             print(f"{'Rank':5} {'Name':25} {'USN':15} {'Marks':10} {'Grade':15}")
             print("-" * 70)
             
-            for i, stud in enumerate(sorted_students[:3], 1):
+            for i, stud in enumerate(stats["toppers"].items(), 1):
                 print(f"{i:5} {stud['name']:25} {stud['usn']:15} {stud['theory_total']:7}/130 {stud['grade']:15}")
         else:
             print("  No student data available")
 
 # ---------- REQUIREMENT (h): Top 3 Class Toppers ----------
-def display_top_class_toppers():
+def display_top_class_toppers(analysis=None):
     """h) Find top 3 toppers of a class."""
     print_header("h) TOP 3 CLASS TOPPERS")
     
-    class_performance = []
-    for student in students:
-        total_marks = 0
-        subjects_count = len(student["subjects"])
-        
-        for subject in student["subjects"]:
-            theory_total, _, _ = calculate_theory_total(subject)
-            total_marks += theory_total
-        
-        if subjects_count > 0:
-            average_percentage = (total_marks / (subjects_count * MAX_THEORY_MARKS)) * 100
-            grade, _ = calculate_grade(average_percentage, 100)
-            class_performance.append({
-                "name": student["name"],
-                "usn": student["usn"],
-                "total_marks": total_marks,
-                "subjects": subjects_count,
-                "average": average_percentage,
-                "grade": grade
-            })
-    
-    # Sort by average percentage
-    sorted_students = sorted(class_performance, key=lambda x: x["average"], reverse=True)
+    analysis = analysis or analyze_students()
+    toppers = analysis.class_toppers.items()
     
     print("🏆 TOP 3 CLASS TOPPERS:")
     print("-" * 80)
     print(f"{'Rank':5} {'Name':25} {'USN':15} {'Average %':12} {'Grade':15}")
     print("-" * 80)
     
-    for i, student in enumerate(sorted_students[:3], 1):
+    for i, student in enumerate(toppers, 1):
         print(f"{i:5} {student['name']:25} {student['usn']:15} {student['average']:11.2f}% {student['grade']:15}")
         print(f"{'':5} Total Marks: {student['total_marks']}/{student['subjects']*MAX_THEORY_MARKS} across {student['subjects']} subjects")
+    
+    print(f"\n📊 CLASS AVERAGE: {analysis.class_average:.2f}%")
+
+def display_group_toppers(group_by, k=10):
+    """Top k students by average percentage in every branch or mentor group"""
+    print_header(f"TOP {k} TOPPERS PER {group_by.upper()}")
+    
+    board = rank_students(group_by, k)
+    for group, top in board.groups.items():
+        print(f"\n🏆 {group}:")
+        print(f"{'Rank':5} {'Name':25} {'USN':15} {'Average %':12} {'Grade':15}")
+        print("-" * 80)
+        for i, student in enumerate(top.items(), 1):
+            print(f"{i:5} {student['name']:25} {student['usn']:15} {student['average']:11.2f}% {student['grade']:15}")
 
 # ---------- REQUIREMENT (i): Failure Distribution ----------
 def display_failure_distribution(fail_distribution):
@@ -624,7 +3483,7 @@ def display_overall_pass_fail(all_subjects_pass_fail):
         print(f"\n🎯 SUCCESS RATE: {(passed_all/total_students*100):.1f}%")
 
 # ---------- REQUIREMENT (k): Grade Distribution ----------
-def display_grade_distribution(subject_stats):
+def display_grade_distribution(subject_stats, analysis=None):
     """k) Find distinctions, first class, second class and pass students."""
     print_header("k) GRADE DISTRIBUTION")
     
@@ -650,21 +3509,7 @@ def display_grade_distribution(subject_stats):
     print("\n👥 STUDENTS BY GRADE CATEGORY:")
     print("-" * 80)
     
-    grade_categories = {}
-    for student in students:
-        grades = []
-        for subject in student["subjects"]:
-            theory_total, _, _ = calculate_theory_total(subject)
-            grade, _ = calculate_grade(theory_total, MAX_THEORY_MARKS)
-            grades.append(grade)
-        
-        # Get highest grade for the student
-        grade_order = {"Distinction": 4, "First Class": 3, "Second Class": 2, "Pass": 1, "Fail": 0}
-        highest_grade = max(grades, key=lambda g: grade_order.get(g, 0))
-        
-        if highest_grade not in grade_categories:
-            grade_categories[highest_grade] = []
-        grade_categories[highest_grade].append(student["name"])
+    grade_categories = (analysis or analyze_students()).grade_categories
     
     for grade in ["Distinction", "First Class", "Second Class", "Pass", "Fail"]:
         if grade in grade_categories:
@@ -673,64 +3518,69 @@ def display_grade_distribution(subject_stats):
                 print(f"  • {name}")
 
 # ---------- REQUIREMENT (l): Fee Payment Status ----------
-def check_fee_payment():
+def check_fee_payment(analysis=None):
     """l) Check students paid college fees or not; if not show balance and mentor."""
     print_header("l) FEE PAYMENT STATUS")
     
-    pending_fees = 0
-    total_balance = 0
+    analysis = analysis or analyze_students()
+    pending_fees = analysis.fees.pending_students
     
     print("Fee Payment Status of Students:")
     print("-" * 80)
     
-    for student in students:
-        balance = student["fee_total"] - student["fee_paid"]
-        
+    for name, balance, mentor in fee_rows(analysis):
         if balance > 0:
-            pending_fees += 1
-            total_balance += balance
-            print(f"❌ {student['name']:25} | Balance: ₹{balance:9,} | Action: Meet {student['mentor']}")
+            print(f"❌ {name:25} | Balance: ₹{balance:9,} | Action: Meet {mentor}")
         else:
-            print(f"✅ {student['name']:25} | Fee Status: FULLY PAID")
+            print(f"✅ {name:25} | Fee Status: FULLY PAID")
     
     print(f"\n📊 FEE PAYMENT SUMMARY:")
     print(f"  Total Students: {len(students)}")
     print(f"  Students with pending fees: {pending_fees}")
-    print(f"  Total pending amount: ₹{total_balance:,}")
+    print(f"  Total pending amount: ₹{analysis.fees.outstanding:,}")
     
     if pending_fees > 0:
         print(f"\n⚠️  {pending_fees} student(s) need to meet their mentors regarding fee payment!")
 
-def display_check_fee_alert():
-    """Send alert to mentor if fees are unpaid"""
+def display_check_fee_alert(analysis=None):
+    """Alerts for mentors of students with fees pending (sent with --send-alerts)"""
     print_header("FEE PAYMENT ALERTS")
 
+    analysis = analysis or analyze_students()
     alert_count = 0
 
-    for student in students:
-        if not student.get("fee_paid", True):
-            alert_count += 1
-            print(f"🚨 ALERT SENT")
-            print(f"   Student : {student['name']}")
-            print(f"   USN     : {student['usn']}")
-            print(f"   Mentor  : {student['mentor']}")
-            print(f"   Status  : Fees NOT PAID\n")
+    for name, usn, mentor, balance in analysis.fee_alerts.values():
+        alert_count += 1
+        print(f"🚨 FEE ALERT")
+        print(f"   Student : {name}")
+        print(f"   USN     : {usn}")
+        print(f"   Mentor  : {mentor}")
+        print(f"   Status  : Fees PENDING (Balance: ₹{balance:,})\n")
 
     if alert_count == 0:
         print("✅ All students have paid their fees.")
 
+def display_outstanding_fees(analysis=None):
+    """u) Outstanding fees per mentor and per branch, read from the fee ledger"""
+    print_header("u) OUTSTANDING FEES BY MENTOR AND BRANCH")
+    
+    ledger = (analysis or analyze_students()).fees
+    for group_by, label in (("mentor", "Mentor"), ("branch", "Branch")):
+        print(f"\n{label:35} {'Students':>10} {'Outstanding':>15}")
+        print("-" * 62)
+        for key, count, amount in ledger.outstanding_by(group_by):
+            print(f"{key[:35]:35} {count:10} ₹{amount:14,}")
+    
+    print(f"\n📊 Total: {ledger.pending_students} student(s) owe ₹{ledger.outstanding:,}")
+    if ledger.payments:
+        print(f"💳 Payments recorded since loading: {ledger.payments} (₹{ledger.collected:,})")
+
 # ---------- REQUIREMENT (m): Display Student Branch ----------
-def display_student_branches():
+def display_student_branches(analysis=None):
     """m) Display student branch."""
     print_header("m) STUDENT BRANCH INFORMATION")
     
-    branch_distribution = {}
-    
-    for student in students:
-        branch = get_branch_from_usn(student["usn"])
-        if branch not in branch_distribution:
-            branch_distribution[branch] = []
-        branch_distribution[branch].append(student["name"])
+    branch_distribution = (analysis or analyze_students()).branch_distribution
     
     print("Branch-wise Student Distribution:")
     print("-" * 80)
@@ -791,64 +3641,1157 @@ def display_assignment_status(subject_stats):
     print(f"  Total assignments not submitted: {total_not_submitted}")
     print(f"  Overall submission rate: {(len(students)*len(subject_stats) - total_not_submitted)/(len(students)*len(subject_stats))*100:.1f}%")
 
+# ---------- Reports f-o from SQLite (w) ----------
+def display_sql_reports(filepath):
+    """w) Reports f, g, i, j, k, n and o with the aggregates computed in SQL.
+    
+    The cohort is copied into filepath's SQLite database (filepath.db) only
+    when the database does not hold this version of the file and grading
+    policy yet."""
+    cohort = SQLiteCohort(sqlite_path(filepath))
+    try:
+        cohort.load_file(filepath, students)
+        analysis = cohort.analyze()
+    finally:
+        cohort.close()
+    
+    run_reports(DB_REPORTS, analysis)
+
+# ---------- Score Distribution per Subject (s) ----------
+def display_score_distribution(subject_stats):
+    """s) Mean, spread, percentiles and histogram of theory and lab totals per subject"""
+    print_header("s) SCORE DISTRIBUTION PER SUBJECT")
+    
+    for code, stats in subject_stats.items():
+        print(f"\n📘 {stats['name']} ({code}):")
+        for label, distribution in (("Theory", stats["theory"]), ("Lab", stats["lab"])):
+            if not distribution.stats.count:
+                continue
+            summary = distribution.summary()
+            print(f"  {label:7} n={summary['count']:<7} mean={summary['mean']:6.2f}  sd={summary['stdev']:6.2f}  "
+                  f"median≈{summary['median']:6.1f}  P90≈{summary['p90']:6.1f}  P99≈{summary['p99']:6.1f}")
+            bins = distribution.histogram.bins()
+            largest = max(count for _, _, count in bins) or 1
+            for low, high, count in bins:
+                print(f"    {low:3}-{high:<3} {count:7}  {'█' * round(count / largest * 40)}")
+
 # ---------- REQUIREMENT (p): Search by USN ----------
+def display_student_details(student):
+    """Print the full record of one student (used by search)"""
+    print(f"\n" + "=" * 80)
+    print("✅ STUDENT DETAILS FOUND")
+    print("=" * 80)
+    print(f"Name          : {student['name']}")
+    print(f"USN           : {student['usn']}")
+    print(f"Branch        : {get_branch_from_usn(student['usn'])}")
+    print(f"Mentor        : {student['mentor']}")
+    print(f"College       : {'YES' if is_college_student(student['usn']) else 'NO'}")
+    
+    # Fee status
+    balance = student["fee_total"] - student["fee_paid"]
+    if balance > 0:
+        print(f"Fee Status    : PENDING (Balance: ₹{balance:,})")
+        print(f"Action        : Meet mentor {student['mentor']}")
+    else:
+        print(f"Fee Status    : FULLY PAID")
+    
+    print(f"\nSUBJECT PERFORMANCE:")
+    print("-" * 80)
+    
+    for i, subject in enumerate(student["subjects"], 1):
+        metrics = subject_metrics(subject)
+        sub_type = metrics.subject_type
+        eligible_status, reason = metrics.eligible, metrics.reason
+        
+        theory_total, avg_ia, best_two = metrics.theory_total, metrics.ia_avg, metrics.best_two
+        grade, percentage = metrics.grade, metrics.percentage
+        lab_total = metrics.lab_total
+        
+        print(f"\n{i}. {subject['name']} ({subject['code']}) - {sub_type}")
+        print(f"   Best 2 IA marks: {best_two} | Average: {avg_ia:.1f}")
+        print(f"   Assignment: {subject['assignment']}/10 | External: {subject['external']}/40")
+        print(f"   Theory Total: {theory_total}/130 ({percentage:.1f}%) - Grade: {grade}")
+        
+        if lab_total > 0:
+            print(f"   Lab IA: {subject.get('lab_ia', 0)}/50")
+            print(f"   Continuous Eval: {subject.get('continuous_eval', 0)}/50")
+            print(f"   Lab Total: {lab_total}/100 ({lab_total}%)")
+        
+        print(f"   Eligibility: {'✅ ELIGIBLE' if eligible_status else '❌ NOT ELIGIBLE'}")
+        if not eligible_status:
+            print(f"   Reason: {reason}")
+    
+    print("\n" + "=" * 80)
+
 def search_student_by_usn():
     """p) Search student details based on USN."""
     print_header("p) SEARCH STUDENT BY USN")
     
     usn = input("Enter USN to search: ").strip().upper()
     
-    found = False
-    for student in students:
-        if student["usn"] == usn:
-            found = True
-            print(f"\n" + "=" * 80)
-            print("✅ STUDENT DETAILS FOUND")
-            print("=" * 80)
-            print(f"Name          : {student['name']}")
-            print(f"USN           : {student['usn']}")
-            print(f"Branch        : {get_branch_from_usn(student['usn'])}")
-            print(f"Mentor        : {student['mentor']}")
-            print(f"College       : {'YES' if is_college_student(student['usn']) else 'NO'}")
-            
-            # Fee status
-            balance = student["fee_total"] - student["fee_paid"]
-            if balance > 0:
-                print(f"Fee Status    : PENDING (Balance: ₹{balance:,})")
-                print(f"Action        : Meet mentor {student['mentor']}")
+    student = students.find(usn)
+    if student is None:
+        print(f"\n❌ No student found with USN: {usn}")
+        return
+    display_student_details(student)
+
+def read_usn_file(filepath):
+    """Yield USNs from a file with one USN per line (blank lines skipped)"""
+    with open(filepath, "r") as f:
+        for line in f:
+            usn = line.strip().upper()
+            if usn:
+                yield usn
+
+def display_batch_usn_lookup(usns):
+    """Look up every USN of a list (see read_usn_file) and print one summary line each"""
+    print_header("BATCH USN LOOKUP")
+    
+    found = 0
+    missing = 0
+    for usn, student in students.find_many(usns):
+        if student is None:
+            missing += 1
+            print(f"❌ {usn:15} | Not found")
+            continue
+        found += 1
+        balance = student["fee_total"] - student["fee_paid"]
+        failed = sum(1 for subject in student["subjects"] if not subject_metrics(subject).eligible)
+        print(f"✅ {usn:15} | {student['name']:25} | {get_branch_from_usn(usn):30} | "
+              f"Failed: {failed} | Balance: ₹{balance:,}")
+    
+    print(f"\n📊 SUMMARY: {found} found, {missing} not found")
+
+def lookup_usn_file():
+    """v) Ask for a file of USNs and print one summary line per student."""
+    filepath = input("Enter path of the USN file: ").strip()
+    try:
+        usns = list(read_usn_file(filepath))
+    except OSError as e:
+        print(f"❌ Cannot read USN file: {e}")
+        return
+    display_batch_usn_lookup(usns)
+
+# ---------------- REPORT RENDERING ----------------
+# Reports as structured tables (computation) written by a sink (rendering).
+RENDER_BUFFER = 1 << 20   # Bytes of output collected before each write
+RENDER_ROWS_PER_WRITE = 4096
+
+ReportTable = namedtuple("ReportTable", ["report", "title", "columns", "rows"])
+
+def _subject_tables(letter, subject_stats):
+    if letter == "f":
+        rows = []
+        for code, stats in subject_stats.items():
+            total = stats["pass_count"] + stats["fail_count"]
+            rate = (stats["pass_count"] / total * 100) if total > 0 else 0
+            rows.append((code, stats["name"], stats["pass_count"], stats["fail_count"], total, rate))
+        return [ReportTable("f", "Pass/Fail count per subject",
+                            ("subject_code", "subject_name", "passed", "failed", "total", "pass_rate"), rows)]
+    if letter == "g":
+        rows = [(code, stats["name"], rank, stud["usn"], stud["name"], stud["theory_total"], stud["grade"])
+                for code, stats in subject_stats.items()
+                for rank, stud in enumerate(stats["toppers"].items(), 1)]
+        return [ReportTable("g", "Top toppers per subject",
+                            ("subject_code", "subject_name", "rank", "usn", "name", "theory_total", "grade"), rows)]
+    if letter == "k":
+        rows = [(code, stats["name"]) + tuple(stats["grades"][grade] for grade in reversed(GRADE_NAMES))
+                for code, stats in subject_stats.items()]
+        return [ReportTable("k", "Grade distribution per subject",
+                            ("subject_code", "subject_name", "distinction", "first_class",
+                             "second_class", "pass", "fail"), rows)]
+    if letter == "n":
+        rows = [(code, stats["name"], stats["ia1_absent"], stats["ia2_absent"], stats["ia3_absent"])
+                for code, stats in subject_stats.items()]
+        return [ReportTable("n", "IA absentees per subject",
+                            ("subject_code", "subject_name", "ia1_absent", "ia2_absent", "ia3_absent"), rows)]
+    if letter == "o":
+        rows = [(code, stats["name"], stats["assign_not_submitted"],
+                 (len(students) - stats["assign_not_submitted"]) / len(students) * 100 if len(students) else 0)
+                for code, stats in subject_stats.items()]
+        return [ReportTable("o", "Assignment submission per subject",
+                            ("subject_code", "subject_name", "not_submitted", "submission_rate"), rows)]
+    if letter == "s":
+        scores = [(code, stats["name"], score, stats[score]) for code, stats in subject_stats.items()
+                  for score in ("theory", "lab") if stats[score].stats.count]
+        summaries = [(code, name, score) + tuple(distribution.summary().values())
+                     for code, name, score, distribution in scores]
+        bins = [(code, name, score, low, high, count) for code, name, score, distribution in scores
+                for low, high, count in distribution.histogram.bins()]
+        return [ReportTable("s", "Score distribution per subject",
+                            ("subject_code", "subject_name", "score", "count", "mean", "stdev",
+                             "median", "p90", "p99"), summaries),
+                ReportTable("s", "Score histogram per subject",
+                            ("subject_code", "subject_name", "score", "bin_low", "bin_high", "count"), bins)]
+    return []
+
+def _student_detail_rows(usns):
+    for usn in usns:
+        student = students.find(usn)
+        if student is None:
+            continue
+        for subject in student["subjects"]:
+            metrics = subject_metrics(subject)
+            yield (student["usn"], student["name"], get_branch_from_usn(student["usn"]), student["mentor"],
+                   student["fee_total"] - student["fee_paid"], subject["code"], subject["name"],
+                   metrics.subject_type, " ".join(map(str, metrics.best_two)), metrics.ia_avg,
+                   subject["assignment"], subject["external"], metrics.theory_total, metrics.percentage,
+                   metrics.grade, metrics.lab_total, metrics.eligible, metrics.reason)
+
+def build_report_tables(letter, analysis, usns=()):
+    """Structured rows for one report letter (rows are materialized lists)"""
+    subject_stats = analysis.subject_stats
+    fail_distribution = analysis.fail_distribution
+    all_subjects_pass_fail = analysis.all_subjects_pass_fail
+    if letter in "fgknos":
+        tables = _subject_tables(letter, subject_stats)
+        if letter == "k":
+            tables.append(ReportTable("k", "Highest grade per student", ("grade", "name"),
+                                      [(grade, name) for grade in reversed(GRADE_NAMES)
+                                       for name in analysis.grade_categories.get(grade, [])]))
+        return tables
+    if letter == "a":
+        return [ReportTable("a", "College affiliation", ("usn", "name", "college_student"),
+                            [(usn, name, True) for name, usn in analysis.college_students]
+                            + [(usn, name, False) for name, usn in analysis.non_college_students])]
+    if letter == "b":
+        rows = [(student["usn"], student["name"], subject["code"], subject["name"],
+                 " ".join(map(str, subject["ia"])), " ".join(map(str, metrics.best_two)), metrics.ia_avg)
+                for student in students for subject in student["subjects"]
+                for metrics in (subject_metrics(subject),)]
+        return [ReportTable("b", "Best 2 IA marks",
+                            ("usn", "name", "subject_code", "subject_name", "ia_marks", "best_two", "average"), rows)]
+    if letter == "c":
+        return [ReportTable("c", "Subject type distribution", ("subject_type", "count"),
+                            list(analysis.subject_type_count.items())),
+                ReportTable("c", "Subject types", ("subject_code", "subject_name", "subject_type", "students"),
+                            [(code, details["name"], details["type"], details["count"])
+                             for code, details in analysis.subject_details.items()])]
+    if letter == "d":
+        rows = [(student["usn"], student["name"], subject["code"], subject["name"], metrics.subject_type,
+                 metrics.theory_total, metrics.lab_total, metrics.eligible, metrics.reason)
+                for student in students for subject in student["subjects"]
+                for metrics in (subject_metrics(subject),)]
+        return [ReportTable("d", "Exam eligibility",
+                            ("usn", "name", "subject_code", "subject_name", "subject_type",
+                             "theory_total", "lab_total", "eligible", "reason"), rows)]
+    if letter == "h":
+        rows = [(rank, stud["usn"], stud["name"], stud["average"], stud["grade"], stud["total_marks"],
+                 stud["subjects"] * MAX_THEORY_MARKS) for rank, stud in enumerate(analysis.class_toppers.items(), 1)]
+        return [ReportTable("h", "Class toppers",
+                            ("rank", "usn", "name", "average", "grade", "total_marks", "max_marks"), rows)]
+    if letter == "i":
+        rows = [(fail_count, entry["usn"], entry["name"])
+                for fail_count in sorted(fail_distribution) for entry in fail_distribution[fail_count]]
+        return [ReportTable("i", "Failure distribution", ("failed_subjects", "usn", "name"), rows)]
+    if letter == "j":
+        total = len(students)
+        passed, failed = all_subjects_pass_fail["passed_all"], all_subjects_pass_fail["failed_any"]
+        return [ReportTable("j", "Overall pass/fail",
+                            ("total_students", "passed_all", "failed_any", "success_rate"),
+                            [(total, passed, failed, passed / total * 100 if total else 0)])]
+    if letter == "l":
+        return [ReportTable("l", "Fee payment status", ("name", "balance", "status", "mentor"),
+                            [(name, balance, "PENDING" if balance > 0 else "PAID", mentor)
+                             for name, balance, mentor in fee_rows(analysis)])]
+    if letter == "u":
+        return [ReportTable("u", f"Outstanding fees by {group_by}", (group_by, "students", "outstanding"),
+                            analysis.fees.outstanding_by(group_by))
+                for group_by in ("mentor", "branch")]
+    if letter == "z":
+        return [ReportTable("z", "Fee payment alerts", ("name", "usn", "mentor", "balance"),
+                            list(analysis.fee_alerts.values()))]
+    if letter == "m":
+        rows = [(branch, name) for branch, names in analysis.branch_distribution.items() for name in names]
+        return [ReportTable("m", "Student branches", ("branch", "name"), rows)]
+    if letter == "p":
+        return [ReportTable("p", "Student details",
+                            ("usn", "name", "branch", "mentor", "fee_balance", "subject_code", "subject_name",
+                             "subject_type", "best_two", "ia_average", "assignment", "external",
+                             "theory_total", "percentage", "grade", "lab_total", "eligible", "reason"),
+                            list(_student_detail_rows(usns)))]
+    if letter == "t":
+        tables = []
+        for group_by in ("branch", "mentor"):
+            board = rank_students(group_by, 10)
+            rows = [(group, rank, stud["usn"], stud["name"], stud["average"], stud["grade"])
+                    for group, top in board.groups.items() for rank, stud in enumerate(top.items(), 1)]
+            tables.append(ReportTable("t", f"Top 10 per {group_by}",
+                                      (group_by, "rank", "usn", "name", "average", "grade"), rows))
+        return tables
+    return []
+
+def _text_cell(value):
+    if isinstance(value, bool):
+        return "YES" if value else "NO"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+class ReportSink:
+    """Formats ReportTables onto a text stream, writing in large chunks"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def begin(self):
+        pass
+    
+    def write_table(self, table):
+        raise NotImplementedError
+    
+    def end(self):
+        pass
+    
+    def _write_lines(self, lines):
+        """Join and write lines RENDER_ROWS_PER_WRITE at a time"""
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= RENDER_ROWS_PER_WRITE:
+                self.stream.write("".join(chunk))
+                chunk = []
+        if chunk:
+            self.stream.write("".join(chunk))
+
+class TextSink(ReportSink):
+    """Plain fixed-width text tables"""
+    
+    def write_table(self, table):
+        cells = [[_text_cell(value) for value in row] for row in table.rows]
+        widths = [len(column) for column in table.columns]
+        for row in cells:
+            for i, cell in enumerate(row):
+                if len(cell) > widths[i]:
+                    widths[i] = len(cell)
+        line_format = " ".join(f"{{:{width}}}" for width in widths) + "\n"
+        
+        header = [f"\n{table.report}) {table.title}\n", line_format.format(*table.columns),
+                  "-" * (sum(widths) + len(widths) - 1) + "\n"]
+        self._write_lines(header + [line_format.format(*row) for row in cells])
+
+class CsvSink(ReportSink):
+    """CSV sections: a '# report) title' line, the header row, then the rows"""
+    
+    def write_table(self, table):
+        self.stream.write(f"# {table.report}) {table.title}\n")
+        writer = csv.writer(self.stream, lineterminator="\n")
+        writer.writerow(table.columns)
+        rows = table.rows
+        for start in range(0, len(rows), RENDER_ROWS_PER_WRITE):
+            writer.writerows(rows[start:start + RENDER_ROWS_PER_WRITE])
+        self.stream.write("\n")
+
+class JsonLinesSink(ReportSink):
+    """One JSON object per row, tagged with its report letter and title"""
+    
+    def write_table(self, table):
+        dumps = json.dumps
+        self._write_lines(dumps(dict(zip(table.columns, row), report=table.report, title=table.title),
+                                ensure_ascii=False) + "\n"
+                          for row in table.rows)
+
+class HtmlSink(ReportSink):
+    """A standalone HTML page with one <table> per report"""
+    
+    def begin(self):
+        self.stream.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                          "<title>Student Management System Reports</title></head><body>\n")
+    
+    def write_table(self, table):
+        escape = html.escape
+        header = ("<table border=\"1\">\n<caption>" + escape(f"{table.report}) {table.title}") + "</caption>\n<tr>"
+                  + "".join(f"<th>{escape(column)}</th>" for column in table.columns) + "</tr>\n")
+        rows = ("<tr>" + "".join(f"<td>{escape(_text_cell(value))}</td>" for value in row) + "</tr>\n"
+                for row in table.rows)
+        self._write_lines([header])
+        self._write_lines(rows)
+        self.stream.write("</table>\n")
+    
+    def end(self):
+        self.stream.write("</body></html>\n")
+
+REPORT_SINKS = {
+    "text": TextSink,
+    "csv": CsvSink,
+    "jsonl": JsonLinesSink,
+    "html": HtmlSink,
+}
+
+def open_report_stream(output):
+    """Buffered text stream for a path, or a large-buffered wrapper around stdout"""
+    if output and output != "-":
+        return open(output, "w", encoding="utf-8", newline="", buffering=RENDER_BUFFER)
+    return io.TextIOWrapper(io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "w", closefd=False),
+                                              buffer_size=RENDER_BUFFER),
+                            encoding="utf-8", newline="")
+
+def render_reports(letters, analysis, sink, usns=()):
+    """Build every chosen report's tables, then render them; returns (compute, render) seconds"""
+    started = time.perf_counter()
+    tables = []
+    for letter in letters:
+        with instruments.phase(f"report_{letter}"):
+            tables.extend(build_report_tables(letter, analysis, usns))
+    computed = time.perf_counter()
+    
+    with instruments.phase("render"):
+        sink.begin()
+        for table in tables:
+            sink.write_table(table)
+        sink.end()
+        sink.stream.flush()
+    return computed - started, time.perf_counter() - computed
+
+# ---------------- BATCH REPORTS ----------------
+# Report letters in the order option "x" prints them
+ALL_REPORTS = "abcdfghijklmno"
+MENU_REPORTS = ALL_REPORTS + "ezstu"   # Single-letter menu choices handled by run_reports
+DB_REPORTS = "fgijkno"                 # Reports SQLiteCohort.analyze() can answer ("x" with --db)
+
+def expand_report_letters(letters):
+    """Normalize a letter string: expand x, treat d/e as one report, drop repeats"""
+    result = []
+    for letter in letters.lower():
+        letter = "d" if letter == "e" else letter
+        for item in (ALL_REPORTS if letter == "x" else letter):
+            if item not in result:
+                result.append(item)
+    return result
+
+def run_report(letter, analysis, usns=()):
+    """Print one report from an already computed CohortAnalysis"""
+    subject_stats = analysis.subject_stats
+    if letter == "a":
+        check_college_affiliation(analysis)
+    elif letter == "b":
+        display_best_two_ia_marks()
+    elif letter == "c":
+        display_subject_types(analysis)
+    elif letter == "d":
+        check_exam_eligibility()
+    elif letter == "f":
+        display_pass_fail_per_subject(subject_stats)
+    elif letter == "g":
+        display_top_toppers_per_subject(subject_stats)
+    elif letter == "h":
+        display_top_class_toppers(analysis)
+    elif letter == "i":
+        display_failure_distribution(analysis.fail_distribution)
+    elif letter == "j":
+        display_overall_pass_fail(analysis.all_subjects_pass_fail)
+    elif letter == "k":
+        display_grade_distribution(subject_stats, analysis)
+    elif letter == "l":
+        check_fee_payment(analysis)
+    elif letter == "z":
+        display_check_fee_alert(analysis)
+    elif letter == "u":
+        display_outstanding_fees(analysis)
+    elif letter == "m":
+        display_student_branches(analysis)
+    elif letter == "n":
+        display_ia_absentees(subject_stats)
+    elif letter == "o":
+        display_assignment_status(subject_stats)
+    elif letter == "p":
+        for usn in usns:
+            student = students.find(usn)
+            if student is None:
+                print(f"\n❌ No student found with USN: {usn}")
             else:
-                print(f"Fee Status    : FULLY PAID")
-            
-            print(f"\nSUBJECT PERFORMANCE:")
-            print("-" * 80)
-            
-            for i, subject in enumerate(student["subjects"], 1):
-                sub_type = check_subject_type(subject)
-                eligible_status, reason = is_eligible_for_exam(subject)
-                
-                theory_total, avg_ia, best_two = calculate_theory_total(subject)
-                grade, percentage = calculate_grade(theory_total, MAX_THEORY_MARKS)
-                lab_total = calculate_lab_total(subject)
-                
-                print(f"\n{i}. {subject['name']} ({subject['code']}) - {sub_type}")
-                print(f"   Best 2 IA marks: {best_two} | Average: {avg_ia:.1f}")
-                print(f"   Assignment: {subject['assignment']}/10 | External: {subject['external']}/40")
-                print(f"   Theory Total: {theory_total}/130 ({percentage:.1f}%) - Grade: {grade}")
-                
-                if lab_total > 0:
-                    print(f"   Lab IA: {subject.get('lab_ia', 0)}/50")
-                    print(f"   Continuous Eval: {subject.get('continuous_eval', 0)}/50")
-                    print(f"   Lab Total: {lab_total}/100 ({lab_total}%)")
-                
-                print(f"   Eligibility: {'✅ ELIGIBLE' if eligible_status else '❌ NOT ELIGIBLE'}")
-                if not eligible_status:
-                    print(f"   Reason: {reason}")
-            
-            print("\n" + "=" * 80)
-            break
+                display_student_details(student)
+    elif letter == "s":
+        display_score_distribution(analysis.subject_stats)
+    elif letter == "t":
+        display_group_toppers("branch")
+        display_group_toppers("mentor")
+    else:
+        print(f"❌ Unknown report letter: {letter}")
+
+def run_reports(letters, analysis, usns=()):
+    """Print the chosen reports, timing each as its own phase"""
+    for letter in letters:
+        with instruments.phase(f"report_{letter}"):
+            run_report(letter, analysis, usns)
+
+def run_batch(file_path, letters, usns=(), output_format="console", output=None, show_timings=False,
+              low_memory=False, workers=1, payments=(), alert_transport=None):
+    """Load, analyze and write the chosen reports without any prompts; returns an exit code.
     
-    if not found:
-        print(f"\n❌ No student found with USN: {usn}")
+    "console" prints the interactive-style reports; the other formats go
+    through a ReportSink to output (a path, or stdout when None). Lookups
+    alone (report p) read only the requested students via the offset index.
+    payments, (USN, amount) pairs, are recorded after the analysis. With an
+    alert_transport the fee alerts are queued in the data file's outbox and
+    delivered in the background while the reports are written."""
+    letters = expand_report_letters(letters)
+    if letters == ["p"] and not payments and alert_transport is None and os.path.exists(file_path):
+        with instruments.phase("load"):
+            cohort = LazyCohort(file_path)
+        try:
+            with using_store(cohort):
+                write_reports(letters, CohortAnalysis(), usns, output_format, output)
+        finally:
+            cohort.close()
+        return 0
+    
+    # Keep stdout clean for machine-readable formats
+    with contextlib.redirect_stdout(sys.stdout if output_format == "console" else sys.stderr), \
+            instruments.phase("load"):
+        loaded = load_cohort(file_path, workers)
+    if not loaded or not students:
+        print("Failed to read student data.", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    with instruments.phase("analyze"):
+        analysis = analyze_students(low_memory, workers)
+    if payments:
+        with instruments.phase("payments"):
+            unknown = apply_payments(analysis, payments)
+        print(f"Recorded {analysis.fees.payments} payment(s) (₹{analysis.fees.collected:,})", file=sys.stderr)
+        for usn in unknown:
+            print(f"WARNING: payment for unknown USN '{usn}' skipped", file=sys.stderr)
+    delivery = None
+    if alert_transport is not None:
+        digests, queued = queue_alerts(analysis, outbox_path(file_path))
+        print(f"Queued {queued} new alert digest(s) of {digests} mentor(s)", file=sys.stderr)
+        delivery = AlertDelivery(outbox_path(file_path), alert_transport)
+        delivery.start()
+    analyzed = time.perf_counter()
+    compute_seconds, render_seconds = write_reports(letters, analysis, usns, output_format, output)
+    if delivery is not None:
+        with instruments.phase("alerts"):
+            delivery.join()
+        if delivery.error is not None:
+            print(f"ERROR: Alert delivery stopped: {delivery.error}", file=sys.stderr)
+            return 1
+        dispatcher = delivery.dispatcher
+        print(f"Alerts: {dispatcher.sent} sent, {dispatcher.retried} retried, {dispatcher.failed} failed",
+              file=sys.stderr)
+    
+    if show_timings:
+        print(f"analyze: {analyzed - started:.3f}s", file=sys.stderr)
+        if compute_seconds is not None:
+            print(f"reports: {compute_seconds:.3f}s", file=sys.stderr)
+        print(f"render:  {render_seconds:.3f}s", file=sys.stderr)
+    return 0
+
+def run_db_reports(file_path, db_path, letters, output_format="console", output=None):
+    """Write reports from an SQLite database built from file_path; returns an exit code.
+    
+    The database is rebuilt only when the file or the grading policy changed.
+    Only DB_REPORTS are computed in SQL, and "x" stands for all of them."""
+    letters = expand_report_letters(letters.lower().replace("x", DB_REPORTS))
+    unsupported = [letter for letter in letters if letter not in DB_REPORTS]
+    if unsupported:
+        print(f"ERROR: --db answers only reports {DB_REPORTS}, not {''.join(unsupported)}", file=sys.stderr)
+        return 1
+    if not os.path.exists(file_path):
+        print(f"ERROR: File '{file_path}' not found", file=sys.stderr)
+        return 1
+    try:
+        cohort = SQLiteCohort(db_path)
+    except sqlite3.Error as e:
+        print(f"ERROR: Cannot open database '{db_path}': {e}", file=sys.stderr)
+        return 1
+    try:
+        with contextlib.redirect_stdout(sys.stdout if output_format == "console" else sys.stderr), \
+                instruments.phase("load"):
+            loaded = cohort.load_file(file_path)
+        if not loaded or not len(cohort):
+            print("Failed to read student data.", file=sys.stderr)
+            return 1
+        with instruments.phase("analyze"):
+            analysis = cohort.analyze()
+        # Reports j and o read the student count through len(students)
+        with using_store(cohort):
+            write_reports(letters, analysis, (), output_format, output)
+    except sqlite3.Error as e:
+        print(f"ERROR: Database '{db_path}': {e}", file=sys.stderr)
+        return 1
+    finally:
+        cohort.close()
+    return 0
+
+def run_usn_lookup(file_path, usn_file):
+    """Print a one-line summary for every USN listed in usn_file; returns an exit code.
+    
+    Only the listed students are parsed, found through the offset index."""
+    if not os.path.exists(file_path):
+        print(f"ERROR: File '{file_path}' not found", file=sys.stderr)
+        return 1
+    try:
+        usns = list(read_usn_file(usn_file))
+    except OSError as e:
+        print(f"ERROR: Cannot read USN file: {e}", file=sys.stderr)
+        return 1
+    with instruments.phase("load"):
+        cohort = LazyCohort(file_path)
+    try:
+        with using_store(cohort), instruments.phase("lookup"):
+            display_batch_usn_lookup(usns)
+    finally:
+        cohort.close()
+    return 0
+
+def write_reports(letters, analysis, usns, output_format="console", output=None):
+    """Write reports to output (a path, or stdout when None); returns (compute, render) seconds"""
+    started = time.perf_counter()
+    stream = open_report_stream(output)
+    try:
+        if output_format == "console":
+            saved_stdout, sys.stdout = sys.stdout, stream
+            try:
+                run_reports(letters, analysis, usns)
+            finally:
+                sys.stdout = saved_stdout
+            stream.flush()
+            return None, time.perf_counter() - started
+        return render_reports(letters, analysis, REPORT_SINKS[output_format](stream), usns)
+    finally:
+        if output and output != "-":
+            stream.close()
+        else:
+            stream.detach()
+
+def run_sweep(file_path, baseline, policies, output_format="console", output=None):
+    """Load a cohort and report the outcome of each grading policy; returns an exit code.
+    
+    The baseline policy comes first, so the changes are against it. The
+    policies are passed to the sweep; the active grading policy is not touched."""
+    with contextlib.redirect_stdout(sys.stdout if output_format == "console" else sys.stderr), \
+            instruments.phase("load"):
+        loaded = load_cohort(file_path)
+    if not loaded or not students:
+        print("Failed to read student data.", file=sys.stderr)
+        return 1
+    with instruments.phase("sweep"):
+        outcomes = sweep_policies([baseline] + list(policies))
+    
+    if output_format == "console":
+        display_policy_sweep(outcomes)
+        return 0
+    stream = open_report_stream(output)
+    try:
+        sink = REPORT_SINKS[output_format](stream)
+        sink.begin()
+        sink.write_table(policy_sweep_table(outcomes))
+        sink.end()
+        stream.flush()
+    finally:
+        if output and output != "-":
+            stream.close()
+        else:
+            stream.detach()
+    return 0
+
+def run_history(args):
+    """Add a semester to the history store and/or answer queries across it; returns an exit code"""
+    history = SemesterHistory(args.history)
+    try:
+        if args.add_semester:
+            try:
+                with instruments.phase("add_semester"):
+                    summary = history.add(args.add_semester, args.file)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+                return 1
+            print(f"✅ Added semester {args.add_semester} from {args.file}: {summary.student_count} students, "
+                  f"class average {summary.class_average:.2f}%")
+        with instruments.phase("history"):
+            if args.trajectory:
+                display_trajectory(history, args.trajectory.strip().upper())
+            if args.trends:
+                display_pass_rate_trends(history)
+            if args.repeat_failures:
+                display_repeat_failures(history)
+    finally:
+        history.close()
+    return 0
+
+# ---------------- MENTOR ALERTS ----------------
+# Pending-fee alerts are coalesced into one digest per mentor, queued in an
+# SQLite outbox next to the data file and delivered by async workers. A
+# digest's key hashes its content, so queueing the same alerts again (a rerun
+# of the same day) sends nothing new.
+MENTOR_EMAIL_DOMAIN = "college.example"   # Mentor addresses are <name>@ this domain
+ALERT_SENDER = f"accounts@{MENTOR_EMAIL_DOMAIN}"
+ALERT_WORKERS = 8
+ALERT_RATE_PER_SECOND = 20.0    # Deliveries started per second, over all workers
+ALERT_MAX_ATTEMPTS = 5
+ALERT_RETRY_DELAY = 2.0         # Seconds before the first retry; doubles on each further one
+
+AlertDigest = namedtuple("AlertDigest", ["key", "mentor", "subject", "body", "attempts"])
+
+def mentor_address(mentor):
+    """Mail address of a mentor: 'Dr. Anil Kumar' -> dr.anil.kumar@MENTOR_EMAIL_DOMAIN"""
+    local = ".".join(re.findall(r"[a-z0-9]+", mentor.lower())) or "mentor"
+    return f"{local}@{MENTOR_EMAIL_DOMAIN}"
+
+def alert_digests(fee_alerts, day=None):
+    """One AlertDigest per mentor (in first-seen order) from (name, usn, mentor, balance) alerts.
+    
+    The key covers the day (default: today) and the content, so a mentor
+    gets a digest at most once a day unless their students' balances change."""
+    day = day or time.strftime("%Y-%m-%d")
+    by_mentor = {}
+    for name, usn, mentor, balance in fee_alerts:
+        by_mentor.setdefault(mentor, []).append((usn, name, balance))
+    digests = []
+    for mentor, rows in by_mentor.items():
+        rows.sort()
+        total = sum(balance for _, _, balance in rows)
+        lines = [f"Dear {mentor},", "",
+                 f"{len(rows)} student(s) you mentor have fees pending. Please meet them.", ""]
+        lines.extend(f"  {usn:15} {name:25} Rs. {balance:>10,}" for usn, name, balance in rows)
+        lines.extend(["", f"Total pending: Rs. {total:,}", "", "Accounts Office"])
+        key = hashlib.sha256(json.dumps([day, mentor, rows]).encode("utf-8")).hexdigest()[:32]
+        digests.append(AlertDigest(key, mentor, f"Fee alert: {len(rows)} student(s) with fees pending",
+                                   "\n".join(lines) + "\n", 0))
+    return digests
+
+def alert_message(digest):
+    """The digest as an email, addressed to its mentor"""
+    message = EmailMessage()
+    message["From"] = ALERT_SENDER
+    message["To"] = mentor_address(digest.mentor)
+    message["Subject"] = digest.subject
+    message["Message-ID"] = f"<{digest.key}@{MENTOR_EMAIL_DOMAIN}>"
+    message["X-Idempotency-Key"] = digest.key
+    message.set_content(digest.body)
+    return message
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,           -- Idempotency key: a digest is queued (and sent) once
+    mentor TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending, sent or failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    queued REAL NOT NULL,
+    sent REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, next_attempt);
+"""
+
+def outbox_path(filepath):
+    return filepath + ".outbox"
+
+class AlertOutbox:
+    """Persistent queue of alert digests in an SQLite file.
+    
+    Every state change is committed at once, so after a crash the pending
+    rows (with their attempt counts) are picked up by the next delivery."""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(OUTBOX_SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def enqueue(self, digests):
+        """Queue digests whose key is new; returns how many were queued"""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO outbox (key, mentor, subject, body, queued) VALUES (?, ?, ?, ?, ?)",
+                ((digest.key, digest.mentor, digest.subject, digest.body, time.time()) for digest in digests))
+            return self.conn.total_changes - before
+    
+    def pending(self):
+        """[(AlertDigest, next attempt time)] of every undelivered digest, oldest first"""
+        return [(AlertDigest(key, mentor, subject, body, attempts), next_attempt)
+                for key, mentor, subject, body, attempts, next_attempt in self.conn.execute(
+                    "SELECT key, mentor, subject, body, attempts, next_attempt FROM outbox "
+                    "WHERE status = 'pending' ORDER BY queued, rowid")]
+    
+    def mark_sent(self, key, attempts):
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'sent', attempts = ?, sent = ? WHERE key = ?",
+                              (attempts, time.time(), key))
+    
+    def mark_retry(self, key, attempts, error, next_attempt):
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET attempts = ?, last_error = ?, next_attempt = ? WHERE key = ?",
+                              (attempts, error, next_attempt, key))
+    
+    def mark_failed(self, key, attempts, error):
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE key = ?",
+                              (attempts, error, key))
+    
+    def counts(self):
+        """{status: digests}"""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+class FileTransport:
+    """Writes each digest as <key>.eml in a directory (a stand-in for mail in tests and dry runs)"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def send(self, digest):
+        target = os.path.join(self.directory, f"{digest.key}.eml")
+        temp = target + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(bytes(alert_message(digest)))
+        os.replace(temp, target)  # Same key, same file: a resend changes nothing
+
+class SmtpTransport:
+    """Sends each digest through an SMTP server, one connection per message"""
+    
+    def __init__(self, host="localhost", port=25, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+    
+    def send(self, digest):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(alert_message(digest))
+
+ALERT_TRANSPORTS = {
+    "file": FileTransport,
+    "smtp": SmtpTransport,
+}
+
+def open_transport(spec):
+    """Transport for 'file:DIR' or 'smtp:HOST[:PORT]'"""
+    kind, _, target = spec.partition(":")
+    if kind == "file":
+        return FileTransport(target or "mentor_alerts")
+    if kind == "smtp":
+        host, _, port = target.partition(":")
+        return SmtpTransport(host or "localhost", int(port or 25))
+    raise ValueError(f"unknown alert transport '{spec}' (use file:DIR or smtp:HOST[:PORT])")
+
+class RateLimiter:
+    """Token bucket shared by the workers of one event loop"""
+    
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AlertDispatcher:
+    """Delivers an outbox's pending digests with a pool of async workers.
+    
+    Transports are plain blocking callables run in the loop's thread pool;
+    the workers share one rate limit. A failed delivery is retried with
+    exponential backoff up to max_attempts, then marked failed."""
+    
+    def __init__(self, outbox, transport, workers=ALERT_WORKERS, rate=ALERT_RATE_PER_SECOND,
+                 max_attempts=ALERT_MAX_ATTEMPTS, retry_delay=ALERT_RETRY_DELAY):
+        self.outbox = outbox
+        self.transport = transport
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sent = self.retried = self.failed = 0
+    
+    async def run(self):
+        """Deliver until every pending digest is sent or has failed; returns (sent, failed)"""
+        loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue()
+        self.remaining = 0
+        self.finished = asyncio.Event()
+        now = time.time()
+        for digest, next_attempt in self.outbox.pending():
+            self.remaining += 1
+            loop.call_later(max(0.0, next_attempt - now), self.queue.put_nowait, digest)
+        if self.remaining:
+            workers = [loop.create_task(self._worker()) for _ in range(self.workers)]
+            await self.finished.wait()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.sent, self.failed
+    
+    async def _worker(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            digest = await self.queue.get()
+            await self.limiter.acquire()
+            attempts = digest.attempts + 1
+            try:
+                await loop.run_in_executor(None, self.transport.send, digest)
+            except (OSError, ValueError) as e:  # smtplib errors are OSErrors
+                error = f"{type(e).__name__}: {e}"
+                if attempts >= self.max_attempts:
+                    self.outbox.mark_failed(digest.key, attempts, error)
+                    self.failed += 1
+                    self._done()
+                else:
+                    delay = self.retry_delay * 2 ** (attempts - 1)
+                    self.outbox.mark_retry(digest.key, attempts, error, time.time() + delay)
+                    self.retried += 1
+                    loop.call_later(delay, self.queue.put_nowait, digest._replace(attempts=attempts))
+            else:
+                self.outbox.mark_sent(digest.key, attempts)
+                self.sent += 1
+                self._done()
+    
+    def _done(self):
+        self.remaining -= 1
+        if not self.remaining:
+            self.finished.set()
+
+def deliver_alerts(db_path, transport, **options):
+    """Deliver an outbox's pending digests on a fresh event loop; returns the AlertDispatcher"""
+    outbox = AlertOutbox(db_path)
+    loop = asyncio.new_event_loop()
+    try:
+        dispatcher = AlertDispatcher(outbox, transport, **options)
+        loop.run_until_complete(dispatcher.run())
+        return dispatcher
+    finally:
+        loop.close()
+        outbox.close()
+
+class AlertDelivery(threading.Thread):
+    """deliver_alerts in a background thread, so reports can be written meanwhile"""
+    
+    def __init__(self, db_path, transport, **options):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.transport = transport
+        self.options = options
+        self.dispatcher = None
+        self.error = None
+    
+    def run(self):
+        try:
+            self.dispatcher = deliver_alerts(self.db_path, self.transport, **self.options)
+        except (OSError, sqlite3.Error) as e:
+            self.error = e
+
+def queue_alerts(analysis, db_path):
+    """Queue per-mentor digests of the analysis's fee alerts; returns (digests, newly queued)"""
+    digests = alert_digests(analysis.fee_alerts.values())
+    outbox = AlertOutbox(db_path)
+    try:
+        return len(digests), outbox.enqueue(digests)
+    finally:
+        outbox.close()
+
+# ---------------- QUERY SERVICE ----------------
+# Long-running HTTP/JSON service: load once, answer reads from prebuilt response bodies.
+SERVICE_ROUTES = {      # Path -> report letter whose tables make up the response
+    "/subjects": "f",
+    "/toppers/subjects": "g",
+    "/toppers": "h",
+    "/grades": "k",
+    "/fees": "l",
+    "/fees/alerts": "z",
+    "/fees/outstanding": "u",
+    "/branches": "m",
+    "/absentees": "n",
+    "/assignments": "o",
+    "/distributions": "s",
+}
+SERVICE_RELOAD_INTERVAL = 2.0
+SERVICE_MAX_HEADER_LINES = 100
+
+def table_records(table):
+    return [dict(zip(table.columns, row)) for row in table.rows]
+
+def json_body(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def http_response(status, body, keep_alive=True, content_type="application/json"):
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+    head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+class QueryService:
+    """Answers GET requests from responses rendered once per (re)load.
+    
+    Fixed routes are encoded up front; /students/<USN> bodies are built on
+    first request and kept until the next reload."""
+    
+    def __init__(self, session):
+        self.session = session
+        self.responses = {}
+        self.student_responses = {}
+        self.requests = 0
+        self.rebuild()
+    
+    def rebuild(self):
+        analysis = self.session.analysis
+        responses = {"/health": json_body({"status": "ok", "students": len(students),
+                                            "file": self.session.filepath})}
+        for path, letter in SERVICE_ROUTES.items():
+            tables = build_report_tables(letter, analysis)
+            payload = {table.title: table_records(table) for table in tables}
+            responses[path] = json_body(payload)
+        j = analysis.all_subjects_pass_fail
+        responses["/summary"] = json_body({"students": len(students), "passed_all": j["passed_all"],
+                                           "failed_any": j["failed_any"], "class_average": analysis.class_average})
+        self.responses = {path: http_response(200, body) for path, body in responses.items()}
+        self.student_responses = {}
+    
+    def student_response(self, usn):
+        response = self.student_responses.get(usn)
+        if response is None:
+            table = build_report_tables("p", self.session.analysis, [usn])[0]
+            if not table.rows:
+                return http_response(404, json_body({"error": f"no student with USN {usn}"}))
+            first = table.rows[0]
+            payload = {"usn": first[0], "name": first[1], "branch": first[2], "mentor": first[3],
+                       "fee_balance": first[4],
+                       "subjects": [dict(zip(table.columns[5:], row[5:])) for row in table.rows]}
+            response = self.student_responses[usn] = http_response(200, json_body(payload))
+        return response
+    
+    def respond(self, method, path):
+        """Full HTTP response bytes for one request"""
+        self.requests += 1
+        if method != "GET":
+            return http_response(405, json_body({"error": "only GET is supported"}))
+        path, _, query = path.partition("?")
+        path = path.rstrip("/") or "/"
+        response = self.responses.get(path)
+        if response is not None:
+            return response
+        if path.startswith("/students/"):
+            return self.student_response(path[len("/students/"):].upper())
+        if path == "/metrics":
+            if query == "format=json":
+                return http_response(200, json_body(instruments.summary()))
+            return http_response(200, instruments.prometheus_text().encode("utf-8"), content_type="text/plain")
+        return http_response(404, json_body({"error": f"unknown path {path}",
+                                             "paths": sorted(self.responses) + ["/metrics", "/students/<USN>"]}))
+    
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1"
+                for _ in range(SERVICE_MAX_HEADER_LINES):
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection":
+                        value = value.strip().lower()
+                        keep_alive = value == "keep-alive" or (keep_alive and value != "close")
+                if len(parts) != 3:
+                    writer.write(http_response(400, json_body({"error": "malformed request line"}), False))
+                    break
+                writer.write(self.respond(parts[0], parts[1]))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def watch(self, interval=SERVICE_RELOAD_INTERVAL):
+        """Reload changed students from the data file and re-render the responses"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.session.changed_on_disk():
+                with instruments.phase("reload"):
+                    self.session.reload()
+                    self.rebuild()
+
+def run_service(file_path, host="127.0.0.1", port=8080):
+    """Load the cohort once and serve JSON queries until Ctrl+C or SIGTERM; returns an exit code"""
+    session = IncrementalSession(file_path)
+    if not session.load() or not students:
+        print("Failed to read student data.", file=sys.stderr)
+        return 1
+    instruments.enable()
+    service = QueryService(session)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(asyncio.start_server(service.handle, host, port, backlog=1024))
+    watcher = loop.create_task(service.watch())
+    try:
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    except (NotImplementedError, AttributeError):
+        pass  # No loop signal handlers on Windows; Ctrl+C still works
+    print(f"🌐 Serving {len(students)} students from '{file_path}' on http://{host}:{port}/")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.cancel()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+    print(f"\n✅ Served {service.requests} requests")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Student Management System")
+    parser.add_argument("-f", "--file", default="c3.txt", help="student data file (default: c3.txt)")
+    parser.add_argument("-r", "--reports",
+                        help="report letters to print without the menu, e.g. 'afk' or 'x' for all")
+    parser.add_argument("--usn", action="append", default=[], help="USN for report p (repeatable)")
+    parser.add_argument("--usn-file", help="file with one USN per line for report p "
+                                           "(without --reports: print one summary line per USN)")
+    parser.add_argument("--db", metavar="FILE",
+                        help=f"answer --reports ({DB_REPORTS}, or x for all of these) with SQL from an SQLite "
+                             "database built from --file, reused while the file and policy are unchanged")
+    parser.add_argument("--payments", metavar="CSV",
+                        help="fee payments (USN,amount rows) to apply before the --reports are written")
+    parser.add_argument("--format", default="console", choices=["console"] + sorted(REPORT_SINKS),
+                        help="output format for --reports (default: console)")
+    parser.add_argument("-o", "--output", help="write reports to this file instead of stdout")
+    parser.add_argument("--timings", action="store_true", help="print phase timings to stderr")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="analyze without the per-subject metrics cache (for very large cohorts)")
+    parser.add_argument("--federate", metavar="DIR_OR_GLOB",
+                        help="summarize every section file in a directory or glob pattern")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes for --federate (default: all cores) and for "
+                             "--reports parsing and analysis (default: 1)")
+    parser.add_argument("--send-alerts", metavar="TRANSPORT", nargs="?", const="file:mentor_alerts",
+                        help="queue one fee-alert digest per mentor and deliver it: file:DIR (default "
+                             "file:mentor_alerts) or smtp:HOST[:PORT]")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve JSON queries on this port until Ctrl+C")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    parser.add_argument("--policies", metavar="FILE", help="grading policies (JSON) for --policy and --sweep")
+    parser.add_argument("--policy", metavar="NAME", help="grade with this policy from --policies instead of the default")
+    parser.add_argument("--sweep", action="store_true",
+                        help="report pass rates and grades under every policy in --policies, then exit")
+    parser.add_argument("--history", metavar="DIR", default="history",
+                        help="semester history directory for the options below (default: history)")
+    parser.add_argument("--add-semester", metavar="NAME",
+                        help="analyze --file and add it to the history as this semester (e.g. 2024-1)")
+    parser.add_argument("--trajectory", metavar="USN", help="print a student's results in every stored semester")
+    parser.add_argument("--trends", action="store_true", help="print subject pass rates per stored semester")
+    parser.add_argument("--repeat-failures", action="store_true",
+                        help="list students who failed subjects in more than one stored semester")
+    parser.add_argument("--metrics-json", metavar="FILE", help="write phase timings and counters as JSON on exit")
+    parser.add_argument("--metrics-prom", metavar="FILE",
+                        help="write phase timings and counters in Prometheus text format on exit")
+    return parser.parse_args(argv)
 
 # ---------------- MAIN MENU ----------------
 def display_main_menu():
@@ -872,6 +4815,12 @@ def display_main_menu():
     print("n) IA absentee analysis")
     print("o) Assignment submission status")
     print("p) Search student by USN")
+    print("v) Look up every USN listed in a file")
+    print("w) Reports f-o computed in SQLite")
+    print("s) Score distribution per subject (mean, percentiles, histogram)")
+    print("t) Top 10 toppers per branch and per mentor")
+    print("u) Outstanding fees by mentor and branch")
+    print("r) Reload data file (re-reads only changed students)")
     print("x) Display ALL reports")
     print("q) Exit")
     print("=" * 80)
@@ -879,11 +4828,80 @@ def display_main_menu():
     return input("\nEnter your choice (a-p, x, q): ").strip().lower()
 
 # ---------------- MAIN PROGRAM ----------------
-def main():
+def main(argv=None):
     """Main program function"""
+    args = parse_args(argv)
+    if args.metrics_json or args.metrics_prom:
+        instruments.enable()
+    try:
+        return run_program(args)
+    finally:
+        instruments.export(args.metrics_json, args.metrics_prom)
+
+def run_program(args):
+    """Run the mode chosen on the command line; returns an exit code"""
+    file_path = args.file
+    
+    policies = []
+    if args.policies:
+        try:
+            policies = load_policies(args.policies)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"ERROR: Cannot read grading policies: {e}", file=sys.stderr)
+            return 1
+    policy = DEFAULT_POLICY
+    if args.policy:
+        chosen = [policy for policy in policies if policy.name == args.policy]
+        if not chosen:
+            print(f"ERROR: No grading policy named '{args.policy}' (use --policies FILE)", file=sys.stderr)
+            return 1
+        policy = chosen[0]
+    if args.sweep:
+        if not policies:
+            print("ERROR: --sweep needs a --policies FILE", file=sys.stderr)
+            return 1
+        return run_sweep(file_path, policy, policies, args.format, args.output)
+    if policy is not DEFAULT_POLICY:
+        try:
+            set_grading_policy(policy)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+    
+    if args.add_semester or args.trajectory or args.trends or args.repeat_failures:
+        return run_history(args)
     
-    # File path - Update this with your actual file path
-    file_path = r"path/to/your/data.txt"
+    if args.federate:
+        paths = expand_section_paths(args.federate)
+        if not paths:
+            print(f"ERROR: No section files match '{args.federate}'", file=sys.stderr)
+            return 1
+        with instruments.phase("federate"):
+            federation = federate(paths, args.workers)
+        display_federation(federation)
+        return 0
+    
+    if args.serve:
+        return run_service(file_path, args.host, args.serve)
+    
+    if args.db:
+        return run_db_reports(file_path, args.db, args.reports or "x", args.format, args.output)
+    
+    if args.usn_file and not (args.reports or args.send_alerts):
+        return run_usn_lookup(file_path, args.usn_file)
+    
+    if args.reports or args.send_alerts:
+        usns = [usn.strip().upper() for usn in args.usn]
+        if args.usn_file:
+            usns.extend(read_usn_file(args.usn_file))
+        payments = list(read_payments(args.payments)) if args.payments else ()
+        try:
+            transport = open_transport(args.send_alerts) if args.send_alerts else None
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        return run_batch(file_path, args.reports or "", usns, args.format, args.output, args.timings,
+                         args.low_memory, args.workers or 1, payments, transport)
     
     print("=" * 80)
     print("STUDENT MANAGEMENT SYSTEM - COMPLETE SOLUTION".center(80))
@@ -891,80 +4909,54 @@ def main():
     
     # Read student data
     print("\n📂 Loading student data...")
-    if not read_students(file_path):
+    session = IncrementalSession(file_path)
+    if not session.load():
         print("Failed to read student data. Exiting...")
-        return
+        return 1
     
     if not students:
         print("No student data loaded. Exiting...")
-        return
+        return 1
     
     print(f"✅ Successfully loaded {len(students)} students")
     
-    # Perform analysis once
-    print("\n📊 Analyzing student data...")
-    subject_stats, fail_distribution, all_subjects_pass_fail = analyze_students()
+    # Analysis was done with the load; reloads update it in place
     print("✅ Analysis complete!")
     
+    # Pick up corrections to the data file between commands
+    watcher = FileWatcher(session)
+    watcher.start()
+    
     # Interactive menu
     while True:
         choice = display_main_menu()
         
-        if choice == "a":
-            check_college_affiliation()
-        elif choice == "b":
-            display_best_two_ia_marks()
-        elif choice == "c":
-            display_subject_types()
-        elif choice in ["d", "e"]:
-            check_exam_eligibility()
-        elif choice == "f":
-            display_pass_fail_per_subject(subject_stats)
-        elif choice == "g":
-            display_top_toppers_per_subject(subject_stats)
-        elif choice == "h":
-            display_top_class_toppers()
-        elif choice == "i":
-            display_failure_distribution(fail_distribution)
-        elif choice == "j":
-            display_overall_pass_fail(all_subjects_pass_fail)
-        elif choice == "k":
-            display_grade_distribution(subject_stats)
-        elif choice == "l":
-            check_fee_payment()
-        elif choice == "z":
-            display_check_fee_alert()
-        elif choice == "m":
-            display_student_branches()
-        elif choice == "n":
-            display_ia_absentees(subject_stats)
-        elif choice == "o":
-            display_assignment_status(subject_stats)
-        elif choice == "p":
+        if watcher.changed.is_set() or choice == "r":
+            watcher.changed.clear()
+            with instruments.phase("reload"):
+                changed, added, removed = session.reload()
+            print(f"🔄 Reloaded '{file_path}': {changed} changed, {added} added, {removed} removed")
+        
+        if choice == "p":
             search_student_by_usn()
+        elif choice == "v":
+            lookup_usn_file()
+        elif choice == "w":
+            display_sql_reports(file_path)
+        elif choice == "r":
+            pass  # Reload already done above
         elif choice == "x":
             # Display all reports in sequence
             print("\n📋 GENERATING COMPLETE REPORT...")
-            check_college_affiliation()
-            display_best_two_ia_marks()
-            display_subject_types()
-            check_exam_eligibility()
-            display_pass_fail_per_subject(subject_stats)
-            display_top_toppers_per_subject(subject_stats)
-            display_top_class_toppers()
-            display_failure_distribution(fail_distribution)
-            display_overall_pass_fail(all_subjects_pass_fail)
-            display_grade_distribution(subject_stats)
-            display_check_fee_payment()
-            display_student_branches()
-            display_ia_absentees(subject_stats)
-            display_assignment_status(subject_stats)
+            run_reports(ALL_REPORTS, session.analysis)
             print("\n✅ Complete report generated!")
         elif choice == "q":
             print("\n" + "=" * 80)
             print("Thank you for using Student Management System!".center(80))
             print("=" * 80)
             break
+        elif choice and choice in MENU_REPORTS:
+            run_reports(expand_report_letters(choice), session.analysis)
         else:
             print("❌ Invalid choice. Please enter a letter between a-p, x, or q.")
         
@@ -972,4 +4964,4 @@ def main():
 
 # ---------------- EXECUTION ----------------
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gen_cohort
+import main
+
+def read_store(filepath, workers=1):
+    """Parse a data file into a fresh CohortStore with read_students"""
+    with main.using_store(main.CohortStore()) as store, contextlib.redirect_stdout(io.StringIO()):
+        assert main.read_students(filepath, workers)
+    return store
+
+def student_rows(store):
+    return [student.to_dict() for student in store]
+
+@pytest.fixture
+def cohort_file(tmp_path):
+    """A generated 300-student data file"""
+    path = str(tmp_path / "cohort.txt")
+    gen_cohort.write_cohort(path, 300, seed=3)
+    return path
@@ -0,0 +1,112 @@
+import os
+
+import main
+
+ALERTS = [
+    ("Ravi Rao", "1AB23CS001", "Dr. Anil Kumar", 25000),
+    ("Asha Nair", "1AB23CS002", "Dr. Kavitha R", 10000),
+    ("Kiran Das", "1AB23CS003", "Dr. Anil Kumar", 5000),
+]
+
+
+def deliver(db_path, transport, **options):
+    options.setdefault("rate", 1000.0)
+    return main.deliver_alerts(db_path, transport, **options)
+
+
+class FlakyTransport:
+    """Raises OSError on the first `failures` sends, then records every digest it is given"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.sent = []
+
+    def send(self, digest):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        self.sent.append(digest)
+
+
+def test_digest_keys_depend_on_day_and_content():
+    digests = main.alert_digests(ALERTS, day="2024-08-01")
+    assert [digest.mentor for digest in digests] == ["Dr. Anil Kumar", "Dr. Kavitha R"]
+    assert main.alert_digests(ALERTS[::-1], day="2024-08-01") == digests
+    assert main.alert_digests(ALERTS, day="2024-08-02")[0].key != digests[0].key
+    changed = [ALERTS[0][:3] + (20000,)] + ALERTS[1:]
+    assert main.alert_digests(changed, day="2024-08-01")[0].key != digests[0].key
+    assert main.alert_digests(changed, day="2024-08-01")[1].key == digests[1].key
+
+
+def test_enqueueing_the_same_digests_twice_queues_them_once(tmp_path):
+    outbox = main.AlertOutbox(str(tmp_path / "alerts.outbox"))
+    try:
+        digests = main.alert_digests(ALERTS, day="2024-08-01")
+        assert outbox.enqueue(digests) == 2
+        assert outbox.enqueue(digests) == 0
+        assert outbox.counts() == {"pending": 2}
+    finally:
+        outbox.close()
+
+
+def test_redelivery_sends_nothing_twice(tmp_path):
+    db_path = str(tmp_path / "alerts.outbox")
+    transport = FlakyTransport(0)
+    outbox = main.AlertOutbox(db_path)
+    try:
+        outbox.enqueue(main.alert_digests(ALERTS, day="2024-08-01"))
+    finally:
+        outbox.close()
+    assert deliver(db_path, transport).sent == 2
+
+    outbox = main.AlertOutbox(db_path)
+    try:
+        assert outbox.enqueue(main.alert_digests(ALERTS, day="2024-08-01")) == 0
+    finally:
+        outbox.close()
+    assert deliver(db_path, transport).sent == 0
+    assert len(transport.sent) == 2
+
+
+def test_failed_sends_are_retried_then_given_up(tmp_path):
+    db_path = str(tmp_path / "alerts.outbox")
+    outbox = main.AlertOutbox(db_path)
+    try:
+        outbox.enqueue(main.alert_digests(ALERTS[:1], day="2024-08-01"))
+    finally:
+        outbox.close()
+    flaky = FlakyTransport(2)
+    dispatcher = deliver(db_path, flaky, retry_delay=0.01)
+    assert (dispatcher.sent, dispatcher.retried, dispatcher.failed) == (1, 2, 0)
+
+    db_path = str(tmp_path / "broken.outbox")
+    outbox = main.AlertOutbox(db_path)
+    try:
+        outbox.enqueue(main.alert_digests(ALERTS[:1], day="2024-08-01"))
+    finally:
+        outbox.close()
+    dispatcher = deliver(db_path, FlakyTransport(100), retry_delay=0.01, max_attempts=3)
+    assert (dispatcher.sent, dispatcher.failed) == (0, 1)
+    outbox = main.AlertOutbox(db_path)
+    try:
+        assert outbox.counts() == {"failed": 1}
+        assert outbox.pending() == []
+    finally:
+        outbox.close()
+
+
+def test_rerunning_send_alerts_writes_no_new_messages(cohort_file, tmp_path, capfd):
+    directory = str(tmp_path / "mail")
+    assert main.main(["-f", cohort_file, "--send-alerts", f"file:{directory}"]) == 0
+    first = capfd.readouterr().err
+    messages = sorted(os.listdir(directory))
+    mtimes = [os.stat(os.path.join(directory, name)).st_mtime_ns for name in messages]
+    assert messages and all(name.endswith(".eml") for name in messages)
+    assert f"Alerts: {len(messages)} sent" in first
+
+    assert main.main(["-f", cohort_file, "--send-alerts", f"file:{directory}"]) == 0
+    second = capfd.readouterr().err
+    assert "Queued 0 new alert digest(s)" in second
+    assert "Alerts: 0 sent" in second
+    assert sorted(os.listdir(directory)) == messages
+    assert [os.stat(os.path.join(directory, name)).st_mtime_ns for name in messages] == mtimes
@@ -0,0 +1,163 @@
+import contextlib
+import io
+import pickle
+import random
+
+import pytest
+
+import gen_cohort
+import main
+from conftest import read_store
+
+
+def run_main(*argv):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return main.main(list(argv))
+
+
+def analyze(store, **options):
+    with main.using_store(store):
+        return main.analyze_students(**options)
+
+
+def test_low_memory_reports_match_the_default(cohort_file, tmp_path):
+    outputs = []
+    for flags in ((), ("--low-memory",)):
+        output = str(tmp_path / f"reports{len(outputs)}.jsonl")
+        assert run_main("-f", cohort_file, "--reports", "xstuz", "--format", "jsonl", "-o", output, *flags) == 0
+        with open(output, encoding="utf-8") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+
+
+def test_chunked_analysis_matches_one_chunk(cohort_file, monkeypatch):
+    store = read_store(cohort_file)
+    whole = analyze(store)
+    monkeypatch.setattr(main, "ANALYZE_CHUNK_ROWS", 7)
+    chunked = analyze(store)
+    for code, stats in whole.subject_stats.items():
+        other = chunked.subject_stats[code]
+        assert other["grades"] == stats["grades"]
+        assert other["toppers"].items() == stats["toppers"].items()
+        assert (other["pass_count"], other["fail_count"]) == (stats["pass_count"], stats["fail_count"])
+    assert chunked.class_toppers.items() == whole.class_toppers.items()
+    assert chunked.class_average == pytest.approx(whole.class_average)
+
+
+def distribution(scores):
+    return scores.summary(), scores.histogram.counts
+
+
+def analysis_fields(analysis):
+    return {
+        "subjects": {code: (dict(stats, grades=dict(stats["grades"]), toppers=stats["toppers"].items(),
+                                 theory=distribution(stats["theory"]), lab=distribution(stats["lab"])))
+                     for code, stats in analysis.subject_stats.items()},
+        "fail_distribution": dict(analysis.fail_distribution),
+        "lists": (analysis.college_students, analysis.non_college_students, analysis.branch_distribution,
+                  analysis.grade_categories, analysis.subject_type_count, analysis.subject_details,
+                  analysis.all_subjects_pass_fail),
+        "fees": (list(analysis.fee_alerts.items()), analysis.fees.by_mentor, analysis.fees.by_branch),
+        "class": (analysis.class_toppers.items(), analysis.average_sum, analysis.average_count),
+    }
+
+
+def test_parallel_analysis_matches_serial(cohort_file, monkeypatch):
+    store = read_store(cohort_file)
+    monkeypatch.setattr(main, "ANALYZE_CHUNK_ROWS", 64)
+    monkeypatch.setattr(main, "PARALLEL_ANALYZE_MIN_ROWS", 0)
+    serial = analyze(store)
+    parallel = analyze(store, workers=2)
+    assert analysis_fields(parallel) == analysis_fields(serial)
+
+
+def test_worker_partials_carry_no_student_lists(cohort_file):
+    store = read_store(cohort_file)
+    partial = main._analyze_columns((store.row_columns(0, 100), False, main.grading_policy.policy))
+    assert len(partial.row_outcomes.failed) == len(partial.row_outcomes.highest) == 100
+    assert not (partial.college_students or partial.non_college_students or partial.fail_distribution
+                or partial.branch_distribution or partial.grade_categories or partial.fee_alerts)
+
+
+def test_subject_state_does_not_grow_with_the_cohort(tmp_path):
+    sizes = []
+    for count in (200, 2000):
+        path = str(tmp_path / f"cohort{count}.txt")
+        gen_cohort.write_cohort(path, count, seed=1)
+        analysis = analyze(read_store(path), low_memory=True)
+        sizes.append(len(pickle.dumps(dict(analysis.subject_stats))))
+    assert sizes[1] < sizes[0] * 1.5
+
+
+def test_topk_keeps_the_stable_sort_order():
+    rng = random.Random(4)
+    scores = [rng.randrange(20) for _ in range(500)]
+    top = main.TopK(5)
+    for number, score in enumerate(scores):
+        top.push(score, number)
+    expected = sorted(range(len(scores)), key=lambda number: -scores[number])[:5]
+    assert top.items() == expected
+
+    halves = main.TopK(5), main.TopK(5)
+    for number, score in enumerate(scores):
+        halves[number >= 250].push(score, number)
+    halves[0].merge(halves[1])
+    assert halves[0].items() == expected
+
+
+def test_topk_ties_keep_the_earliest_arrivals():
+    top = main.TopK(3)
+    for name, score in (("a", 5), ("b", 7), ("c", 5), ("d", 7), ("e", 5)):
+        top.push(score, name)
+    assert top.items() == ["b", "d", "a"]
+    assert not top.accepts(5) and top.accepts(6)
+    top.push(5, "f")
+    assert top.items() == ["b", "d", "a"]
+
+    later = main.TopK(3)
+    later.push(7, "g")
+    later.push(5, "h")
+    top.merge(later)
+    assert top.items() == ["b", "d", "g"]
+
+
+def test_leaderboard_ranks_each_group_separately():
+    board = main.Leaderboard(k=2)
+    for group, score, name in (("CS", 50, "a"), ("EC", 90, "b"), ("CS", 70, "c"), ("CS", 70, "d"), ("EC", 10, "e")):
+        board.push(group, score, name)
+    assert board.top("CS") == ["c", "d"]
+    assert board.top("EC") == ["b", "e"]
+    assert board.top("ME") == []
+
+
+def test_payments_match_a_fresh_analysis_of_the_paid_file(cohort_file, tmp_path):
+    store = read_store(cohort_file)
+    analysis = analyze(store)
+    pending = [student for student in store if student["fee_total"] > student["fee_paid"]]
+    assert len(pending) > 20
+    # Settle some balances in full, part-pay others, and pay twice for a few
+    payments = []
+    for number, student in enumerate(pending[:20]):
+        balance = student["fee_total"] - student["fee_paid"]
+        payments.append((student["usn"], balance if number % 2 else balance // 2))
+    payments.append((pending[0]["usn"], 1000))
+    payments.append(("NO-SUCH-USN", 500))
+    assert main.apply_payments(analysis, payments) == ["NO-SUCH-USN"]
+
+    paid = {student["usn"]: student["fee_paid"] for student in store}
+    path = str(tmp_path / "paid.txt")
+    with open(cohort_file, encoding="utf-8") as source, open(path, "w", encoding="utf-8") as target:
+        for line in source:
+            if line.startswith("USN:"):
+                usn = line.partition(":")[2].strip()
+            elif line.startswith("fee_paid:"):
+                line = f"fee_paid:{paid[usn]}\n"
+            target.write(line)
+    fresh = analyze(read_store(path))
+
+    assert analysis.fees.by_mentor == fresh.fees.by_mentor
+    assert analysis.fees.by_branch == fresh.fees.by_branch
+    assert (analysis.fees.pending_students, analysis.fees.outstanding) == \
+        (fresh.fees.pending_students, fresh.fees.outstanding)
+    assert list(analysis.fee_alerts.values()) == list(fresh.fee_alerts.values())
+    assert analysis.fees.payments == 21
@@ -0,0 +1,60 @@
+import pytest
+
+import main
+from conftest import read_store
+
+
+def split_sections(cohort_file, directory, cuts):
+    """Write the cohort's student blocks to section files, cut before the given student numbers"""
+    with open(cohort_file, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    headers = [number for number, line in enumerate(lines) if main.is_student_header(line)]
+    bounds = [0] + [headers[cut] for cut in cuts] + [len(lines)]
+    paths = []
+    for number, (start, end) in enumerate(zip(bounds, bounds[1:]), 1):
+        path = str(directory / f"section{number}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines[start:end]) + "\n")
+        paths.append(path)
+    return paths
+
+
+def without_section(performances):
+    return [{key: value for key, value in performance.items() if key != "section"}
+            for performance in performances]
+
+
+def assert_same_distribution(merged, whole):
+    assert merged.histogram.counts == whole.histogram.counts
+    assert (merged.sketch.count, merged.sketch.zero_count, merged.sketch.bins) == \
+        (whole.sketch.count, whole.sketch.zero_count, whole.sketch.bins)
+    assert merged.stats.count == whole.stats.count
+    assert merged.stats.mean == pytest.approx(whole.stats.mean)
+    assert merged.stats.stdev == pytest.approx(whole.stats.stdev)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_federated_sections_equal_a_single_load(cohort_file, tmp_path, workers):
+    paths = split_sections(cohort_file, tmp_path, [97, 180])
+    with main.using_store(read_store(cohort_file)):
+        whole = main.AnalysisSummary.from_analysis(main.analyze_students(low_memory=True))
+    total = main.federate(paths, workers).total
+
+    assert total.student_count == whole.student_count == 300
+    assert dict(total.fail_counts) == dict(whole.fail_counts)
+    assert total.all_subjects_pass_fail == whole.all_subjects_pass_fail
+    assert dict(total.branch_counts) == dict(whole.branch_counts)
+    assert (total.pending_fee_students, total.pending_fee_total) == \
+        (whole.pending_fee_students, whole.pending_fee_total)
+    assert without_section(total.class_toppers.items()) == without_section(whole.class_toppers.items())
+    assert total.class_average == pytest.approx(whole.class_average)
+
+    assert list(total.subject_stats) == list(whole.subject_stats)
+    for code, stats in whole.subject_stats.items():
+        merged = total.subject_stats[code]
+        for key in ("name", "pass_count", "fail_count", "ia1_absent", "ia2_absent", "ia3_absent",
+                    "assign_not_submitted", "grades"):
+            assert merged[key] == stats[key], (code, key)
+        assert without_section(merged["toppers"].items()) == without_section(stats["toppers"].items()), code
+        assert_same_distribution(merged["theory"], stats["theory"])
+        assert_same_distribution(merged["lab"], stats["lab"])
@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+import pytest
+
+import main
+from conftest import read_store
+
+GRADES = ("Distinction", "First Class", "Second Class", "Pass", "Fail")
+
+
+@pytest.fixture
+def cohort(cohort_file):
+    store = read_store(cohort_file)
+    with main.using_store(store):
+        yield [student.to_dict() for student in store], main.analyze_students()
+
+
+def theory_total(subject):
+    return main.calculate_theory_total(subject)[0]
+
+
+def test_subject_aggregates(cohort):
+    records, analysis = cohort
+    expected = defaultdict(lambda: {"pass_count": 0, "fail_count": 0, "grades": dict.fromkeys(GRADES, 0),
+                                    "ia1_absent": 0, "ia2_absent": 0, "ia3_absent": 0,
+                                    "assign_not_submitted": 0, "students": []})
+    for student in records:
+        for subject in student["subjects"]:
+            stats = expected[subject["code"]]
+            for i, mark in enumerate(subject["ia"]):
+                stats[f"ia{i + 1}_absent"] += mark == 0
+            stats["assign_not_submitted"] += subject["assignment"] == 0
+            eligible, _ = main.is_eligible_for_exam(subject)
+            stats["pass_count" if eligible else "fail_count"] += 1
+            grade, _ = main.calculate_grade(theory_total(subject), main.MAX_THEORY_MARKS)
+            stats["grades"][grade] += 1
+            stats["students"].append((student["usn"], theory_total(subject)))
+
+    assert set(analysis.subject_stats) == set(expected)
+    for code, stats in expected.items():
+        fused = analysis.subject_stats[code]
+        for key in ("pass_count", "fail_count", "ia1_absent", "ia2_absent", "ia3_absent", "assign_not_submitted"):
+            assert fused[key] == stats[key], (code, key)
+        assert {grade: fused["grades"][grade] for grade in GRADES} == stats["grades"]
+        top = sorted(stats["students"], key=lambda row: row[1], reverse=True)[:main.TOPPERS_K]
+        assert [(row["usn"], row["theory_total"]) for row in fused["toppers"].items()] == top
+
+
+def test_student_aggregates(cohort):
+    records, analysis = cohort
+    college, others, branches, categories = [], [], {}, {}
+    types = {"IPCC (Theory + Lab)": 0, "Normal Subject + Lab": 0, "Normal Subject": 0}
+    fail_distribution = defaultdict(list)
+    pending = {}
+    class_performance = []
+    for student in records:
+        name, usn = student["name"], student["usn"]
+        (college if main.is_college_student(usn) else others).append((name, usn))
+        branches.setdefault(main.get_branch_from_usn(usn), []).append(name)
+        balance = student["fee_total"] - student["fee_paid"]
+        if balance > 0:
+            pending[usn] = (name, usn, student["mentor"], balance)
+        failed = 0
+        grades = []
+        for subject in student["subjects"]:
+            types[main.check_subject_type(subject)] += 1
+            failed += not main.is_eligible_for_exam(subject)[0]
+            grades.append(main.calculate_grade(theory_total(subject), main.MAX_THEORY_MARKS)[0])
+        fail_distribution[failed].append({"name": name, "usn": usn, "failed_count": failed})
+        categories.setdefault(max(grades, key=GRADES[::-1].index), []).append(name)
+        total = sum(theory_total(subject) for subject in student["subjects"])
+        class_performance.append((usn, total / (len(grades) * main.MAX_THEORY_MARKS) * 100))
+
+    assert (analysis.college_students, analysis.non_college_students) == (college, others)
+    assert analysis.branch_distribution == branches
+    assert analysis.subject_type_count == types
+    assert analysis.grade_categories == categories
+    assert dict(analysis.fail_distribution) == fail_distribution
+    assert analysis.all_subjects_pass_fail == {"passed_all": len(fail_distribution[0]),
+                                               "failed_any": len(records) - len(fail_distribution[0])}
+    assert analysis.fee_alerts == pending
+    assert (analysis.fees.pending_students, analysis.fees.outstanding) == (
+        len(pending), sum(entry[3] for entry in pending.values()))
+    top = sorted(class_performance, key=lambda row: row[1], reverse=True)[:main.TOPPERS_K]
+    assert [(row["usn"], row["average"]) for row in analysis.class_toppers.items()] == top
+    assert analysis.class_average == pytest.approx(sum(row[1] for row in class_performance) / len(records))
@@ -0,0 +1,57 @@
+import re
+
+import gen_cohort
+import main
+from conftest import read_store
+
+# Format field -> (store column, maximum mark). Sub(3IA) lines are written
+# like c3.txt has them, but the format reads IA3 as 0.
+MARK_LINES = {
+    "Sub(1IA)": ("ia1", 40),
+    "Sub(2IA)": ("ia2", 40),
+    "Sub(3IA)": ("ia3", 40),
+    "Assignment Marks": ("assignment", 10),
+    "Sub(Ext)": ("external", 40),
+    "Lab IA Marks": ("lab_ia", 50),
+    "Continuous Evaluation Marks": ("continuous_eval", 50),
+}
+MARK_LINE = re.compile(r"(.+?): (\w+)$")
+
+
+def generated_marks(count, seed):
+    """{store column: [marks in file order]} read straight from the generated lines"""
+    columns = {column: [] for column, _ in MARK_LINES.values()}
+    for line in gen_cohort.generate(count, seed):
+        match = MARK_LINE.match(line)
+        if match and match.group(1) in MARK_LINES:
+            value = match.group(2)
+            columns[MARK_LINES[match.group(1)][0]].append(0 if value == "AB" else int(value))
+    return columns
+
+
+def test_generated_file_round_trips_through_read_students(tmp_path):
+    path = str(tmp_path / "cohort.txt")
+    gen_cohort.write_cohort(path, 500, seed=11)
+    store = read_store(path)
+
+    assert len(store) == 500
+    assert len(set(store.usns)) == 500
+    generated = generated_marks(500, 11)
+    for column, marks in generated.items():
+        expected = [0] * len(marks) if column == "ia3" else marks
+        assert list(store.marks[column]) == expected, column
+
+
+def test_generated_marks_are_within_the_format_maximums():
+    columns = generated_marks(2000, 5)
+    for column, maximum in MARK_LINES.values():
+        assert 0 <= min(columns[column]) and max(columns[column]) <= maximum, column
+    assert max(columns["external"]) > 30
+    theory = [sum(marks) for marks in zip(*(columns[field] for field in
+                                            ("ia1", "ia2", "assignment", "external")))]
+    assert max(theory) <= main.MAX_THEORY_MARKS
+
+
+def test_same_seed_gives_the_same_file():
+    assert list(gen_cohort.generate(50, seed=2)) == list(gen_cohort.generate(50, seed=2))
+    assert list(gen_cohort.generate(50, seed=2)) != list(gen_cohort.generate(50, seed=3))
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+import main
+from conftest import read_store
+
+
+def test_vectorized_metrics_match_the_scalar_path(cohort_file):
+    pytest.importorskip("numpy")
+    store = read_store(cohort_file)
+    slots = range(store.subject_start[-1])
+    scalar = [main.compute_subject_metrics(main.SubjectView(store, slot)) for slot in slots]
+    store.fill_metrics()
+    vectorized = [store.metrics(slot) for slot in slots]
+
+    assert len(vectorized) == len(scalar) > 1000
+    for slot, (fast, slow) in enumerate(zip(vectorized, scalar)):
+        assert (fast.eligible, fast.reason, fast.grade, fast.subject_type) == \
+            (slow.eligible, slow.reason, slow.grade, slow.subject_type), slot
+        assert list(fast.best_two) == list(slow.best_two), slot
+        assert fast.theory_total == pytest.approx(slow.theory_total), slot
+        assert fast.lab_total == slow.lab_total, slot
+        assert fast.percentage == pytest.approx(slow.percentage), slot
+
+
+@pytest.fixture(params=["numpy", "scalar"])
+def engine(request, monkeypatch):
+    """Run the test with the vectorized sweep and again with the pure-Python one"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(main, "np", None)
+    return request.param
+
+
+def test_default_policy_sweep_reproduces_the_report_counts(cohort_file, engine):
+    store = read_store(cohort_file)
+    with main.using_store(store):
+        analysis = main.analyze_students()
+    outcome, = main.sweep_policies([main.DEFAULT_POLICY], store)
+
+    subject_stats = analysis.subject_stats.values()
+    assert outcome.passed == sum(stats["pass_count"] for stats in subject_stats)
+    assert outcome.subjects == sum(stats["pass_count"] + stats["fail_count"] for stats in subject_stats)
+    assert outcome.students == len(store)
+    assert outcome.passed_all == analysis.all_subjects_pass_fail["passed_all"]
+    assert outcome.grades == {grade: sum(stats["grades"][grade] for stats in subject_stats)
+                              for grade in outcome.grades}
+
+
+def test_stricter_theory_pass_mark_fails_more_subjects(cohort_file, engine):
+    store = read_store(cohort_file)
+    strict = main.DEFAULT_POLICY._replace(name="strict", theory_pass_percent=0.5)
+    lenient = main.DEFAULT_POLICY._replace(name="lenient", theory_pass_percent=0.3)
+    default, strict_outcome, lenient_outcome = main.sweep_policies([main.DEFAULT_POLICY, strict, lenient], store)
+
+    # Passing under the stricter policy means passing now with 50% of the theory marks
+    metrics = [main.compute_subject_metrics(main.SubjectView(store, slot)) for slot in range(store.subject_start[-1])]
+    strict_mark = main.MAX_THEORY_MARKS * 0.5
+    assert strict_outcome.passed == sum(m.eligible and m.theory_total >= strict_mark for m in metrics)
+    assert strict_outcome.passed < default.passed < lenient_outcome.passed
+    assert strict_outcome.passed_all <= default.passed_all <= lenient_outcome.passed_all
+    # Grade bands are unchanged, and the sweep leaves the active policy alone
+    assert strict_outcome.grades == default.grades == lenient_outcome.grades
+    assert main.grading_policy.policy is main.DEFAULT_POLICY
+
+
+def test_sweep_compares_against_the_chosen_policy(cohort_file, tmp_path):
+    policies = str(tmp_path / "policies.json")
+    with open(policies, "w", encoding="utf-8") as f:
+        json.dump([{"name": "strict", "theory_pass_percent": 0.5},
+                   {"name": "lenient", "theory_pass_percent": 0.3}], f)
+    output = str(tmp_path / "sweep.jsonl")
+    with contextlib.redirect_stderr(io.StringIO()):
+        assert main.main(["-f", cohort_file, "--policies", policies, "--policy", "strict", "--sweep",
+                          "--format", "jsonl", "-o", output]) == 0
+    with open(output, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["policy"] for row in rows] == ["strict", "strict", "lenient"]
+    assert rows[2]["subject_pass_change"] > 0
+    assert main.grading_policy.policy is main.DEFAULT_POLICY
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+import gen_cohort
+import main
+from conftest import read_store
+
+SEMESTERS = ("2024-1", "2024-2")
+
+
+@pytest.fixture
+def two_semesters(tmp_path):
+    """A history of two generated semesters, with the store each was parsed into"""
+    stores = {}
+    history = main.SemesterHistory(str(tmp_path / "history"))
+    # Added out of order: semesters are ordered by name, not by when they were added
+    for seed, semester in reversed(list(enumerate(SEMESTERS, 1))):
+        path = str(tmp_path / f"{semester}.txt")
+        gen_cohort.write_cohort(path, 200, seed=seed)
+        history.add(semester, path)
+        stores[semester] = read_store(path)
+    yield history, {semester: stores[semester] for semester in SEMESTERS}
+    history.close()
+
+
+def failed_codes(store):
+    """{usn: [codes of the subjects the student is not eligible in]} for students with failures"""
+    result = {}
+    for student in store:
+        codes = [subject["code"] for subject in student["subjects"] if not main.subject_metrics(subject).eligible]
+        if codes:
+            result[student["usn"]] = codes
+    return result
+
+
+def test_each_semester_is_its_own_append_only_partition(two_semesters, tmp_path):
+    history, stores = two_semesters
+    assert history.semesters() == list(SEMESTERS)
+    for semester in SEMESTERS:
+        assert os.path.exists(history.partition_path(semester))
+    overview = dict(history.overview())
+    for semester, store in stores.items():
+        assert int(overview[semester]["students"]) == len(store)
+        assert overview[semester]["semester"] == semester
+        conn = history._connect(semester)
+        assert conn.execute("SELECT COUNT(*) FROM students").fetchone()[0] == len(store)
+        assert conn.execute("SELECT COUNT(*) FROM student_summary").fetchone()[0] == len(store)
+
+    with pytest.raises(ValueError):
+        history.add(SEMESTERS[0], str(tmp_path / f"{SEMESTERS[1]}.txt"))
+    with pytest.raises(ValueError):
+        history.add("../escape", str(tmp_path / f"{SEMESTERS[1]}.txt"))
+    assert history.semesters() == list(SEMESTERS)
+
+
+def test_pass_rate_trends_follow_each_semester_analysis(two_semesters):
+    history, stores = two_semesters
+    trends = history.pass_rate_trends()
+    for semester, store in stores.items():
+        with main.using_store(store):
+            analysis = main.analyze_students()
+        for code, stats in analysis.subject_stats.items():
+            name, by_semester = trends[code]
+            assert name == stats["name"]
+            assert by_semester[semester] == (stats["pass_count"], stats["fail_count"])
+    code = next(iter(trends))
+    assert history.pass_rate_trends(code) == {code: trends[code]}
+
+
+def test_trajectory_lists_every_semester_of_a_student(two_semesters):
+    history, stores = two_semesters
+    usns = [set(student["usn"] for student in store) for store in stores.values()]
+    both = sorted(usns[0] & usns[1])
+    assert both
+    usn = both[0]
+    trajectory = history.trajectory(usn)
+    assert [entry[0] for entry in trajectory] == list(SEMESTERS)
+    for (semester, name, average, grade, subjects), store in zip(trajectory, stores.values()):
+        student = store.find(usn)
+        performance = main.student_performance(student)
+        assert name == student["name"]
+        assert (average, grade) == (pytest.approx(performance["average"]), performance["grade"])
+        assert [(code, eligible) for code, _, _, _, eligible in subjects] == \
+            [(subject["code"], main.subject_metrics(subject).eligible) for subject in student["subjects"]]
+    assert history.trajectory("NO-SUCH-USN") == []
+
+
+def test_repeat_failures_are_students_failing_in_both_semesters(two_semesters):
+    history, stores = two_semesters
+    first, second = (failed_codes(store) for store in stores.values())
+    repeats = history.repeat_failures()
+    assert sorted(usn for usn, _, _, _ in repeats) == sorted(set(first) & set(second))
+    assert repeats
+    for usn, _, by_semester, repeated in repeats:
+        assert by_semester == {SEMESTERS[0]: first[usn], SEMESTERS[1]: second[usn]}
+        assert repeated == sorted(set(first[usn]) & set(second[usn]))
+    assert len(history.repeat_failures(min_semesters=1)) == len(set(first) | set(second))
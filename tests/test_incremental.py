@@ -0,0 +1,98 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+import main
+from conftest import read_store, student_rows
+
+def open_session(path):
+    session = main.IncrementalSession(path, main.CohortStore())
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert session.load()
+    return session
+
+def read_blocks(path):
+    """The file's 'Student N' blocks; block i is store row i"""
+    with open(path, encoding="utf-8") as f:
+        blocks = f.read().split("\nStudent ")
+    return blocks[:1] + ["Student " + block for block in blocks[1:]]
+
+def write_blocks(path, blocks):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(blocks))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def analysis_state(analysis):
+    """Everything a report reads, with per-student lists as multisets (their order may differ after reload)"""
+    subjects = {code: (stats["name"], stats["pass_count"], stats["fail_count"], stats["ia1_absent"],
+                       stats["ia2_absent"], stats["ia3_absent"], stats["assign_not_submitted"],
+                       dict(stats["grades"]), stats["toppers"].items(), stats["theory"].stats.count)
+                for code, stats in analysis.subject_stats.items()}
+    return {
+        "subjects": subjects,
+        "fail_distribution": {failed: sorted(entry["usn"] for entry in entries)
+                              for failed, entries in analysis.fail_distribution.items()},
+        "pass_fail": dict(analysis.all_subjects_pass_fail),
+        "class_toppers": analysis.class_toppers.items(),
+        "grade_categories": {grade: sorted(names) for grade, names in analysis.grade_categories.items()},
+        "fee_alerts": sorted(analysis.fee_alerts.values()),
+        "outstanding": analysis.fees.outstanding_by("mentor"),
+        "average_count": analysis.average_count,
+    }
+
+def set_lines(block, prefix, value):
+    return "\n".join(prefix + ": " + value if line.startswith(prefix + ":") else line for line in block.split("\n"))
+
+def drop_first(block, prefix):
+    lines = block.split("\n")
+    del lines[next(i for i, line in enumerate(lines) if line.startswith(prefix + ":"))]
+    return "\n".join(lines)
+
+def edit_blocks(blocks, session):
+    """Demote the class topper and a subject topper, make a new topper, drop fields of a first
+    subject (carried from the block before), change another block, add and remove blocks"""
+    analysis = session.analysis
+    row_of = session.store.index.row_of
+    top = row_of(analysis.class_toppers.items()[0]["usn"])
+    blocks[top] = set_lines(blocks[top], "Sub(Ext)", "0")
+    subject_top = row_of(analysis.subject_stats["EVS106"]["toppers"].items()[0]["usn"])
+    blocks[subject_top] = set_lines(blocks[subject_top], "Sub(1IA)", "0")
+    for prefix, value in (("Sub(1IA)", "40"), ("Sub(2IA)", "40"), ("Assignment Marks", "10"), ("Sub(Ext)", "40")):
+        blocks[5] = set_lines(blocks[5], prefix, value)
+    blocks[40] = drop_first(drop_first(blocks[40], "Subject Name"), "Sub(Ext)")
+    blocks[41] = set_lines(blocks[41], "Assignment Marks", "0")
+    extra = blocks[10].replace("USN: ", "USN: 9", 1)
+    return blocks[:-3] + [extra]
+
+def test_reload_matches_cold_load(cohort_file):
+    session = open_session(cohort_file)
+    blocks = edit_blocks(read_blocks(cohort_file), session)
+    write_blocks(cohort_file, blocks)
+    assert session.changed_on_disk()
+    changed, added, removed = session.reload()
+    assert changed >= 4 and removed == 2
+    
+    # The reload saved a snapshot, so compare with a parse of the text itself
+    cold_store = read_store(cohort_file)
+    with main.using_store(cold_store):
+        cold = main.analyze_students()
+    assert student_rows(session.store) == student_rows(cold_store)
+    assert analysis_state(session.analysis) == analysis_state(cold)
+    assert session.analysis.class_average == pytest.approx(cold.class_average)
+
+def test_reload_without_changes_reuses_every_block(cohort_file):
+    session = open_session(cohort_file)
+    before = analysis_state(session.analysis)
+    assert session.reload() == (0, 0, 0)
+    assert analysis_state(session.analysis) == before
+
+def test_reload_keeps_other_stores_untouched(cohort_file):
+    main.students.clear()
+    session = open_session(cohort_file)
+    write_blocks(cohort_file, read_blocks(cohort_file)[:-1])
+    session.reload()
+    assert len(main.students) == 0
+    assert len(session.store) == 299
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import json
+import re
+
+import pytest
+
+import main
+
+SAMPLE = re.compile(r'^sms_[a-z_]+(\{phase="[a-z_]+"\})? [0-9.e+-]+$')
+
+
+@pytest.fixture
+def instruments(monkeypatch):
+    fresh = main.Instruments()
+    monkeypatch.setattr(main, "instruments", fresh)
+    return fresh
+
+
+def prometheus_samples(text):
+    """{(metric, phase or None): value} of a Prometheus text export, checking every line's format"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP sms_[a-z_]+ .+|TYPE sms_[a-z_]+ (counter|gauge))$", line), line
+            continue
+        assert SAMPLE.match(line), line
+        metric, value = line.split(" ")
+        name, _, label = metric.partition("{")
+        samples[name, label[len('phase="'):-2] or None] = float(value)
+    return samples
+
+
+def test_disabled_instruments_record_nothing(instruments):
+    with instruments.phase("load"):
+        pass
+    assert instruments.phase("analyze") is main._NULL_TIMER
+    assert instruments.summary() == {"phases": {}, "counters": {}}
+
+
+def test_exports_agree(instruments, tmp_path):
+    instruments.enable()
+    for _ in range(2):
+        with instruments.phase("load"):
+            pass
+    instruments.count("students_parsed", 300)
+    instruments.merge_counters({"students_parsed": 5, "lines_read": 10})
+    json_path, prom_path = tmp_path / "metrics.json", tmp_path / "metrics.prom"
+    instruments.export(str(json_path), str(prom_path))
+
+    summary = json.loads(json_path.read_text(encoding="utf-8"))
+    assert summary == instruments.summary()
+    assert summary["counters"] == {"lines_read": 10, "students_parsed": 305}
+    load = summary["phases"]["load"]
+    assert load["calls"] == 2 and load["wall_seconds"] >= 0 and load["cpu_seconds"] >= 0
+
+    samples = prometheus_samples(prom_path.read_text(encoding="utf-8"))
+    assert samples["sms_phase_calls_total", "load"] == 2
+    assert samples["sms_phase_wall_seconds", "load"] == pytest.approx(load["wall_seconds"])
+    assert samples["sms_students_parsed_total", None] == 305
+    assert samples["sms_lines_read_total", None] == 10
+
+
+def test_cli_run_exports_phases_and_counters(instruments, cohort_file, tmp_path):
+    json_path, prom_path = tmp_path / "metrics.json", tmp_path / "metrics.prom"
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        assert main.main(["-f", cohort_file, "--reports", "fa", "--format", "jsonl", "-o", str(tmp_path / "out"),
+                          "--metrics-json", str(json_path), "--metrics-prom", str(prom_path)]) == 0
+    summary = json.loads(json_path.read_text(encoding="utf-8"))
+    assert ["load", "analyze", "report_f", "report_a", "render"] == list(summary["phases"])
+    assert summary["counters"]["students_parsed"] == 300
+    samples = prometheus_samples(prom_path.read_text(encoding="utf-8"))
+    assert {phase for metric, phase in samples if metric == "sms_phase_cpu_seconds"} == set(summary["phases"])
+    for name, amount in summary["counters"].items():
+        assert samples[f"sms_{name}_total", None] == amount
@@ -0,0 +1,58 @@
+import pytest
+
+import main
+from conftest import read_store
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    fresh = main.Instruments()
+    fresh.enable()
+    monkeypatch.setattr(main, "instruments", fresh)
+    return fresh.counters
+
+
+def slot_count(store):
+    return store.subject_start[-1]
+
+
+def fresh_metrics(store, slot):
+    return main.compute_subject_metrics(main.SubjectView(store, slot))
+
+
+def test_each_slot_is_graded_once(cohort_file, counters):
+    store = read_store(cohort_file)
+    with main.using_store(store):
+        analysis = main.analyze_students()
+        assert counters["metrics_cache_misses"] == slot_count(store)
+        analysis.rebuild_class_toppers()
+        for student in store:
+            main.student_performance(student)
+    assert counters["metrics_cache_misses"] == slot_count(store)
+    assert counters["metrics_cache_hits"] >= 2 * slot_count(store)
+
+
+def test_mark_edits_regrade_only_the_edited_slot(cohort_file, counters):
+    store = read_store(cohort_file)
+    store.fill_metrics()
+    cached = [store.metrics(slot) for slot in range(slot_count(store))]
+    subject = store[7]["subjects"][2]
+    subject["external"] = 0
+    misses = counters["metrics_cache_misses"]
+    for slot in range(slot_count(store)):
+        if slot != subject.slot:
+            assert store.metrics(slot) is cached[slot]
+    assert counters["metrics_cache_misses"] == misses
+    assert store.metrics(subject.slot) == fresh_metrics(store, subject.slot) != cached[subject.slot]
+    assert counters["metrics_cache_misses"] == misses + 1
+
+
+def test_replaced_rows_are_regraded(cohort_file):
+    store = read_store(cohort_file)
+    store.fill_metrics()
+    student = store[3].to_dict()
+    for subject in student["subjects"]:
+        subject["external"] = 0
+    store.replace(3, student)
+    for slot in range(slot_count(store)):
+        assert store.metrics(slot) == fresh_metrics(store, slot)
@@ -0,0 +1,127 @@
+import contextlib
+import csv
+import io
+import json
+
+import pytest
+
+import main
+
+
+TABLE = main.ReportTable("d", "Exam eligibility", ("usn", "name", "eligible", "average"), [
+    ("1AB23CS001", 'Rao, "Ravi" <b>', True, 71.5),
+    ("1AB23CS002", "Łucja Nowak", False, 40.0),
+    ("1AB23CS003", "Plain", True, 0.125),
+])
+
+
+def render(sink_class, tables=(TABLE,)):
+    stream = io.StringIO()
+    sink = sink_class(stream)
+    sink.begin()
+    for table in tables:
+        sink.write_table(table)
+    sink.end()
+    return stream.getvalue()
+
+
+def run_main(*argv):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return main.main(list(argv))
+
+
+def test_csv_sink_round_trips_rows():
+    lines = render(main.CsvSink).splitlines()
+    assert lines[0] == "# d) Exam eligibility"
+    rows = list(csv.reader(lines[1:-1]))
+    assert rows[0] == list(TABLE.columns)
+    assert rows[1:] == [[str(value) for value in row] for row in TABLE.rows]
+
+
+def test_json_lines_sink_keeps_values():
+    records = [json.loads(line) for line in render(main.JsonLinesSink).splitlines()]
+    assert [[record[column] for column in TABLE.columns] for record in records] == [list(row) for row in TABLE.rows]
+    assert {(record["report"], record["title"]) for record in records} == {("d", "Exam eligibility")}
+
+
+def test_html_sink_escapes_cells():
+    page = render(main.HtmlSink)
+    assert page.startswith("<!DOCTYPE html>") and page.endswith("</body></html>\n")
+    assert "Rao, &quot;Ravi&quot; &lt;b&gt;" in page
+    assert "<td>YES</td>" in page and "<td>71.50</td>" in page
+
+
+def test_text_sink_aligns_columns():
+    lines = render(main.TextSink).splitlines()
+    header, rule, rows = lines[2], lines[3], lines[4:]
+    assert len(rule) == len(header)
+    assert all(len(row) == len(header) for row in rows)
+    assert rows[1].split()[-2:] == ["NO", "40.00"]
+
+
+@pytest.mark.parametrize("sink_class", list(main.REPORT_SINKS.values()))
+def test_chunked_writes_do_not_change_output(sink_class, monkeypatch):
+    tables = [TABLE._replace(rows=TABLE.rows * 5)]
+    whole = render(sink_class, tables)
+    monkeypatch.setattr(main, "RENDER_ROWS_PER_WRITE", 2)
+    assert render(sink_class, tables) == whole
+
+
+def test_formats_write_the_same_rows(cohort_file, tmp_path):
+    outputs = {}
+    for output_format in ("csv", "jsonl"):
+        outputs[output_format] = str(tmp_path / f"reports.{output_format}")
+        assert run_main("-f", cohort_file, "--reports", "dfi", "--format", output_format,
+                        "-o", outputs[output_format]) == 0
+    with open(outputs["jsonl"], encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    with open(outputs["csv"], encoding="utf-8", newline="") as f:
+        sections = f.read().split("\n\n")
+    csv_rows = sum(len(list(csv.reader(io.StringIO(section)))) - 2 for section in sections if section.strip())
+    assert csv_rows == len(records) > 300
+
+
+def test_interactive_mode_exits_nonzero_when_the_file_cannot_be_read(tmp_path):
+    assert run_main("-f", str(tmp_path / "missing.txt")) == 1
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    assert run_main("-f", str(empty)) == 1
+
+
+def report_letters(path):
+    letters = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            letter = json.loads(line)["report"]
+            if letter not in letters:
+                letters.append(letter)
+    return letters
+
+
+def test_expand_report_letters():
+    assert main.expand_report_letters("xE") == list(main.ALL_REPORTS)
+    assert main.expand_report_letters("edDk") == ["d", "k"]
+    assert main.expand_report_letters("zx")[:2] == ["z", "a"]
+
+
+@pytest.mark.parametrize("letters, expected", [
+    ("kfa", ["k", "f", "a"]),
+    ("x", list(main.ALL_REPORTS)),
+    ("ezu", ["d", "z", "u"]),
+])
+def test_batch_writes_the_selected_reports_in_order(cohort_file, tmp_path, letters, expected):
+    output = str(tmp_path / "reports.jsonl")
+    assert run_main("-f", cohort_file, "--reports", letters, "--format", "jsonl", "-o", output) == 0
+    assert report_letters(output) == expected
+
+
+def test_batch_lookup_alone_loads_nothing(cohort_file, tmp_path):
+    output = str(tmp_path / "lookup.jsonl")
+    with main.using_store(main.CohortStore()) as store:
+        assert run_main("-f", cohort_file, "--reports", "p", "--usn", "1AB21AI001",
+                        "--format", "jsonl", "-o", output) == 0
+        assert len(store) == 0
+    with open(output, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records and {record["report"] for record in records} == {"p"}
+    assert "1AB21AI001" in json.dumps(records)
@@ -0,0 +1,68 @@
+import asyncio
+import contextlib
+import io
+import json
+
+import main
+
+
+async def exchange(service, paths):
+    """(status, content type, body) for each path, over one keep-alive connection to service.handle"""
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    try:
+        for number, path in enumerate(paths, 1):
+            connection = "close" if number == len(paths) else "keep-alive"
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\nConnection: {connection}\r\n\r\n".encode("ascii"))
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.lower()] = value.strip()
+            body = await reader.readexactly(int(headers["content-length"]))
+            responses.append((status, headers["content-type"], body))
+        assert await reader.read() == b""     # Closed after "Connection: close"
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+    return responses
+
+
+def test_service_answers_metrics_and_student_lookups(cohort_file):
+    with main.using_store(main.CohortStore()) as store, contextlib.redirect_stdout(io.StringIO()):
+        session = main.IncrementalSession(cohort_file)
+        assert session.load()
+        service = main.QueryService(session)
+        student = store[42]
+        usn = student["usn"]
+        responses = asyncio.run(exchange(service, ["/metrics?format=json", "/metrics",
+                                                   f"/students/{usn.lower()}", "/students/NO-SUCH-USN"]))
+
+    (status, content_type, body), (prom_status, prom_type, prom_body), lookup, missing = responses
+    assert (status, content_type) == (200, "application/json; charset=utf-8")
+    metrics = json.loads(body)
+    assert set(metrics) == {"phases", "counters"}
+    assert metrics["counters"]["students_parsed"] >= 300
+    assert (prom_status, prom_type) == (200, "text/plain; charset=utf-8")
+    assert f"{main.METRICS_PREFIX}_students_parsed_total {metrics['counters']['students_parsed']}" in \
+        prom_body.decode("utf-8").splitlines()
+
+    status, _, body = lookup
+    assert status == 200
+    payload = json.loads(body)
+    assert (payload["usn"], payload["name"], payload["mentor"]) == (usn, student["name"], student["mentor"])
+    assert payload["fee_balance"] == student["fee_total"] - student["fee_paid"]
+    assert [(subject["subject_code"], subject["grade"], subject["eligible"]) for subject in payload["subjects"]] == \
+        [(subject["code"], main.subject_metrics(subject).grade, main.subject_metrics(subject).eligible)
+         for subject in student["subjects"]]
+
+    status, _, body = missing
+    assert status == 404
+    assert json.loads(body) == {"error": "no student with USN NO-SUCH-USN"}
+    assert service.requests == 4
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+import main
+
+
+def sample(seed, count=5000):
+    rng = random.Random(seed)
+    return [rng.uniform(1, 200) for _ in range(count)]
+
+
+@pytest.mark.parametrize("q", [0.01, 0.25, 0.5, 0.9, 0.99])
+def test_quantiles_are_within_the_relative_accuracy(q):
+    values = sample(1)
+    sketch = main.QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    exact = sorted(values)[int(q * (len(values) - 1))]
+    assert sketch.quantile(q) == pytest.approx(exact, rel=main.SKETCH_RELATIVE_ACCURACY)
+
+
+def test_removing_values_matches_never_adding_them():
+    values = sample(2)
+    kept, removed = values[::2], values[1::2]
+    sketch, fresh = main.QuantileSketch(), main.QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    for value in removed:
+        sketch.add(value, -1)
+    for value in kept:
+        fresh.add(value)
+    assert sketch.count == fresh.count
+    assert sketch.bins == fresh.bins
+
+
+def test_removing_after_a_collapse_keeps_counts_positive():
+    values = sample(3, 500)
+    sketch = main.QuantileSketch(max_bins=8)
+    for value in values:
+        sketch.add(value)
+    for value in values[:400]:
+        sketch.add(value, -1)
+        assert all(count > 0 for count in sketch.bins.values())
+    assert sum(sketch.bins.values()) + sketch.zero_count == sketch.count == 100
+    for value in values[400:]:
+        sketch.add(value, -1)
+    assert sketch.bins == {} and sketch.count == 0
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+import main
+from conftest import read_store, student_rows
+
+
+def index_state(index):
+    return {name: dict(getattr(index, name)) for name in ("by_usn",) + main.CohortIndex.SECONDARY}
+
+
+def load_with_snapshot(path):
+    """load_cohort into a fresh store, returning (store, stderr text)"""
+    errors = io.StringIO()
+    with main.using_store(main.CohortStore()) as store, \
+            contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(errors):
+        assert main.load_cohort(path)
+    return store, errors.getvalue()
+
+
+def test_snapshot_round_trip(cohort_file):
+    parsed = read_store(cohort_file)
+    # A USN too short to decode exercises the None index keys
+    parsed.append({"name": "Short", "usn": "1A", "subjects": []})
+    fingerprints = [bytes([i % 256]) * 16 for i in range(len(parsed))]
+    main.write_snapshot(parsed, cohort_file, fingerprints)
+
+    assert main.snapshot_is_fresh(cohort_file)
+    loaded = main.CohortStore()
+    assert main.read_snapshot(cohort_file, loaded) == fingerprints
+    assert student_rows(loaded) == student_rows(parsed)
+    assert loaded.mentors == parsed.mentors
+    assert index_state(loaded.index) == index_state(parsed.index)
+    assert loaded.index.by_college[None] == [len(parsed) - 1]
+
+
+def test_snapshot_keeps_first_row_of_duplicate_usns(tmp_path):
+    path = str(tmp_path / "cohort.txt")
+    open(path, "w").close()
+    store = main.CohortStore()
+    for name in ("First", "Second"):
+        store.append({"name": name, "usn": "1AB23CV001", "subjects": []})
+    main.write_snapshot(store, path)
+
+    loaded = main.CohortStore()
+    main.read_snapshot(path, loaded)
+    assert loaded.index.row_of("1AB23CV001") == 0
+
+
+def test_load_cohort_writes_and_reuses_snapshot(cohort_file):
+    first, _ = load_with_snapshot(cohort_file)
+    assert os.path.exists(main.snapshot_path(cohort_file))
+    second, errors = load_with_snapshot(cohort_file)
+    assert errors == ""
+    assert student_rows(second) == student_rows(first)
+    assert index_state(second.index) == index_state(first.index)
+
+
+def corrupt_truncated(data):
+    return data[:len(data) // 2]
+
+
+def corrupt_section_length(data):
+    # The first section length, just past the header, now runs past the end
+    offset = main.SNAPSHOT_HEADER.size
+    return data[:offset] + main.SECTION_LENGTH.pack(len(data)) + data[offset + main.SECTION_LENGTH.size:]
+
+
+def corrupt_student_count(data):
+    header = list(main.SNAPSHOT_HEADER.unpack_from(data, 0))
+    header[7] += 1
+    return main.SNAPSHOT_HEADER.pack(*header) + data[main.SNAPSHOT_HEADER.size:]
+
+
+def corrupt_header_only(data):
+    return data[:main.SNAPSHOT_HEADER.size]
+
+
+@pytest.mark.parametrize("corrupt", [corrupt_truncated, corrupt_section_length,
+                                     corrupt_student_count, corrupt_header_only])
+def test_corrupt_snapshot_falls_back_to_parsing(cohort_file, corrupt):
+    expected = student_rows(read_store(cohort_file))
+    load_with_snapshot(cohort_file)
+    target = main.snapshot_path(cohort_file)
+    with open(target, "rb") as f:
+        data = f.read()
+    with open(target, "wb") as f:
+        f.write(corrupt(data))
+    assert main.snapshot_is_fresh(cohort_file)
+
+    with pytest.raises(ValueError):
+        main.read_snapshot(cohort_file, main.CohortStore())
+    store, errors = load_with_snapshot(cohort_file)
+    assert "unreadable snapshot" in errors
+    assert student_rows(store) == expected
+    # The reparse replaced the broken snapshot
+    main.read_snapshot(cohort_file, main.CohortStore())
+
+
+def test_session_reparses_corrupt_snapshot(cohort_file):
+    expected = student_rows(read_store(cohort_file))
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.IncrementalSession(cohort_file, main.CohortStore()).load()
+    target = main.snapshot_path(cohort_file)
+    with open(target, "r+b") as f:
+        f.truncate(os.path.getsize(target) - 5)
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        session = main.IncrementalSession(cohort_file, main.CohortStore())
+        assert session.load()
+    assert student_rows(session.store) == expected
+    assert len(session.fingerprints) == len(expected)
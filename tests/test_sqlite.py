@@ -0,0 +1,51 @@
+import contextlib
+import io
+
+import main
+
+
+def run_main(*argv):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return main.main(list(argv))
+
+
+def test_db_reports_match_in_memory_reports(cohort_file, tmp_path):
+    expected = str(tmp_path / "memory.jsonl")
+    assert run_main("-f", cohort_file, "--reports", main.DB_REPORTS, "--format", "jsonl", "-o", expected) == 0
+    db_path = str(tmp_path / "cohort.db")
+    for attempt in ("built", "reused"):
+        actual = str(tmp_path / f"{attempt}.jsonl")
+        assert run_main("-f", cohort_file, "--db", db_path, "--reports", "x", "--format", "jsonl", "-o", actual) == 0
+        with open(expected) as want, open(actual) as got:
+            assert got.read() == want.read()
+
+
+def test_db_refuses_reports_it_cannot_answer(cohort_file, tmp_path):
+    assert run_main("-f", cohort_file, "--db", str(tmp_path / "cohort.db"), "--reports", "fa") == 1
+
+
+def test_db_is_reloaded_when_the_policy_changes(cohort_file, tmp_path):
+    cohort = main.SQLiteCohort(str(tmp_path / "cohort.db"))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert cohort.load_file(cohort_file)
+        assert cohort.is_loaded_from(cohort_file)
+        assert len(cohort) == 300
+        try:
+            main.set_grading_policy(main.DEFAULT_POLICY._replace(theory_pass_percent=0.9))
+            assert not cohort.is_loaded_from(cohort_file)
+        finally:
+            main.set_grading_policy(main.DEFAULT_POLICY)
+        assert cohort.is_loaded_from(cohort_file)
+    finally:
+        cohort.close()
+
+
+def test_load_file_leaves_module_students_alone(cohort_file, tmp_path):
+    cohort = main.SQLiteCohort(str(tmp_path / "cohort.db"))
+    try:
+        with main.using_store(main.CohortStore()) as store, contextlib.redirect_stdout(io.StringIO()):
+            assert cohort.load_file(cohort_file)
+            assert len(store) == 0
+    finally:
+        cohort.close()
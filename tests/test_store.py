@@ -0,0 +1,62 @@
+import pytest
+
+import main
+from conftest import read_store, student_rows
+
+
+def parsed_students(path):
+    with open(path, encoding="utf-8") as f:
+        return list(main.iter_students(f.read().split("\n")))
+
+
+def test_views_read_like_the_parsed_dicts(cohort_file):
+    store = read_store(cohort_file)
+    parsed = parsed_students(cohort_file)
+    assert student_rows(store) == parsed
+    assert store[-1].to_dict() == parsed[-1]
+    assert store.find(parsed[42]["usn"]).index == 42
+    assert store.find("NOT-A-USN") is None
+    with pytest.raises(IndexError):
+        store[len(store)]
+    with pytest.raises(KeyError):
+        store[0]["phone"]
+
+
+def test_writes_through_views_update_the_columns(cohort_file):
+    store = read_store(cohort_file)
+    student = store[5]
+    old_usn = student["usn"]
+    student["usn"] = "1AB99ZZ999"
+    student["mentor"] = "Dr. New Mentor"
+    assert store.find(old_usn) is None
+    assert store.find("1AB99ZZ999").index == 5
+    assert store.mentors[store.mentor_id[5]] == "Dr. New Mentor"
+
+    subject = student["subjects"][0]
+    before = store.metrics(subject.slot)
+    subject["external"] = 0
+    subject["ia"] = [1, 2, 3]
+    assert store.marks["ia2"][subject.slot] == 2
+    assert store.metrics(subject.slot) is not before
+    assert store.metrics(subject.slot).theory_total < before.theory_total
+
+
+def test_replace_shifts_later_rows(cohort_file):
+    store = read_store(cohort_file)
+    parsed = parsed_students(cohort_file)
+    shorter = dict(parsed[10], subjects=parsed[10]["subjects"][:2])
+    store.replace(10, shorter)
+    assert store[10].to_dict() == shorter
+    assert student_rows(store)[11:] == parsed[11:]
+
+    store.truncate(20)
+    assert len(store) == 20
+    assert store.find(parsed[25]["usn"]) is None
+    assert student_rows(store)[11:] == parsed[11:20]
+
+
+def test_row_columns_round_trip(cohort_file):
+    store = read_store(cohort_file)
+    chunk = main.CohortStore.from_columns(store.row_columns(100, 150))
+    assert student_rows(chunk) == student_rows(store)[100:150]
+    assert chunk.find(store[120]["usn"]).index == 20